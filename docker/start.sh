@@ -17,7 +17,7 @@ fi
 
 # Generate initial dashboard
 echo "📊 Generating initial dashboard..."
-python3 /app/src/dashboard-generator.py
+python3 /app/src/dashboard-generator.py --snapshot
 
 # Set permissions
 chown -R www-data:www-data /app/www
@@ -44,7 +44,7 @@ else
         # Start services manually as fallback
         echo "Starting services manually..."
         nginx -g "daemon off;" &
-        python3 /app/src/idrac-container-api.py &
+        (cd /app/src && gunicorn -c gunicorn.conf.py wsgi:app) &
         python3 /app/src/network-scanner.py &
         # Keep container running
         tail -f /dev/null
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Async Core
+Background event loop for the liveness cache's concurrent TCP probes
+"""
+
+import os
+import asyncio
+import threading
+import concurrent.futures
+
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """Return this process's event loop, starting its thread on first use
+
+    Each gunicorn worker gets its own loop; one inherited across a fork is
+    never reused because its thread did not survive.
+    """
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name='async-core', daemon=True).start()
+        return _loop
+
+
+def submit(coro):
+    """Schedule a coroutine on the loop; returns a concurrent.futures.Future"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def run(coro, timeout=None):
+    """Run a coroutine on the loop and wait for its result
+
+    The calling thread blocks until it finishes; use submit() to fire and
+    forget. The coroutine is cancelled on timeout.
+    """
+    future = submit(coro)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
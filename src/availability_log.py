@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Availability Log
+Append-only per-host availability samples with hourly/daily rollups
+"""
+
+import os
+import re
+import time
+import struct
+import ipaddress
+from snapshot_writer import atomic_write
+
+# Configuration
+AVAILABILITY_DIR = os.environ.get('AVAILABILITY_DIR', '/app/data/availability')
+RAW_RETENTION = 2 * 86400      # raw samples kept before folding into hourly rollups
+HOURLY_RETENTION = 35 * 86400  # hourly rollups kept before folding into daily rollups
+COMPACT_INTERVAL = 3600
+
+HOUR = 3600
+DAY = 86400
+
+ONLINE = 1
+OFFLINE = 0
+NO_LATENCY = 0xFFFF
+
+# timestamp, state, latency_ms
+SAMPLE = struct.Struct('<IBH')
+# bucket start, samples, up, flaps, latency sum (ms), latency samples, first state, last state
+ROLLUP = struct.Struct('<IHHHIHBB')
+
+WINDOW_UNITS = {'m': 60, 'h': HOUR, 'd': DAY, 'w': 7 * DAY}
+
+
+def parse_window(window):
+    """Convert a window such as '24h', '7d' or '2w' to seconds"""
+    match = re.fullmatch(r'(\d+)([mhdw])', (window or '').strip())
+    if not match:
+        raise ValueError(f"Invalid window: {window!r} (expected e.g. 24h, 7d, 2w)")
+    return int(match.group(1)) * WINDOW_UNITS[match.group(2)]
+
+
+class Bucket:
+    """Rollup accumulator for one hour or day"""
+
+    __slots__ = ('start', 'samples', 'up', 'flaps', 'latency_sum', 'latency_count',
+                 'first', 'last')
+
+    def __init__(self, start, samples=0, up=0, flaps=0, latency_sum=0, latency_count=0,
+                 first=None, last=None):
+        self.start = start
+        self.samples = samples
+        self.up = up
+        self.flaps = flaps
+        self.latency_sum = latency_sum
+        self.latency_count = latency_count
+        self.first = first
+        self.last = last
+
+    def add_sample(self, state, latency):
+        if self.samples and state != self.last:
+            self.flaps += 1
+        if self.first is None:
+            self.first = state
+        self.last = state
+        self.samples += 1
+        self.up += state
+        if latency != NO_LATENCY:
+            self.latency_sum += latency
+            self.latency_count += 1
+
+    def merge(self, other):
+        if self.samples and other.samples and other.first != self.last:
+            self.flaps += 1
+        if self.first is None:
+            self.first = other.first
+        if other.samples:
+            self.last = other.last
+        self.samples += other.samples
+        self.up += other.up
+        self.flaps += other.flaps
+        self.latency_sum += other.latency_sum
+        self.latency_count += other.latency_count
+
+    def pack(self):
+        return ROLLUP.pack(self.start, min(self.samples, 0xFFFF), min(self.up, 0xFFFF),
+                           min(self.flaps, 0xFFFF), self.latency_sum,
+                           min(self.latency_count, 0xFFFF), self.first or 0, self.last or 0)
+
+
+def _find_first(f, record, count, since):
+    """Binary search a file of fixed-width records sorted by leading timestamp"""
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        f.seek(mid * record.size)
+        if struct.unpack('<I', f.read(4))[0] < since:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _read_range(path, record, since=0, until=None):
+    """Yield unpacked records with since <= timestamp < until, seeking past older ones"""
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        count = os.fstat(f.fileno()).st_size // record.size
+        f.seek(_find_first(f, record, count, since) * record.size)
+        while True:
+            chunk = f.read(record.size * 512)
+            if not chunk:
+                return
+            for offset in range(0, len(chunk) - record.size + 1, record.size):
+                values = record.unpack_from(chunk, offset)
+                if until is not None and values[0] >= until:
+                    return
+                yield values
+
+
+def _replace(path, payload):
+    """Atomically replace a log file, removing it when empty"""
+    if not payload:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    atomic_write(path, payload)
+
+
+class AvailabilityLog:
+    """Per-host availability samples stored as fixed-width binary records"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or AVAILABILITY_DIR
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, ip, kind):
+        # Normalising through ipaddress also rejects anything path-like
+        return os.path.join(self.directory, f"{ipaddress.ip_address(ip)}.{kind}")
+
+    def record(self, ip, online, latency_ms=None, timestamp=None):
+        """Append one availability sample for a host"""
+        self.record_many([(ip, online, latency_ms)], timestamp)
+
+    def record_many(self, samples, timestamp=None):
+        """Append (ip, online, latency_ms) samples taken at the same time"""
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        for ip, online, latency_ms in samples:
+            latency = NO_LATENCY if latency_ms is None else min(int(latency_ms), NO_LATENCY - 1)
+            state = ONLINE if online else OFFLINE
+            with open(self._path(ip, 'raw'), 'ab') as f:
+                f.write(SAMPLE.pack(timestamp, state, latency))
+
+    def hosts(self):
+        """Return the IPs that have availability data"""
+        return sorted({name.rsplit('.', 1)[0] for name in os.listdir(self.directory)
+                       if not name.startswith('.')})
+
+    # Compaction
+
+    def _fold(self, source, source_record, target, bucket_size, cutoff):
+        """Fold source records older than cutoff into target rollups
+
+        The merged rollup is renamed into place before the source is rewritten.
+        Cutoffs are bucket-aligned, so source records in a bucket the target
+        already covers were folded by a run that stopped in between; they are
+        dropped rather than counted twice.
+        """
+        existing = [Bucket(*values) for values in _read_range(target, ROLLUP)]
+        folded_until = existing[-1].start + bucket_size if existing else 0
+        buckets = {}
+        keep = bytearray()
+        folded = False
+        for values in _read_range(source, source_record):
+            if values[0] >= cutoff:
+                keep += source_record.pack(*values)
+                continue
+            folded = True
+            start = values[0] - values[0] % bucket_size
+            if start < folded_until:
+                continue
+            bucket = buckets.setdefault(start, Bucket(start))
+            if source_record is SAMPLE:
+                bucket.add_sample(values[1], values[2])
+            else:
+                bucket.merge(Bucket(*values))
+
+        if not folded:
+            return
+        if buckets:
+            merged = existing + [buckets[start] for start in sorted(buckets)]
+            atomic_write(target, b''.join(b.pack() for b in merged))
+        _replace(source, bytes(keep))
+
+    def compact_host(self, ip, now=None):
+        """Fold old raw samples into hourly rollups and old hourly rollups into daily ones"""
+        now = int(now if now is not None else time.time())
+        raw_cutoff = (now - RAW_RETENTION) // HOUR * HOUR
+        hourly_cutoff = (now - HOURLY_RETENTION) // DAY * DAY
+        self._fold(self._path(ip, 'raw'), SAMPLE, self._path(ip, 'hourly'), HOUR, raw_cutoff)
+        self._fold(self._path(ip, 'hourly'), ROLLUP, self._path(ip, 'daily'), DAY, hourly_cutoff)
+
+    def compact(self, now=None):
+        """Compact every host's log"""
+        for ip in self.hosts():
+            self.compact_host(ip, now)
+
+    def maybe_compact(self, now=None):
+        """Compact at most once per COMPACT_INTERVAL, returning True if it ran"""
+        now = int(now if now is not None else time.time())
+        marker = os.path.join(self.directory, '.last_compaction')
+        try:
+            if now - os.stat(marker).st_mtime < COMPACT_INTERVAL:
+                return False
+        except FileNotFoundError:
+            pass
+        self.compact(now)
+        with open(marker, 'w'):
+            pass
+        os.utime(marker, (now, now))
+        return True
+
+    # Queries
+
+    def summarize(self, ip, since, until=None):
+        """Return uptime percentage, flap count and latency for a host over a window
+
+        Rollups are read only for the buckets overlapping the window, so older
+        data is answered at hourly/daily granularity without loading raw history.
+        """
+        # until is exclusive; by default include samples taken this second
+        until = int(until) if until is not None else int(time.time()) + 1
+        since = int(since)
+        total = Bucket(since)
+        for kind, size in (('daily', DAY), ('hourly', HOUR)):
+            for values in _read_range(self._path(ip, kind), ROLLUP, since - size + 1, until):
+                total.merge(Bucket(*values))
+        for timestamp, state, latency in _read_range(self._path(ip, 'raw'), SAMPLE, since, until):
+            bucket = Bucket(timestamp)
+            bucket.add_sample(state, latency)
+            total.merge(bucket)
+
+        return {
+            'ip': ip,
+            'since': since,
+            'until': until,
+            'samples': total.samples,
+            'uptime_percent': round(100.0 * total.up / total.samples, 2) if total.samples else None,
+            'flaps': total.flaps,
+            'avg_latency_ms': (round(total.latency_sum / total.latency_count, 1)
+                               if total.latency_count else None),
+            'current_state': self._state_name(total)
+        }
+
+    @staticmethod
+    def _state_name(bucket):
+        if not bucket.samples:
+            return None
+        return 'online' if bucket.last == ONLINE else 'offline'
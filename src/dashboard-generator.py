@@ -5,24 +5,43 @@ Creates web-based management interface for all server types
 """
 
 import os
+import re
 import json
+import sys
+import html
+import hashlib
 from datetime import datetime
+from snapshot_writer import write_bytes
+from inventory import server_ip
+from inventory_store import InventoryStore
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
 
 # Configuration
 WWW_DIR = '/app/www'
 DATA_DIR = '/app/www/data'
+ASSETS_DIR = os.path.join(WWW_DIR, 'assets')
 TEMPLATE_FILE = os.path.join(WWW_DIR, 'index.html')
+ASSET_GENERATIONS = 3  # builds kept per asset so pages loaded before a rebuild still work
+SNAPSHOT_CARDS = 48    # server cards pre-rendered for first paint; the client renders the rest
+SERVER_ICONS = {
+    'idrac': '🖥️',
+    'proxmox': '🗄️',
+    'linux': '🐧',
+    'windows': '🪟',
+    'vnc': '🖼️',
+    'unknown': '❓'
+}
 
-def generate_dashboard():
-    """Generate the main dashboard HTML"""
-    
-    dashboard_html = '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Homelab Server Management Dashboard</title>
-    <style>
+DASHBOARD_CSS = '''
         * {
             margin: 0;
             padding: 0;
@@ -123,6 +142,11 @@ def generate_dashboard():
             margin-bottom: 15px;
         }
         
+        .search-input {
+            width: 100%;
+            margin-bottom: 15px;
+        }
+        
         .network-input {
             flex: 1;
             padding: 10px;
@@ -217,6 +241,14 @@ def generate_dashboard():
             margin-top: 20px;
         }
         
+        .server-grid.virtual {
+            grid-auto-rows: 280px;
+        }
+        
+        .server-grid.virtual .server-card {
+            overflow: hidden;
+        }
+        
         .server-card {
             background: white;
             border-radius: 12px;
@@ -431,100 +463,21 @@ def generate_dashboard():
                 width: 100%;
             }
         }
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>🖥️ Homelab Server Management</h1>
-        <div class="container-badge">🐳 Container Edition - Multi-Server Discovery</div>
-    </div>
-    
-    <div class="container">
-        <div class="status-panel">
-            <h2>📊 System Status</h2>
-            <div id="status-info">
-                <p class="info-message">Loading system status...</p>
-            </div>
-        </div>
-        
-        <div class="network-scan">
-            <h3>🔍 Network Discovery</h3>
-            <div class="custom-scan-form">
-                <input type="text" 
-                       id="custom-ranges" 
-                       class="network-input" 
-                       placeholder="Enter custom ranges (e.g., 192.168.1.0/24, 10.0.0.0/24)"
-                       value="">
-                <button class="tool-button primary-button" onclick="scanCustomRanges()">
-                    🔍 Scan Custom Ranges
-                </button>
-                <button class="tool-button secondary-button" onclick="rescanNetwork()">
-                    🔄 Rescan Default Network
-                </button>
-            </div>
-            <div id="scan-status"></div>
-        </div>
-        
-        <div class="management-tools">
-            <h3>🛠️ Management Tools</h3>
-            <div style="display: flex; gap: 10px; flex-wrap: wrap;">
-                <button class="tool-button export-button" onclick="exportToRDM('json')">
-                    📤 Export to RDM (JSON)
-                </button>
-                <button class="tool-button export-button" onclick="exportToRDM('rdm')">
-                    📤 Export to RDM (XML)
-                </button>
-                <button class="tool-button success-button" onclick="deploySSHKeys()">
-                    🔑 Deploy SSH Keys to All
-                </button>
-            </div>
-        </div>
-        
-        <div class="ssh-management">
-            <h3>🔐 SSH Key Management</h3>
-            <div id="ssh-status"></div>
-            <div class="ssh-form">
-                <input type="email" 
-                       id="admin-email" 
-                       class="email-input" 
-                       placeholder="Enter your email address"
-                       required>
-                <button class="tool-button primary-button" onclick="generateSSHKey()">
-                    🔑 Generate SSH Key
-                </button>
-            </div>
-        </div>
-        
-        <div class="status-panel">
-            <h2>🖥️ Discovered Servers</h2>
-            <div class="server-type-tabs" id="server-tabs">
-                <button class="tab-button active" onclick="filterServers('all')">All Servers</button>
-                <button class="tab-button" onclick="filterServers('idrac')">iDRAC</button>
-                <button class="tab-button" onclick="filterServers('proxmox')">Proxmox</button>
-                <button class="tab-button" onclick="filterServers('linux')">Linux/SSH</button>
-                <button class="tab-button" onclick="filterServers('windows')">Windows</button>
-                <button class="tab-button" onclick="filterServers('vnc')">VNC</button>
-            </div>
-            <div id="servers-container">
-                <div class="server-grid" id="server-list">
-                    <p class="info-message">Loading servers...</p>
-                </div>
-            </div>
-        </div>
-    </div>
-    
-    <div class="footer">
-        <p>Homelab Server Management Dashboard - Container Edition</p>
-        <p>Auto-discovery enabled for iDRAC, Proxmox, Linux, Windows, and VNC servers</p>
-    </div>
-    
-    <script>
+'''
+
+DASHBOARD_JS = '''
         let allServers = [];
         let currentFilter = 'all';
+        let inventoryVersion = 0;
+        let inventoryMeta = { last_scan: '', scan_count: 0 };
         
-        // Load server data
+        // Load server data: full snapshot first, then only the changes since our version
         async function loadServers() {
             try {
+                if (inventoryVersion && await loadServerChanges()) {
+                    return;
+                }
+                
                 // Try new multi-server file first
                 let response = await fetch('/data/discovered_servers.json');
                 if (!response.ok) {
@@ -540,13 +493,7 @@ def generate_dashboard():
                 }
                 
                 const data = await response.json();
-                allServers = data.servers || [];
-                
-                updateStatusPanel(data);
-                renderServers();
-                
-                // Update tabs based on available server types
-                updateServerTabs();
+                applyFullSnapshot(data);
             } catch (error) {
                 console.error('Failed to load servers:', error);
                 document.getElementById('server-list').innerHTML = 
@@ -554,6 +501,130 @@ def generate_dashboard():
             }
         }
         
+        // Adopt the snapshot embedded by dashboard-generator.py --snapshot: it holds
+        // only the pre-rendered cards' records and the status counts, so the cards
+        // go into the card cache and the full inventory is fetched after first paint
+        function hydrateFromSnapshot() {
+            const embedded = document.getElementById('initial-inventory');
+            if (!embedded) {
+                return false;
+            }
+            const data = JSON.parse(embedded.textContent);
+            const byKey = new Map((data.servers || []).map(server => [serverKey(server), server]));
+            document.querySelectorAll('#server-list .server-card[data-key]').forEach(card => {
+                const server = byKey.get(card.dataset.key);
+                if (server) {
+                    bindCardActions(card, server);
+                    cardCache.set(card.dataset.key, { server, signature: JSON.stringify(server), element: card });
+                }
+            });
+            inventoryMeta = { last_scan: data.last_scan || '', scan_count: data.scan_count || 0 };
+            updateStatusPanel(inventoryMeta, data.counts);
+            return true;
+        }
+        
+        // Replace the local copy with a full inventory document
+        function applyFullSnapshot(data) {
+            allServers = data.servers || [];
+            inventoryVersion = data.version || 0;
+            inventoryMeta = { last_scan: data.last_scan || '', scan_count: data.scan_count || 0 };
+            
+            updateStatusPanel(inventoryMeta);
+            renderServers();
+            
+            // Update tabs based on available server types
+            updateServerTabs();
+        }
+        
+        // Fetch and merge the delta since inventoryVersion; false means reload the snapshot
+        async function loadServerChanges() {
+            const response = await fetch(`/api/servers/changes?since=${inventoryVersion}`);
+            if (!response.ok) {
+                return false;
+            }
+            
+            applyChanges(await response.json());
+            return true;
+        }
+        
+        // Merge a delta (or full snapshot) from /api/servers/changes or the event stream
+        function applyChanges(changes) {
+            if (changes.full) {
+                applyFullSnapshot(changes);
+                return;
+            }
+            if (changes.version === inventoryVersion) {
+                return;
+            }
+            
+            const removed = new Set(changes.removed.map(server => server.ip));
+            const updated = new Map(changes.added.concat(changes.modified).map(server => [server.ip, server]));
+            allServers = allServers
+                .filter(server => !removed.has(server.ip))
+                .map(server => {
+                    const replacement = updated.get(server.ip) || server;
+                    updated.delete(server.ip);
+                    return replacement;
+                })
+                .concat(Array.from(updated.values()));
+            inventoryVersion = changes.version;
+            inventoryMeta = { last_scan: changes.last_scan, scan_count: changes.scan_count };
+            
+            updateStatusPanel(inventoryMeta);
+            renderServers();
+            updateServerTabs();
+        }
+        
+        // Live updates: server-sent events, with 60s polling only while the stream is down
+        let eventSource = null;
+        let pollTimer = null;
+        
+        function startPolling() {
+            if (!pollTimer) {
+                pollTimer = setInterval(loadServers, 60000);
+            }
+        }
+        
+        function stopPolling() {
+            clearInterval(pollTimer);
+            pollTimer = null;
+        }
+        
+        function connectEvents() {
+            if (!window.EventSource) {
+                startPolling();
+                return;
+            }
+            eventSource = new EventSource(`/api/events?since=${inventoryVersion}`);
+            // On reconnect the browser sends Last-Event-ID, so the stream replays what was missed
+            eventSource.onopen = stopPolling;
+            eventSource.onerror = () => {
+                startPolling();
+                if (eventSource.readyState === EventSource.CLOSED) {
+                    setTimeout(connectEvents, 30000);
+                }
+            };
+            eventSource.addEventListener('inventory', event => applyChanges(JSON.parse(event.data)));
+            eventSource.addEventListener('scan', event => updateScanProgress(JSON.parse(event.data)));
+        }
+        
+        // Show progress of a scan started here, by the scheduler or another tab
+        function updateScanProgress(progress) {
+            const scanStatus = document.getElementById('scan-status');
+            if (!progress) {
+                return;
+            }
+            if (progress.state === 'running') {
+                const percent = progress.hosts_total
+                    ? Math.floor(100 * progress.hosts_scanned / progress.hosts_total) : 0;
+                scanStatus.innerHTML = `<p class="info-message">Scanning ${progress.ranges.length} ranges: ` +
+                    `${progress.hosts_scanned} / ${progress.hosts_total} hosts (${percent}%), ` +
+                    `${progress.found} servers found <span class="loading"></span></p>`;
+            } else if (scanStatus.querySelector('.loading')) {
+                scanStatus.innerHTML = `<p class="success-message">Scan complete: ${progress.found} servers found</p>`;
+            }
+        }
+        
         // Update server type tabs
         function updateServerTabs() {
             const serverTypes = new Set(allServers.map(s => s.type || 'unknown'));
@@ -573,6 +644,144 @@ def generate_dashboard():
             renderServers();
         }
         
+        // Search: trigram index from /data/search_index.json narrows the candidates,
+        // which are then verified against the records we hold
+        let searchQuery = '';
+        let searchIndex = null;
+        let searchIndexLoading = null;
+        let searchTable = null;
+        const searchTextCache = new WeakMap();
+        
+        function serverSearchText(server) {
+            let text = searchTextCache.get(server);
+            if (text === undefined) {
+                // Same fields and order as search_index.search_text()
+                const parts = [server.ip || '', server.title || '', server.type || ''];
+                (server.services || []).forEach(service => {
+                    parts.push(String(service.type || ''));
+                    if (service.banner) parts.push(String(service.banner));
+                });
+                text = parts.join(' ').toLowerCase();
+                searchTextCache.set(server, text);
+            }
+            return text;
+        }
+        
+        // Search texts of allServers as a flat array, rebuilt when allServers changes
+        function currentSearchTable() {
+            if (!searchTable || searchTable.servers !== allServers) {
+                searchTable = {
+                    servers: allServers,
+                    texts: allServers.map(serverSearchText),
+                    positions: new Map(allServers.map((server, position) => [serverKey(server), position])),
+                    index: null,
+                    indexPositions: null
+                };
+            }
+            return searchTable;
+        }
+        
+        // Position in allServers of each index document id (-1 when we do not hold it)
+        function indexPositions(table) {
+            if (table.index !== searchIndex) {
+                table.index = searchIndex;
+                table.indexPositions = Int32Array.from(searchIndex.ids, id => {
+                    const position = table.positions.get(id);
+                    return position === undefined ? -1 : position;
+                });
+            }
+            return table.indexPositions;
+        }
+        
+        function loadSearchIndex() {
+            if (searchIndexLoading || (searchIndex && searchIndex.version === inventoryVersion)) {
+                return searchIndexLoading;
+            }
+            searchIndexLoading = fetch('/data/search_index.json')
+                .then(response => response.ok ? response.json() : null)
+                .then(index => {
+                    if (index) {
+                        searchIndex = Object.assign(index, { common: new Set(index.common), decoded: new Map() });
+                    }
+                })
+                .catch(() => {})
+                .finally(() => { searchIndexLoading = null; });
+            return searchIndexLoading;
+        }
+        
+        function postings(gram) {
+            let ids = searchIndex.decoded.get(gram);
+            if (ids === undefined) {
+                const encoded = searchIndex.grams[gram];
+                ids = null;
+                if (encoded !== undefined) {
+                    ids = [];
+                    let id = 0;
+                    for (const gap of encoded.split(',')) {
+                        id += parseInt(gap, 36);
+                        ids.push(id);
+                    }
+                }
+                searchIndex.decoded.set(gram, ids);
+            }
+            return ids;
+        }
+        
+        // Return a mask over allServers positions: 1 where the search text contains query
+        function searchServers(query) {
+            const q = query.trim().toLowerCase();
+            const table = currentSearchTable();
+            const texts = table.texts;
+            const matches = new Uint8Array(texts.length);
+            
+            // The index is only used when it describes the records we hold
+            if (q.length >= 3 && searchIndex && searchIndex.version === inventoryVersion) {
+                const lists = [];
+                for (let i = 0; i + 3 <= q.length; i++) {
+                    const gram = q.substr(i, 3);
+                    if (searchIndex.common.has(gram)) continue;
+                    const ids = postings(gram);
+                    if (!ids) return matches;
+                    lists.push(ids);
+                }
+                if (lists.length) {
+                    // Posting lists are ascending: intersect them by merging
+                    lists.sort((a, b) => a.length - b.length);
+                    let matched = lists[0];
+                    for (let l = 1; l < lists.length && matched.length; l++) {
+                        const other = lists[l];
+                        const kept = [];
+                        let j = 0;
+                        for (const id of matched) {
+                            while (j < other.length && other[j] < id) j++;
+                            if (j === other.length) break;
+                            if (other[j] === id) kept.push(id);
+                        }
+                        matched = kept;
+                    }
+                    const positions = indexPositions(table);
+                    for (const id of matched) {
+                        const position = positions[id];
+                        if (position >= 0 && texts[position].includes(q)) matches[position] = 1;
+                    }
+                    return matches;
+                }
+            }
+            
+            for (let position = 0; position < texts.length; position++) {
+                if (texts[position].includes(q)) matches[position] = 1;
+            }
+            return matches;
+        }
+        
+        function onSearchInput(value) {
+            searchQuery = value.trim();
+            renderServers();
+            // Re-run with the index once it is loaded or refreshed
+            const loading = loadSearchIndex();
+            if (loading) loading.then(() => { if (searchQuery) renderServers(); });
+        }
+        
         // Get server type icon
         function getServerIcon(type) {
             const icons = {
@@ -586,22 +795,26 @@ def generate_dashboard():
             return icons[type] || icons['unknown'];
         }
         
+        // Status counts as dashboard-generator.py's inventory_counts() embeds them
+        function countServers(servers) {
+            const counts = { total: servers.length, online: 0, by_type: {} };
+            servers.forEach(server => {
+                const type = server.type || 'unknown';
+                counts.by_type[type] = (counts.by_type[type] || 0) + 1;
+                if (server.status === 'online') counts.online++;
+            });
+            return counts;
+        }
+        
         // Update status panel
-        function updateStatusPanel(data) {
+        function updateStatusPanel(data, counts = countServers(allServers)) {
             const statusInfo = document.getElementById('status-info');
             const lastScan = data.last_scan ? new Date(data.last_scan).toLocaleString() : 'Never';
             const scanCount = data.scan_count || 0;
-            const onlineCount = allServers.filter(s => s.status === 'online').length;
-            const totalCount = allServers.length;
+            const onlineCount = counts.online;
+            const totalCount = counts.total;
             
-            // Count by type
-            const typeCounts = {};
-            allServers.forEach(server => {
-                const type = server.type || 'unknown';
-                typeCounts[type] = (typeCounts[type] || 0) + 1;
-            });
-            
-            let typeBreakdown = Object.entries(typeCounts)
+            let typeBreakdown = Object.entries(counts.by_type)
                 .map(([type, count]) => `${getServerIcon(type)} ${type}: ${count}`)
                 .join(' | ');
             
@@ -625,16 +838,139 @@ def generate_dashboard():
             `;
         }
         
+        // Server cards are built once per record version and kept, keyed by IP, so
+        // refreshes and tab switches only touch cards that changed. Above
+        // VIRTUAL_THRESHOLD cards only the rows around the viewport are attached.
+        const VIRTUAL_THRESHOLD = 200;
+        const VIRTUAL_ROW_HEIGHT = 300;  // grid row (280px, see .server-grid.virtual) + gap
+        const CARD_MIN_WIDTH = 350;
+        const GRID_GAP = 20;
+        const OVERSCAN_ROWS = 3;
+        const cardCache = new Map();  // ip -> { server, signature, element }
+        let filteredServers = [];
+        let windowPending = false;
+        
+        function serverKey(server) {
+            return server.ip || server.url;
+        }
+        
+        function el(tag, className, text) {
+            const node = document.createElement(tag);
+            if (className) node.className = className;
+            if (text !== undefined) node.textContent = text;
+            return node;
+        }
+        
+        function detailRow(label, value) {
+            const row = el('div', 'detail-row');
+            row.appendChild(el('span', 'detail-label', label));
+            row.appendChild(el('span', 'detail-value', value));
+            return row;
+        }
+        
+        function createServerCard(server) {
+            const isOnline = server.status === 'online';
+            const statusClass = isOnline ? 'status-online' : 'status-offline';
+            const statusText = isOnline ? '🟢 Online' : '🔴 Offline';
+            const serverType = server.type || 'unknown';
+            const ip = serverIp(server);
+            
+            const card = el('div', 'server-card');
+            card.dataset.key = serverKey(server);
+            card.appendChild(el('div', `server-type-icon type-${serverType}`, getServerIcon(serverType)));
+            
+            const header = el('div', 'server-header');
+            const titles = el('div');
+            titles.appendChild(el('div', 'server-title', server.title || 'Unknown Server'));
+            titles.appendChild(el('div', 'server-url', server.url));
+            header.appendChild(titles);
+            header.appendChild(el('div', `server-status ${statusClass}`, statusText));
+            card.appendChild(header);
+            
+            const details = el('div', 'server-details');
+            details.appendChild(detailRow('Type:', serverType.toUpperCase()));
+            details.appendChild(detailRow('IP Address:', ip));
+            if (server.protocol) {
+                details.appendChild(detailRow('Protocol:', server.protocol));
+            }
+            if (server.services && server.services.length > 0) {
+                details.appendChild(detailRow('Services:', server.services.map(s => s.type).join(', ')));
+            }
+            card.appendChild(details);
+            
+            const actions = el('div', 'server-actions');
+            if (isOnline) {
+                actions.appendChild(el('button', 'action-button connect-button', '🚀 Connect'));
+            }
+            actions.appendChild(el('button', 'action-button remove-button', '🗑️ Remove'));
+            card.appendChild(actions);
+            bindCardActions(card, server);
+            return card;
+        }
+        
+        // Extract IP from URL or use IP field
+        function serverIp(server) {
+            return server.ip || server.url.replace(/^https?:\\/\\//, '').split(/[\\/\\:]/)[0];
+        }
+        
+        function bindCardActions(card, server) {
+            const connect = card.querySelector('.connect-button');
+            if (connect) connect.onclick = () => connectToServer(serverIp(server));
+            card.querySelector('.remove-button').onclick = () => removeServer(server.url);
+        }
+        
+        // Return the card for a server, rebuilding it only if the record changed
+        function cardFor(server) {
+            const key = serverKey(server);
+            let cached = cardCache.get(key);
+            if (cached && cached.server === server) {
+                return cached.element;
+            }
+            const signature = JSON.stringify(server);
+            if (!cached || cached.signature !== signature) {
+                cached = { signature, element: createServerCard(server) };
+                cardCache.set(key, cached);
+            }
+            cached.server = server;
+            return cached.element;
+        }
+        
+        // Make parent's children exactly elements, moving only nodes that are out of place
+        function patchChildren(parent, elements) {
+            const wanted = new Set(elements);
+            Array.from(parent.childNodes).forEach(child => {
+                if (!wanted.has(child)) parent.removeChild(child);
+            });
+            elements.forEach((element, index) => {
+                const current = parent.childNodes[index];
+                if (current !== element) {
+                    parent.insertBefore(element, current || null);
+                }
+            });
+        }
+        
         // Render server cards
         function renderServers() {
             const serverList = document.getElementById('server-list');
             
             // Filter servers based on current filter
-            const filteredServers = currentFilter === 'all' 
+            const matches = searchQuery ? searchServers(searchQuery) : null;
+            filteredServers = currentFilter === 'all' && !matches
                 ? allServers 
-                : allServers.filter(s => (s.type || 'unknown') === currentFilter);
+                : allServers.filter((s, i) => (!matches || matches[i])
+                    && (currentFilter === 'all' || (s.type || 'unknown') === currentFilter));
+            
+            // Forget cards of removed servers
+            if (cardCache.size > allServers.length) {
+                const keys = new Set(allServers.map(serverKey));
+                for (const key of cardCache.keys()) {
+                    if (!keys.has(key)) cardCache.delete(key);
+                }
+            }
             
             if (filteredServers.length === 0) {
+                serverList.classList.remove('virtual');
+                serverList.style.paddingTop = serverList.style.paddingBottom = '';
                 serverList.innerHTML = `
                     <div class="empty-state">
                         <div class="empty-state-icon">📡</div>
@@ -648,82 +984,116 @@ def generate_dashboard():
                 return;
             }
             
-            serverList.innerHTML = filteredServers.map(server => {
-                const isOnline = server.status === 'online';
-                const statusClass = isOnline ? 'status-online' : 'status-offline';
-                const statusText = isOnline ? '🟢 Online' : '🔴 Offline';
-                const serverType = server.type || 'unknown';
-                const typeIcon = getServerIcon(serverType);
-                
-                // Extract IP from URL or use IP field
-                const ip = server.ip || server.url.replace(/^https?:\\/\\//, '').split(/[\\/\\:]/)[0];
+            renderWindow();
+        }
+        
+        // Attach the cards in (or near) the viewport; all of them for small inventories
+        function renderWindow() {
+            windowPending = false;
+            const serverList = document.getElementById('server-list');
+            const total = filteredServers.length;
+            let start = 0;
+            let end = total;
+            let rowsBefore = 0;
+            let rowsAfter = 0;
+            
+            const virtual = total > VIRTUAL_THRESHOLD;
+            serverList.classList.toggle('virtual', virtual);
+            if (virtual) {
+                const columns = Math.max(1, Math.floor((serverList.clientWidth + GRID_GAP) / (CARD_MIN_WIDTH + GRID_GAP)));
+                const rows = Math.ceil(total / columns);
+                const scrolledPast = -serverList.getBoundingClientRect().top;
+                const firstRow = Math.min(rows, Math.max(0, Math.floor(scrolledPast / VIRTUAL_ROW_HEIGHT) - OVERSCAN_ROWS));
+                const visibleRows = Math.ceil(window.innerHeight / VIRTUAL_ROW_HEIGHT) + 2 * OVERSCAN_ROWS;
+                start = firstRow * columns;
+                end = Math.min(total, start + visibleRows * columns);
+                rowsBefore = firstRow;
+                rowsAfter = rows - Math.ceil(end / columns);
+            }
+            serverList.style.paddingTop = rowsBefore ? `${rowsBefore * VIRTUAL_ROW_HEIGHT}px` : '';
+            serverList.style.paddingBottom = rowsAfter ? `${rowsAfter * VIRTUAL_ROW_HEIGHT}px` : '';
+            
+            const cards = [];
+            for (let i = start; i < end; i++) {
+                cards.push(cardFor(filteredServers[i]));
+            }
+            patchChildren(serverList, cards);
+        }
+        
+        function scheduleWindow() {
+            if (!windowPending && filteredServers.length > VIRTUAL_THRESHOLD) {
+                windowPending = true;
+                requestAnimationFrame(renderWindow);
+            }
+        }
+        window.addEventListener('scroll', scheduleWindow, { passive: true });
+        window.addEventListener('resize', scheduleWindow);
+        
+        // Long-running commands answer 202 with a background job: follow it over its
+        // event stream (polling /api/jobs/<id> if streams are unavailable) until it finishes
+        function waitForJob(accepted, onProgress) {
+            return new Promise((resolve, reject) => {
+                const poll = async () => {
+                    try {
+                        const response = await fetch(accepted.job_url);
+                        const job = await response.json();
+                        if (!response.ok) return reject(new Error(job.error || 'Job not found'));
+                        if (job.status === 'queued' || job.status === 'running') {
+                            if (onProgress) onProgress(job);
+                            setTimeout(poll, 1000);
+                        } else {
+                            resolve(job);
+                        }
+                    } catch (error) {
+                        reject(error);
+                    }
+                };
+                if (!window.EventSource) return poll();
                 
-                return `
-                    <div class="server-card">
-                        <div class="server-type-icon type-${serverType}">
-                            ${typeIcon}
-                        </div>
-                        <div class="server-header">
-                            <div>
-                                <div class="server-title">${server.title || 'Unknown Server'}</div>
-                                <div class="server-url">${server.url}</div>
-                            </div>
-                            <div class="server-status ${statusClass}">
-                                ${statusText}
-                            </div>
-                        </div>
-                        <div class="server-details">
-                            <div class="detail-row">
-                                <span class="detail-label">Type:</span>
-                                <span class="detail-value">${serverType.toUpperCase()}</span>
-                            </div>
-                            <div class="detail-row">
-                                <span class="detail-label">IP Address:</span>
-                                <span class="detail-value">${ip}</span>
-                            </div>
-                            ${server.protocol ? `
-                            <div class="detail-row">
-                                <span class="detail-label">Protocol:</span>
-                                <span class="detail-value">${server.protocol}</span>
-                            </div>
-                            ` : ''}
-                            ${server.services && server.services.length > 0 ? `
-                            <div class="detail-row">
-                                <span class="detail-label">Services:</span>
-                                <span class="detail-value">${server.services.map(s => s.type).join(', ')}</span>
-                            </div>
-                            ` : ''}
-                        </div>
-                        <div class="server-actions">
-                            ${isOnline ? `
-                                <button class="action-button connect-button" 
-                                        onclick="connectToServer('${ip}')">
-                                    🚀 Connect
-                                </button>
-                            ` : ''}
-                            <button class="action-button remove-button" 
-                                    onclick="removeServer('${server.url}')">
-                                🗑️ Remove
-                            </button>
-                        </div>
-                    </div>
-                `;
-            }).join('');
+                const source = new EventSource(accepted.events_url);
+                const steps = [];
+                source.addEventListener('progress', event => {
+                    if (onProgress) onProgress(JSON.parse(event.data), steps);
+                });
+                source.addEventListener('step', event => {
+                    steps.push(JSON.parse(event.data));
+                });
+                source.addEventListener('done', event => {
+                    source.close();
+                    resolve(JSON.parse(event.data));
+                });
+                source.addEventListener('gone', () => {
+                    source.close();
+                    reject(new Error('Job expired'));
+                });
+                source.onerror = () => {
+                    if (source.readyState === EventSource.CLOSED) poll();
+                };
+            });
+        }
+        
+        // Run a command through /api/execute, waiting for its job if it started one;
+        // resolves with the command's result or rejects with its error
+        async function runCommand(command, params, onProgress) {
+            const response = await fetch('/api/execute', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ command, params: params || {} })
+            });
+            const result = await response.json();
+            if (response.status !== 202) {
+                if (!response.ok || result.error) throw new Error(result.error || `HTTP ${response.status}`);
+                return result;
+            }
+            const job = await waitForJob(result, onProgress);
+            if (job.status !== 'succeeded') throw new Error(job.error || 'Job failed');
+            return job.result;
         }
         
         // Connect to server
         async function connectToServer(ip) {
             try {
-                const response = await fetch('/api/execute', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        command: 'launch_virtual_console',
-                        params: { ip }
-                    })
-                });
-                
-                const result = await response.json();
+                const result = await runCommand('launch_virtual_console', { ip });
                 
                 if (result.status === 'success') {
                     // Download the connection script
@@ -853,8 +1223,9 @@ def generate_dashboard():
         // Export to RDM
         async function exportToRDM(format) {
             try {
-                window.location.href = `/api/export/rdm/${format}`;
                 showMessage('success', `Exporting servers to RDM ${format.toUpperCase()} format...`);
+                const result = await runCommand('export_rdm', { format });
+                window.location.href = result.download_url;
             } catch (error) {
                 showMessage('error', 'Failed to export: ' + error.message);
             }
@@ -896,16 +1267,7 @@ def generate_dashboard():
             sshStatus.innerHTML = '<p class="info-message">Generating SSH key... <span class="loading"></span></p>';
             
             try {
-                const response = await fetch('/api/execute', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        command: 'generate_ssh_key',
-                        params: { email }
-                    })
-                });
-                
-                const result = await response.json();
+                const result = await runCommand('generate_ssh_key', { email });
                 
                 if (result.status === 'success') {
                     sshStatus.innerHTML = `
@@ -919,7 +1281,7 @@ def generate_dashboard():
                     sshStatus.innerHTML = `<p class="error-message">Failed: ${result.error}</p>`;
                 }
             } catch (error) {
-                sshStatus.innerHTML = `<p class="error-message">Error: ${error.message}</p>`;
+                sshStatus.innerHTML = `<p class="error-message">Failed: ${error.message}</p>`;
             }
         }
         
@@ -933,14 +1295,11 @@ def generate_dashboard():
             sshStatus.innerHTML = '<p class="info-message">Deploying SSH keys... <span class="loading"></span></p>';
             
             try {
-                const response = await fetch('/api/execute', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ command: 'deploy_ssh_keys' })
+                const result = await runCommand('deploy_ssh_keys', {}, job => {
+                    const { done, total } = job.progress;
+                    sshStatus.innerHTML = `<p class="info-message">Deploying SSH keys... ${done} / ${total || '?'} servers <span class="loading"></span></p>`;
                 });
                 
-                const result = await response.json();
-                
                 if (result.status === 'success') {
                     const successCount = result.results.filter(r => r.success).length;
                     const totalCount = result.results.length;
@@ -989,21 +1348,295 @@ def generate_dashboard():
         
         // Initialize
         document.addEventListener('DOMContentLoaded', () => {
-            loadServers();
+            // Pre-rendered cards are live at once; the full inventory arrives after paint
+            hydrateFromSnapshot();
+            loadServers().then(connectEvents);
             checkSSHStatus();
-            
-            // Auto-refresh every 60 seconds
-            setInterval(loadServers, 60000);
         });
-    </script>
+'''
+
+# HTML shell; the asset placeholders are replaced with content-hashed file names and
+# the content placeholders with loading messages or a pre-rendered snapshot
+DASHBOARD_HTML = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Homelab Server Management Dashboard</title>
+    <link rel="stylesheet" href="/assets/__DASHBOARD_CSS__">
+</head>
+<body>
+    <div class="header">
+        <h1>🖥️ Homelab Server Management</h1>
+        <div class="container-badge">🐳 Container Edition - Multi-Server Discovery</div>
+    </div>
+    
+    <div class="container">
+        <div class="status-panel">
+            <h2>📊 System Status</h2>
+            <div id="status-info">
+                __STATUS_PANEL__
+            </div>
+        </div>
+        
+        <div class="network-scan">
+            <h3>🔍 Network Discovery</h3>
+            <div class="custom-scan-form">
+                <input type="text" 
+                       id="custom-ranges" 
+                       class="network-input" 
+                       placeholder="Enter custom ranges (e.g., 192.168.1.0/24, 10.0.0.0/24)"
+                       value="">
+                <button class="tool-button primary-button" onclick="scanCustomRanges()">
+                    🔍 Scan Custom Ranges
+                </button>
+                <button class="tool-button secondary-button" onclick="rescanNetwork()">
+                    🔄 Rescan Default Network
+                </button>
+            </div>
+            <div id="scan-status"></div>
+        </div>
+        
+        <div class="management-tools">
+            <h3>🛠️ Management Tools</h3>
+            <div style="display: flex; gap: 10px; flex-wrap: wrap;">
+                <button class="tool-button export-button" onclick="exportToRDM('json')">
+                    📤 Export to RDM (JSON)
+                </button>
+                <button class="tool-button export-button" onclick="exportToRDM('rdm')">
+                    📤 Export to RDM (XML)
+                </button>
+                <button class="tool-button success-button" onclick="deploySSHKeys()">
+                    🔑 Deploy SSH Keys to All
+                </button>
+            </div>
+        </div>
+        
+        <div class="ssh-management">
+            <h3>🔐 SSH Key Management</h3>
+            <div id="ssh-status"></div>
+            <div class="ssh-form">
+                <input type="email" 
+                       id="admin-email" 
+                       class="email-input" 
+                       placeholder="Enter your email address"
+                       required>
+                <button class="tool-button primary-button" onclick="generateSSHKey()">
+                    🔑 Generate SSH Key
+                </button>
+            </div>
+        </div>
+        
+        <div class="status-panel">
+            <h2>🖥️ Discovered Servers</h2>
+            <input type="search"
+                   id="server-search"
+                   class="network-input search-input"
+                   placeholder="Search by IP, title, type, service or SSH banner"
+                   oninput="onSearchInput(this.value)">
+            <div class="server-type-tabs" id="server-tabs">
+                <button class="tab-button active" onclick="filterServers('all')">All Servers</button>
+                <button class="tab-button" onclick="filterServers('idrac')">iDRAC</button>
+                <button class="tab-button" onclick="filterServers('proxmox')">Proxmox</button>
+                <button class="tab-button" onclick="filterServers('linux')">Linux/SSH</button>
+                <button class="tab-button" onclick="filterServers('windows')">Windows</button>
+                <button class="tab-button" onclick="filterServers('vnc')">VNC</button>
+            </div>
+            <div id="servers-container">
+                <div class="server-grid" id="server-list">
+                    __SERVER_CARDS__
+                </div>
+            </div>
+        </div>
+    </div>
+    
+    <div class="footer">
+        <p>Homelab Server Management Dashboard - Container Edition</p>
+        <p>Auto-discovery enabled for iDRAC, Proxmox, Linux, Windows, and VNC servers</p>
+    </div>
+    
+    __INITIAL_INVENTORY__
+    <script src="/assets/__DASHBOARD_JS__"></script>
 </body>
 </html>'''
+
+def minify_css(css):
+    """Minify CSS with rcssmin (in requirements.txt)
+
+    Outside the image, without rcssmin, comments and whitespace are stripped
+    with regular expressions instead.
+    """
+    if rcssmin is not None:
+        return rcssmin.cssmin(css)
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+def minify_js(js):
+    """Minify JavaScript with rjsmin (in requirements.txt)
+
+    Outside the image, without rjsmin, there is no JavaScript tokenizer:
+    only indentation, blank lines and whole-line comments are dropped; line
+    breaks are kept so automatic semicolon insertion is unaffected.
+    """
+    if rjsmin is not None:
+        return rjsmin.jsmin(js)
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+def write_asset(extension, source):
+    """Publish a content-hashed asset and return its file name
+
+    The name changes whenever the content does, so nginx can serve assets as
+    immutable; an existing build with the same hash is left untouched.
+    """
+    payload = source.encode('utf-8')
+    name = f"dashboard.{hashlib.sha256(payload).hexdigest()[:12]}.{extension}"
+    write_bytes(os.path.join(ASSETS_DIR, name), payload)
+    prune_assets(extension, keep=name)
+    return name
+
+def prune_assets(extension, keep):
+    """Remove all but the newest ASSET_GENERATIONS builds of one asset type"""
+    pattern = re.compile(r'^dashboard\.[0-9a-f]{12}\.' + re.escape(extension) + '$')
+    builds = sorted(
+        (name for name in os.listdir(ASSETS_DIR) if pattern.match(name) and name != keep),
+        key=lambda name: os.path.getmtime(os.path.join(ASSETS_DIR, name)),
+        reverse=True
+    )
+    for name in builds[ASSET_GENERATIONS - 1:]:
+        for suffix in ('', '.gz', '.br'):
+            path = os.path.join(ASSETS_DIR, name + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+
+def render_detail_row(label, value):
+    return (f'<div class="detail-row"><span class="detail-label">{html.escape(label)}</span>'
+            f'<span class="detail-value">{html.escape(str(value))}</span></div>')
+
+def inventory_counts(servers):
+    """Total, online and per-type server counts, as the client's countServers() returns them"""
+    counts = {'total': len(servers), 'online': 0, 'by_type': {}}
+    for server in servers:
+        server_type = server.get('type') or 'unknown'
+        counts['by_type'][server_type] = counts['by_type'].get(server_type, 0) + 1
+        if server.get('status') == 'online':
+            counts['online'] += 1
+    return counts
+
+def render_status_panel(document):
+    """Render the status panel markup the client's updateStatusPanel() produces"""
+    counts = inventory_counts(document.get('servers', []))
+    last_scan = 'Never'
+    if document.get('last_scan'):
+        try:
+            last_scan = datetime.fromisoformat(document['last_scan']).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            last_scan = document['last_scan']
+    breakdown = ' | '.join(f"{SERVER_ICONS.get(server_type, SERVER_ICONS['unknown'])} {server_type}: {count}"
+                           for server_type, count in counts['by_type'].items())
+    return ''.join([
+        render_detail_row('Last Scan:', last_scan),
+        render_detail_row('Total Scans:', document.get('scan_count', 0)),
+        render_detail_row('Servers Online:', f"{counts['online']} / {counts['total']}"),
+        render_detail_row('Server Types:', breakdown or 'None')
+    ])
+
+def render_server_card(server):
+    """Render one server card as the client's createServerCard() builds it
+
+    The client adopts these elements (matched by data-key) instead of rebuilding them.
+    """
+    is_online = server.get('status') == 'online'
+    server_type = server.get('type') or 'unknown'
+    ip = server_ip(server)
+    rows = [render_detail_row('Type:', server_type.upper()), render_detail_row('IP Address:', ip)]
+    if server.get('protocol'):
+        rows.append(render_detail_row('Protocol:', server['protocol']))
+    if server.get('services'):
+        rows.append(render_detail_row('Services:', ', '.join(str(s.get('type')) for s in server['services'])))
+    actions = '<button class="action-button connect-button">🚀 Connect</button>' if is_online else ''
+    actions += '<button class="action-button remove-button">🗑️ Remove</button>'
+    status_class, status_text = ('status-online', '🟢 Online') if is_online else ('status-offline', '🔴 Offline')
+    return (
+        f'<div class="server-card" data-key="{html.escape(server.get("ip") or server["url"])}">'
+        f'<div class="server-type-icon type-{html.escape(server_type)}">'
+        f'{SERVER_ICONS.get(server_type, SERVER_ICONS["unknown"])}</div>'
+        f'<div class="server-header"><div>'
+        f'<div class="server-title">{html.escape(server.get("title") or "Unknown Server")}</div>'
+        f'<div class="server-url">{html.escape(server["url"])}</div>'
+        f'</div><div class="server-status {status_class}">{status_text}</div></div>'
+        f'<div class="server-details">{"".join(rows)}</div>'
+        f'<div class="server-actions">{actions}</div>'
+        f'</div>'
+    )
+
+def render_initial_inventory(document):
+    """Embed what the client needs before the full inventory arrives
+
+    That is the pre-rendered cards' records (for their Connect/Remove actions)
+    and the status counts, not the whole inventory: index.html stays small
+    however many servers there are.
+    """
+    initial = {
+        'last_scan': document.get('last_scan', ''),
+        'scan_count': document.get('scan_count', 0),
+        'counts': inventory_counts(document['servers']),
+        'servers': document['servers'][:SNAPSHOT_CARDS]
+    }
+    # Escaping '<' keeps '</script>' in server titles or banners from ending the element
+    data = json.dumps(initial, separators=(',', ':')).replace('<', '\\u003c')
+    return f'<script type="application/json" id="initial-inventory">{data}</script>'
+
+def load_snapshot_document():
+    """Return the current inventory document, or None if there is nothing to render"""
+    try:
+        store = InventoryStore(data_dir=DATA_DIR)
+        document = store.load_document()
+        store.close()
+    except Exception as e:
+        print(f"Could not load inventory for the dashboard snapshot: {e}")
+        return None
+    return document if document.get('servers') else None
+
+def generate_dashboard(document=None):
+    """Generate the dashboard shell and its hashed CSS/JS assets
+
+    With an inventory document, the status panel and the first SNAPSHOT_CARDS
+    server cards are pre-rendered and their records embedded, so the page
+    paints without waiting for the data request. Returns True if index.html changed.
+    """
+    os.makedirs(ASSETS_DIR, exist_ok=True)
+    css_name = write_asset('css', minify_css(DASHBOARD_CSS))
+    js_name = write_asset('js', minify_js(DASHBOARD_JS))
+    if document:
+        status_panel = render_status_panel(document)
+        server_cards = ''.join(render_server_card(server)
+                               for server in document['servers'][:SNAPSHOT_CARDS])
+        initial_inventory = render_initial_inventory(document)
+    else:
+        status_panel = '<p class="info-message">Loading system status...</p>'
+        server_cards = '<p class="info-message">Loading servers...</p>'
+        initial_inventory = ''
+    # One pass, so inserted server text is never scanned for placeholders
+    values = {
+        'DASHBOARD_CSS': css_name,
+        'DASHBOARD_JS': js_name,
+        'STATUS_PANEL': status_panel,
+        'SERVER_CARDS': server_cards,
+        'INITIAL_INVENTORY': initial_inventory
+    }
+    dashboard_html = re.sub(r'__([A-Z_]+?)__', lambda match: values[match.group(1)], DASHBOARD_HTML)
     
-    # Write the dashboard file
-    with open(TEMPLATE_FILE, 'w') as f:
-        f.write(dashboard_html)
-    
-    print(f"Dashboard generated at {TEMPLATE_FILE}")
+    # Write the dashboard file (plus precompressed copies) only if it changed
+    if write_bytes(TEMPLATE_FILE, dashboard_html.encode('utf-8')):
+        version = f" with inventory version {document.get('version')}" if document else ''
+        print(f"Dashboard generated at {TEMPLATE_FILE} ({css_name}, {js_name}){version}")
+        return True
+    print(f"Dashboard unchanged at {TEMPLATE_FILE}")
+    return False
 
 def main():
     """Main entry point"""
@@ -1011,8 +1644,8 @@ def main():
     os.makedirs(WWW_DIR, exist_ok=True)
     os.makedirs(DATA_DIR, exist_ok=True)
     
-    # Generate dashboard
-    generate_dashboard()
+    # Generate dashboard; --snapshot pre-renders the current inventory (run after each scan)
+    generate_dashboard(load_snapshot_document() if '--snapshot' in sys.argv[1:] else None)
     
     return 0
 
@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+"""
+Exporters
+Inventory exports (Remote Desktop Manager JSON/XML, SSH config, Ansible, CSV,
+mRemoteNG) rendered from one connection model, cached per inventory version
+"""
+
+import io
+import os
+import abc
+import re
+import csv
+import json
+import time
+import uuid
+import tarfile
+import zipfile
+import tempfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from streaming import UnseekableSink
+
+# Configuration
+EXPORT_REVISION = 2       # bump when an export's layout changes, so cached files are rebuilt
+KEEP_EXPORTS = 3          # newest export files kept per format; older ones are deleted
+CHUNK_SIZE = 64 * 1024    # bytes gathered before a piece of an export is sent on
+RDM_GROUP = 'Homelab Servers'
+SSH_KEY_PATH = '/root/.ssh/server_rsa'
+# Connection IDs are uuid5 names in this namespace, so re-imports update rather than duplicate
+RDM_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, 'homelab-multi-server-scanner')
+
+# Server type -> (protocol, port, username) of its connection
+PROFILES = {
+    'idrac': ('https', 443, 'root'),
+    'proxmox': ('https', 8006, 'root@pam'),
+    'linux': ('ssh', 22, 'root'),
+    'windows': ('rdp', 3389, 'Administrator'),
+    'vnc': ('vnc', 5900, '')
+}
+DEFAULT_PROFILE = (None, None, '')
+
+
+def connection_id(ip):
+    """Stable RDM connection ID of the server at ip
+
+    Derived from the address alone (the inventory's key), so a host that is
+    reclassified or moves its console port keeps its connection, and a
+    removed host's ID can be named from its tombstone.
+    """
+    return str(uuid.uuid5(RDM_NAMESPACE, ip))
+
+
+class Connection:
+    """A server normalised once for every export format"""
+
+    __slots__ = ('id', 'ip', 'name', 'server_type', 'status', 'protocol', 'port', 'url',
+                 'username', 'ssh_port')
+
+    def __init__(self, server):
+        ip = server.ip
+        protocol, port, username = PROFILES.get(server.type, DEFAULT_PROFILE)
+        if protocol == 'vnc' and server.ports:
+            port = int(list(server.ports)[0])
+        self.id = connection_id(ip)
+        self.ip = ip
+        self.name = server.title or f'{server.type} - {ip}'
+        self.server_type = server.type
+        self.status = server.status
+        self.protocol = protocol
+        self.port = port
+        self.username = username
+        if server.type == 'idrac':
+            self.url = server.url
+        elif protocol == 'https':
+            self.url = f'https://{ip}:{port}'
+        else:
+            self.url = None
+        # SSH is offered by Linux hosts and by anything the scan found port 22 open on
+        if protocol == 'ssh':
+            self.ssh_port = port
+        else:
+            self.ssh_port = 22 if (server.ports or {}).get('22') else None
+
+    @property
+    def description(self):
+        return f"Auto-discovered {self.server_type} server"
+
+
+def _attr(value):
+    return '"' + escape(str(value), {'"': '&quot;'}) + '"'
+
+
+def _json_list(items):
+    """Yield a JSON list nested one level deep, as json.dump(indent=2) lays it out"""
+    yield '['
+    empty = True
+    for item in items:
+        yield ('\n    ' if empty else ',\n    ') + json.dumps(item, indent=2).replace('\n', '\n    ')
+        empty = False
+    yield ']' if empty else '\n  ]'
+
+
+class Writer(abc.ABC):
+    """One export format: a header, a piece of text per connection and a footer
+
+    Writers that set incremental can also write the changes after version
+    since, with removed the {'ip': ...} entries of removed servers.
+    """
+
+    incremental = False
+
+    def __init__(self, version=None, since=None, removed=None):
+        if since is not None and not self.incremental:
+            raise ValueError(f'{type(self).__name__} exports cannot be incremental')
+        self.version = version
+        self.since = since
+        self.removed = (removed or []) if since is not None else None
+        self.count = 0
+
+    def header(self):
+        return ''
+
+    @abc.abstractmethod
+    def entry(self, connection):
+        """Text for one connection ('' to leave it out)"""
+
+    def footer(self):
+        return ''
+
+
+class RDMJsonWriter(Writer):
+    """Remote Desktop Manager JSON, the same text json.dump(document, indent=2) would write"""
+
+    incremental = True
+
+    def header(self):
+        return '{\n  "Connections": ['
+
+    @staticmethod
+    def connection_entry(connection):
+        """One connection as an RDM JSON entry"""
+        entry = {
+            'ID': connection.id,
+            'Name': connection.name,
+            'Group': RDM_GROUP,
+            'Host': connection.ip,
+            'Description': connection.description,
+            'Tags': ['auto-discovered', connection.server_type, 'homelab']
+        }
+        if connection.protocol == 'https':
+            entry.update({
+                'ConnectionType': 'WebBrowser',
+                'ConnectionSubType': 'GoogleChrome',
+                'Url': connection.url,
+                'Username': connection.username,
+                'Domain': '',
+                'UseDefaultCredentials': False
+            })
+        elif connection.protocol == 'ssh':
+            entry.update({
+                'ConnectionType': 'SSH',
+                'ConnectionSubType': 'SSHShell',
+                'Port': connection.port,
+                'Username': connection.username,
+                'UsePrivateKey': True,
+                'PrivateKeyPath': SSH_KEY_PATH
+            })
+        elif connection.protocol == 'rdp':
+            entry.update({
+                'ConnectionType': 'RDPConfigured',
+                'Port': connection.port,
+                'Username': connection.username,
+                'Domain': '',
+                'UseDefaultCredentials': False,
+                'ScreenColor': '32',
+                'ScreenSize': 'FullScreen'
+            })
+        elif connection.protocol == 'vnc':
+            entry.update({
+                'ConnectionType': 'VNC',
+                'Port': connection.port,
+                'Username': connection.username,
+                'VNCEncoding': 'Auto',
+                'ColorDepth': 'Depth32Bit'
+            })
+        return entry
+
+    def entry(self, connection):
+        text = json.dumps(self.connection_entry(connection), indent=2).replace('\n', '\n    ')
+        self.count += 1
+        return ('\n    ' if self.count == 1 else ',\n    ') + text
+
+    def footer(self):
+        parts = ['\n  ]' if self.count else ']']
+        if self.removed is not None:
+            parts.append(',\n  "Removed": ')
+            parts.extend(_json_list({'ID': connection_id(item['ip']), 'Host': item['ip']}
+                                    for item in self.removed))
+        trailer = {
+            'ExportVersion': '2.0',
+            'ExportDate': datetime.now().isoformat(),
+            'Source': 'Homelab Multi-Server Scanner'
+        }
+        if self.version is not None:
+            trailer['InventoryVersion'] = self.version
+        if self.since is not None:
+            trailer['Since'] = self.since
+        parts.append(',')
+        parts.append(','.join(f'\n  {json.dumps(key)}: {json.dumps(value)}'
+                              for key, value in trailer.items()))
+        parts.append('\n}')
+        return ''.join(parts)
+
+
+class RDMXmlWriter(Writer):
+    """Remote Desktop Manager XML, indented"""
+
+    incremental = True
+
+    def header(self):
+        root = ['Version="2.0"']
+        if self.version is not None:
+            root.append(f'InventoryVersion="{int(self.version)}"')
+        if self.since is not None:
+            root.append(f'Since="{int(self.since)}"')
+        return (f'<?xml version="1.0" ?>\n<RDM {" ".join(root)}>\n  <Connections>\n'
+                f'    <Group Name={_attr(RDM_GROUP)}>\n')
+
+    @staticmethod
+    def connection_elements(connection):
+        """One connection as RDM XML: (attributes, [(element, text)])"""
+        attributes = [('ID', connection.id), ('Name', connection.name)]
+        elements = [('Host', connection.ip), ('Description', connection.description)]
+        if connection.protocol == 'https':
+            attributes.append(('Type', 'WebBrowser'))
+            elements += [('Url', connection.url), ('Username', connection.username)]
+        elif connection.protocol == 'ssh':
+            attributes.append(('Type', 'SSHShell'))
+            elements += [('Port', str(connection.port)), ('Username', connection.username),
+                         ('UsePrivateKey', 'true')]
+        elif connection.protocol == 'rdp':
+            attributes.append(('Type', 'RDPConfigured'))
+            elements += [('Port', str(connection.port)), ('Username', connection.username),
+                         ('ScreenColor', '32')]
+        elif connection.protocol == 'vnc':
+            attributes.append(('Type', 'VNC'))
+            elements.append(('Port', str(connection.port)))
+        return attributes, elements
+
+    def entry(self, connection):
+        attributes, elements = self.connection_elements(connection)
+        attrs = ' '.join(f'{name}={_attr(value)}' for name, value in attributes)
+        lines = [f'      <Connection {attrs}>']
+        lines += [f'        <{name}>{escape(text or "")}</{name}>' for name, text in elements]
+        lines.append('      </Connection>\n')
+        return '\n'.join(lines)
+
+    def footer(self):
+        parts = ['    </Group>\n  </Connections>\n']
+        if self.removed is not None:
+            parts.append('  <Removed>\n')
+            parts += [f'    <Connection ID={_attr(connection_id(item["ip"]))} Host={_attr(item["ip"])}/>\n'
+                      for item in self.removed]
+            parts.append('  </Removed>\n')
+        parts.append('</RDM>\n')
+        return ''.join(parts)
+
+
+def _line(text):
+    """text on one line, for comments and quoted values"""
+    return ' '.join(str(text).split())
+
+
+class SSHConfigWriter(Writer):
+    """OpenSSH client configuration: a Host block per server that offers SSH"""
+
+    def header(self):
+        return f"# Homelab servers (inventory version {self.version})\n"
+
+    def entry(self, connection):
+        if not connection.ssh_port:
+            return ''
+        return (f"\n# {_line(connection.name)}\n"
+                f"Host {connection.server_type}-{connection.ip}\n"
+                f"    HostName {connection.ip}\n"
+                f"    Port {connection.ssh_port}\n"
+                f"    User root\n"
+                f"    IdentityFile {SSH_KEY_PATH}\n")
+
+
+class AnsibleWriter(Writer):
+    """Ansible INI inventory with a group per server type
+
+    Group sections can only be written once every host is known, so the
+    (one line per host) group bodies are gathered until the footer.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.groups = {}
+
+    def entry(self, connection):
+        line = connection.ip
+        if connection.ssh_port:
+            line += (f" ansible_user=root ansible_port={connection.ssh_port}"
+                     f" ansible_ssh_private_key_file={SSH_KEY_PATH}")
+        group = re.sub(r'\W', '_', connection.server_type or 'unknown')
+        self.groups.setdefault(group, []).append(line)
+        return ''
+
+    def footer(self):
+        return ''.join(f"[{group}]\n" + ''.join(line + '\n' for line in lines) + '\n'
+                       for group, lines in sorted(self.groups.items()))
+
+
+class CSVWriter(Writer):
+    """Spreadsheet-friendly CSV, one row per server"""
+
+    COLUMNS = ('id', 'name', 'host', 'type', 'status', 'protocol', 'port', 'url', 'username')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def _row(self, values):
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.writer.writerow(values)
+        return self.buffer.getvalue()
+
+    def header(self):
+        return self._row(self.COLUMNS)
+
+    def entry(self, connection):
+        return self._row((connection.id, connection.name, connection.ip, connection.server_type,
+                          connection.status, connection.protocol or '', connection.port or '',
+                          connection.url or '', connection.username))
+
+
+class MRemoteNGWriter(Writer):
+    """mRemoteNG connections file (confCons.xml layout, unencrypted)"""
+
+    PROTOCOLS = {'https': 'HTTPS', 'ssh': 'SSH2', 'rdp': 'RDP', 'vnc': 'VNC'}
+
+    def header(self):
+        return ('<?xml version="1.0" encoding="utf-8"?>\n'
+                '<mrng:Connections xmlns:mrng="http://mremoteng.org" Name="Connections" '
+                'Export="false" ConfVersion="2.6">\n'
+                f'  <Node Name={_attr(RDM_GROUP)} Type="Container" Expanded="true" '
+                f'Id={_attr(connection_id(RDM_GROUP))}>\n')
+
+    def entry(self, connection):
+        protocol = self.PROTOCOLS.get(connection.protocol)
+        if not protocol:
+            return ''
+        attributes = [
+            ('Name', connection.name), ('Type', 'Connection'), ('Descr', connection.description),
+            ('Id', connection.id), ('Username', connection.username), ('Hostname', connection.ip),
+            ('Protocol', protocol), ('Port', connection.port)
+        ]
+        return '    <Node ' + ' '.join(f'{name}={_attr(value)}' for name, value in attributes) + ' />\n'
+
+    def footer(self):
+        return '  </Node>\n</mrng:Connections>\n'
+
+
+# format -> (writer, mimetype, file name prefix, extension)
+FORMATS = {
+    'json': (RDMJsonWriter, 'application/json', 'rdm_export', 'json'),
+    'rdm': (RDMXmlWriter, 'application/xml', 'rdm_export', 'rdm'),
+    'ssh_config': (SSHConfigWriter, 'text/plain', 'ssh_config', 'conf'),
+    'ansible': (AnsibleWriter, 'text/plain', 'ansible_inventory', 'ini'),
+    'csv': (CSVWriter, 'text/csv', 'servers_export', 'csv'),
+    'mremoteng': (MRemoteNGWriter, 'application/xml', 'mremoteng', 'xml')
+}
+RDM_FORMATS = ('json', 'rdm')
+
+
+def is_incremental(format):
+    """Whether format can export only the changes since a version"""
+    return FORMATS[format][0].incremental
+
+
+def render(format, servers, version=None, since=None, removed=None):
+    """Yield one format's export of servers piece by piece"""
+    writer = FORMATS[format][0](version, since, removed)
+    yield writer.header()
+    for server in servers:
+        yield writer.entry(Connection(server))
+    yield writer.footer()
+
+
+def iter_rdm_json(servers, version=None, since=None, removed=None):
+    """Yield an RDM JSON document one connection at a time"""
+    return render('json', servers, version, since, removed)
+
+
+def iter_rdm_xml(servers, version=None, since=None, removed=None):
+    """Yield an indented RDM XML document one connection at a time"""
+    return render('rdm', servers, version, since, removed)
+
+
+def parse_since(value):
+    """Inventory version an incremental export starts from
+
+    value is a version number or the name of a previous export file (whose
+    inventory version it then is). Raises ValueError otherwise.
+    """
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    match = re.search(r'[_-]v(\d+)_r\d+\.\w+$', os.path.basename(value))
+    if not match:
+        raise ValueError('since must be an inventory version or a previous export file name')
+    return int(match.group(1))
+
+
+def parse_formats(value):
+    """List of export formats from a comma-separated string (all formats when empty)
+
+    Raises ValueError for an unknown format.
+    """
+    formats = [name.strip() for name in (value or '').split(',') if name.strip()]
+    unknown = [name for name in formats if name not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unsupported format: {', '.join(unknown)}")
+    return list(dict.fromkeys(formats)) or list(FORMATS)
+
+
+def _coalesce(chunks, size=CHUNK_SIZE):
+    """Re-chunk a stream of text into encoded pieces of about size bytes"""
+    pending, length = [], 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        pending.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(pending)
+            pending, length = [], 0
+    if pending:
+        yield b''.join(pending)
+
+
+class _PendingFile:
+    """Temp file next to path, moved into place by publish() or deleted by discard()"""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.')
+        self.file = os.fdopen(fd, 'wb')
+        self.published = False
+
+    def write(self, data):
+        self.file.write(data)
+
+    def publish(self):
+        self.file.close()
+        os.chmod(self.tmp_path, 0o644)
+        os.replace(self.tmp_path, self.path)
+        self.published = True
+
+    def discard(self):
+        if not self.published:
+            self.file.close()
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+
+def stream_archive(members, archive='zip'):
+    """Yield a zip or tar.gz archive of (name, path) files in CHUNK_SIZE pieces"""
+    sink = UnseekableSink()
+    if archive == 'zip':
+        bundle = zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED)
+    else:
+        bundle = tarfile.open(fileobj=sink, mode='w|gz')
+    try:
+        for name, path in members:
+            if archive == 'zip':
+                info = zipfile.ZipInfo.from_file(path, name)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with open(path, 'rb') as source, bundle.open(info, 'w') as target:
+                    while True:
+                        data = source.read(CHUNK_SIZE)
+                        if not data:
+                            break
+                        target.write(data)
+                        if sink.pending >= CHUNK_SIZE:
+                            yield sink.drain()
+            else:
+                # tarfile copies a member in one call; at most one compressed member is held
+                with open(path, 'rb') as source:
+                    info = bundle.gettarinfo(arcname=name, fileobj=source)
+                    info.uid = info.gid = 0
+                    info.uname = info.gname = ''
+                    bundle.addfile(info, source)
+            if sink.pending >= CHUNK_SIZE:
+                yield sink.drain()
+    finally:
+        bundle.close()
+    yield sink.drain()
+
+
+class ExportCache:
+    """Export files in the downloads directory, one per format and inventory version
+
+    An export is rendered once per inventory version: while the version is
+    unchanged, the file written the first time is served (and its ETag lets
+    clients skip even that). Incremental exports are cached the same way per
+    (since, version) pair. Only the newest KEEP_EXPORTS full and incremental
+    files per format are kept.
+    """
+
+    def __init__(self, directory, keep=KEEP_EXPORTS):
+        self.directory = directory
+        self.keep = keep
+
+    def filename(self, format, version, since=None):
+        _, _, prefix, extension = FORMATS[format]
+        if since is not None:
+            return f"{prefix}_delta_v{since}-v{version}_r{EXPORT_REVISION}.{extension}"
+        return f"{prefix}_v{version}_r{EXPORT_REVISION}.{extension}"
+
+    def path(self, format, version, since=None):
+        return os.path.join(self.directory, self.filename(format, version, since))
+
+    @staticmethod
+    def etag(format, version, since=None):
+        """Entity tag (unquoted) for an export (or archive of exports) of an inventory version"""
+        if since is not None:
+            return f"{format}-v{since}-v{version}-r{EXPORT_REVISION}"
+        return f"{format}-v{version}-r{EXPORT_REVISION}"
+
+    def cached(self, format, version, since=None):
+        """Path of the finished export for version, or None"""
+        path = self.path(format, version, since)
+        return path if os.path.exists(path) else None
+
+    def stream(self, format, version, servers, since=None, removed=None):
+        """Yield the export as bytes while saving it as the cached file for version
+
+        With since, servers are the records added or changed after that
+        version and removed the {'ip': ...} entries of removed ones. The file
+        is published only once the export is complete; a stream abandoned
+        part way (client disconnect) leaves nothing behind.
+        """
+        target = _PendingFile(self.path(format, version, since))
+        try:
+            for data in _coalesce(render(format, servers, version, since, removed)):
+                target.write(data)
+                yield data
+            target.publish()
+        finally:
+            target.discard()
+        self.collect_garbage()
+
+    def build(self, formats, version, servers, since=None, removed=None):
+        """Render every format not yet cached for version in one pass over servers
+
+        Each server is normalised into a Connection once and handed to the
+        writer of every pending format. Returns {format: (filename, built)}.
+        """
+        pending = [format for format in formats if not self.cached(format, version, since)]
+        result = {format: (self.filename(format, version, since), format in pending)
+                  for format in formats}
+        if not pending:
+            return result
+        outputs = []
+        try:
+            for format in pending:
+                writer = FORMATS[format][0](version, since, removed)
+                outputs.append((writer, _PendingFile(self.path(format, version, since))))
+            for writer, target in outputs:
+                target.write(writer.header().encode('utf-8'))
+            for server in servers:
+                connection = Connection(server)
+                for writer, target in outputs:
+                    text = writer.entry(connection)
+                    if text:
+                        target.write(text.encode('utf-8'))
+            for writer, target in outputs:
+                target.write(writer.footer().encode('utf-8'))
+                target.publish()
+        finally:
+            for _, target in outputs:
+                target.discard()
+        self.collect_garbage()
+        return result
+
+    def ensure(self, format, version, servers, since=None, removed=None):
+        """Make sure the export for version exists; returns (filename, built)"""
+        return self.build([format], version, servers, since, removed)[format]
+
+    def collect_garbage(self):
+        """Delete all but the newest full and incremental exports per format, and abandoned temp files"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        removed = 0
+        now = time.time()
+        for prefix, extension in {(prefix, extension) for _, _, prefix, extension in FORMATS.values()}:
+            exports = {False: [], True: []}   # incremental? -> [(mtime, path)]
+            for name in names:
+                path = os.path.join(self.directory, name)
+                if name.startswith('.' + prefix + '_') and ('.' + extension + '.') in name:
+                    try:
+                        if now - os.path.getmtime(path) > 3600:
+                            os.remove(path)
+                            removed += 1
+                    except OSError:
+                        pass
+                elif name.startswith(prefix + '_') and name.endswith('.' + extension):
+                    try:
+                        exports[name.startswith(prefix + '_delta_')].append((os.path.getmtime(path), path))
+                    except OSError:
+                        pass
+            for files in exports.values():
+                for _, path in sorted(files, reverse=True)[self.keep:]:
+                    try:
+                        os.remove(path)
+                        removed += 1
+                    except OSError:
+                        pass
+        return removed
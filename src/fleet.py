@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Fleet
+Run one command on many hosts in parallel over pooled SSH sessions and summarize the outcome
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ssh_sessions import SSHSessionError, COMMAND_TIMEOUT
+
+# Configuration
+FLEET_CONCURRENCY = int(os.environ.get('FLEET_CONCURRENCY', '32'))   # hosts in flight at once
+STREAM_MAX_BYTES = 64 * 1024   # output streamed per host; the rest only appears in the summary
+
+
+def run_fleet(pool, targets, command, concurrency=FLEET_CONCURRENCY, timeout=COMMAND_TIMEOUT,
+              on_output=None, on_result=None):
+    """Run command on every target, concurrency hosts at a time
+
+    targets are dicts with 'ip' and optionally 'type', 'port', 'username' and
+    'password'. on_output(ip, stream, text) is called as output arrives and
+    on_result(entry) as each host finishes; the returned entries follow the
+    order of targets. Each entry has 'ip', 'type', 'exit_status', 'stdout',
+    'stderr', 'elapsed' and, when the host could not run the command, 'error'.
+    """
+    results = [None] * len(targets)
+
+    def run(target):
+        ip = target['ip']
+        entry = {'ip': ip, 'type': target.get('type', 'unknown')}
+        streamed = [0]
+        lock = threading.Lock()
+
+        def output(stream, text):
+            with lock:
+                if streamed[0] >= STREAM_MAX_BYTES:
+                    return
+                streamed[0] += len(text)
+            on_output(ip, stream, text)
+
+        started = time.monotonic()
+        try:
+            outcome = pool.run(ip, command, port=target.get('port', 22),
+                               username=target.get('username'), password=target.get('password'),
+                               timeout=timeout, on_output=output if on_output else None)
+        except SSHSessionError as e:
+            entry.update(exit_status=None, stdout='', stderr='', error=str(e),
+                         elapsed=round(time.monotonic() - started, 3))
+            return entry
+        entry.update(exit_status=outcome['exit_status'], stdout=outcome['stdout'],
+                     stderr=outcome['stderr'], elapsed=outcome['elapsed'])
+        if outcome['timed_out']:
+            entry['error'] = f'Command timed out after {timeout}s'
+        return entry
+
+    if not targets:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(targets))),
+                            thread_name_prefix='fleet') as executor:
+        futures = {executor.submit(run, target): index for index, target in enumerate(targets)}
+        for future in as_completed(futures):
+            entry = future.result()
+            results[futures[future]] = entry
+            if on_result:
+                on_result(entry)
+    return results
+
+
+def summarize(results, wall_seconds=None):
+    """Aggregate fleet results: outcome counts, timings and hosts grouped by identical output
+
+    Groups are ordered largest first, so the common answer comes first and
+    outliers follow; each host appears in exactly one group. 'results' keeps
+    every host's exit status and timing, in target order, without output.
+    """
+    groups = {}
+    exit_codes = {}
+    for entry in results:
+        outcome = entry.get('error') or entry['exit_status']
+        code = 'error' if entry.get('error') else str(entry['exit_status'])
+        exit_codes[code] = exit_codes.get(code, 0) + 1
+        key = (str(outcome), entry['stdout'], entry['stderr'])
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                'exit_status': entry['exit_status'],
+                'error': entry.get('error'),
+                'stdout': entry['stdout'],
+                'stderr': entry['stderr'],
+                'hosts': []
+            }
+        group['hosts'].append(entry['ip'])
+
+    ordered = sorted(groups.values(), key=lambda group: -len(group['hosts']))
+    for group in ordered:
+        group['count'] = len(group['hosts'])
+
+    elapsed = sorted(entry['elapsed'] for entry in results)
+    timings = {}
+    if elapsed:
+        timings = {
+            'min': elapsed[0],
+            'median': elapsed[len(elapsed) // 2],
+            'p95': elapsed[min(len(elapsed) - 1, int(len(elapsed) * 0.95))],
+            'max': elapsed[-1]
+        }
+    if wall_seconds is not None:
+        timings['wall'] = round(wall_seconds, 3)
+
+    return {
+        'hosts': len(results),
+        'succeeded': sum(1 for entry in results if entry['exit_status'] == 0 and not entry.get('error')),
+        'failed': sum(1 for entry in results if entry['exit_status'] != 0 or entry.get('error')),
+        'exit_codes': exit_codes,
+        'timings': timings,
+        'groups': ordered,
+        'results': [{key: entry.get(key) for key in ('ip', 'type', 'exit_status', 'elapsed', 'error')}
+                    for entry in results]
+    }
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Gunicorn configuration for the Multi-Server Container API
+Every setting can be overridden through the environment (see docker/supervisord.conf)
+
+Workers are separate processes, so one busy request (an SSH key deployment,
+an export) only ties up a thread of one worker. Each open event stream
+(/api/events, /api/jobs/<id>/events) holds a thread for as long as it is
+connected, so a worker serves at most API_MAX_EVENT_STREAMS of them (503
+with Retry-After past that; the dashboard polls instead), keeping the other
+API_THREADS - API_MAX_EVENT_STREAMS threads for ordinary requests.
+"""
+
+import os
+import multiprocessing
+
+
+def env_int(name, default):
+    """Return an integer setting from the environment"""
+    value = os.environ.get(name, '')
+    return int(value) if value.strip() else default
+
+
+bind = os.environ.get('API_BIND', '0.0.0.0:8765')
+# gthread worker that waits for its background jobs before exiting (gunicorn_worker.py)
+worker_class = 'gunicorn_worker.JobDrainingWorker'
+workers = env_int('API_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 4))
+threads = env_int('API_THREADS', 16)
+
+# Seconds a worker may go silent before it is killed and replaced. gthread workers
+# report in between requests, so this bounds stuck workers, not long responses.
+timeout = env_int('API_TIMEOUT', 120)
+# Seconds in-flight requests get to finish on HUP (graceful reload) or TERM
+graceful_timeout = env_int('API_GRACEFUL_TIMEOUT', 30)
+# Seconds an idle keep-alive connection from nginx or a client is held open
+keepalive = env_int('API_KEEPALIVE', 5)
+
+# Requests after which a worker is replaced (0 = never). Off by default: dashboard
+# polling and event streams reach any limit quickly, and a recycled worker takes
+# capacity away while it waits for its background jobs to finish.
+max_requests = env_int('API_MAX_REQUESTS', 0)
+max_requests_jitter = env_int('API_MAX_REQUESTS_JITTER', 200)
+
+accesslog = os.environ.get('API_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('API_LOG_LEVEL', 'info')
+proc_name = 'idrac-api'
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Gunicorn worker for the Multi-Server Container API
+A gthread worker that lets the background jobs it started finish before it exits
+"""
+
+import os
+
+from gunicorn.workers.gthread import ThreadWorker
+
+import jobs
+
+# Seconds an exiting worker waits for its jobs (0 = as long as they run)
+JOB_DRAIN_TIMEOUT = int(os.environ.get('API_JOB_DRAIN_TIMEOUT', '0') or 0)
+
+
+class JobDrainingWorker(ThreadWorker):
+    """Threaded worker that drains its background jobs on graceful exit
+
+    Jobs run on a thread pool inside the worker. A worker exiting on a
+    graceful reload (HUP) or after max_requests stops sending heartbeats
+    while Python waits for those threads, so the arbiter kills it as stuck
+    once API_TIMEOUT passes and its jobs fail. This worker waits for its
+    jobs itself, heartbeating until they are done.
+    """
+
+    def run(self):
+        super().run()
+        if jobs.drain(timeout=JOB_DRAIN_TIMEOUT or None, keep_alive=self.notify, interval=0.5):
+            return
+        self.log.warning("Exiting with background jobs still running (pid: %s)", self.pid)
+
+    def notify(self):
+        try:
+            super().notify()
+        except (OSError, ValueError):
+            pass   # heartbeat file already gone
@@ -9,12 +9,22 @@ import json
 import subprocess
 import threading
 import time
-import xml.etree.ElementTree as ET
 from datetime import datetime
 from flask import Flask, request, jsonify, send_from_directory, send_file, Response
 import paramiko
-import uuid
 import base64
+from inventory import ServerRecord, query_servers
+from inventory_store import InventoryStore, InventoryCache
+from snapshot_writer import write_snapshot
+from availability_log import AvailabilityLog, parse_window
+from mutation_journal import MutationJournal
+import ssh_deploy
+from jobs import JobStore, JobRunner
+from ssh_sessions import SessionPool
+import fleet
+from liveness import LivenessCache
+import launchers
+import exporters
 
 app = Flask(__name__)
 
@@ -22,12 +32,105 @@ app = Flask(__name__)
 DATA_DIR = '/app/www/data'
 DOWNLOADS_DIR = '/app/www/downloads'
 LOGS_DIR = '/app/logs'
+EVENT_POLL_INTERVAL = 1.0   # seconds between inventory version checks per event stream
+EVENT_HEARTBEAT = 15        # seconds of silence before a keep-alive comment
+SSH_KEY_PATH = '/root/.ssh/server_rsa'
+SSH_CONFIG_PATH = '/root/.ssh/config'
+SSH_TYPES = ('linux', 'proxmox')   # server types that always run SSH
+JOB_POLL_INTERVAL = 0.5     # seconds between job progress checks per job event stream
+# Event streams open at once per worker; each holds a worker thread while connected
+MAX_EVENT_STREAMS = int(os.environ.get('API_MAX_EVENT_STREAMS', '4') or 4)
+STREAM_RETRY_AFTER = 30     # seconds a refused stream client should wait (it polls meanwhile)
+
+_store = None
+_store_lock = threading.Lock()
+_journal = None
+_availability_log = None
+_job_runner = None
+_ssh_pool = None
+_inventory_cache = None
+_liveness = None
+_export_cache = None
+_open_streams = 0
+_streams_lock = threading.Lock()
 
 def log_message(message):
     """Log message with timestamp"""
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     print(f"[{timestamp}] {message}")
 
+def get_store():
+    """Return the shared inventory store, opening it on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = InventoryStore(data_dir=DATA_DIR)
+        return _store
+
+def get_availability_log():
+    """Return the per-host availability log written by the scanner"""
+    global _availability_log
+    if _availability_log is None:
+        _availability_log = AvailabilityLog()
+    return _availability_log
+
+def get_journal():
+    """Return the mutation journal used for inventory writes"""
+    global _journal
+    store = get_store()
+    with _store_lock:
+        if _journal is None:
+            _journal = MutationJournal(store)
+        return _journal
+
+def get_job_runner():
+    """Return the runner for background jobs, creating it on first use"""
+    global _job_runner
+    with _store_lock:
+        if _job_runner is None:
+            _job_runner = JobRunner(JobStore())
+        return _job_runner
+
+def get_ssh_pool():
+    """Return this process's pool of SSH connections for fleet commands, creating it on first use"""
+    global _ssh_pool
+    with _store_lock:
+        if _ssh_pool is None:
+            _ssh_pool = SessionPool(key_path=SSH_KEY_PATH)
+        return _ssh_pool
+
+def start_job(command, func, params=None, total=None):
+    """Run func(job) in the background and answer 202 with where to follow it"""
+    job_id = get_job_runner().submit(command, func, params, total)
+    log_message(f"Started job {job_id}: {command}")
+    return jsonify({
+        'status': 'accepted',
+        'job_id': job_id,
+        'job_url': f'/api/jobs/{job_id}',
+        'events_url': f'/api/jobs/{job_id}/events'
+    }), 202
+
+def get_inventory_cache():
+    """Return this process's inventory cache, creating it on first use"""
+    global _inventory_cache
+    store = get_store()
+    with _store_lock:
+        if _inventory_cache is None:
+            _inventory_cache = InventoryCache(store)
+        return _inventory_cache
+
+def get_liveness():
+    """Return this process's reachability cache, creating it on first use"""
+    global _liveness
+    with _store_lock:
+        if _liveness is None:
+            _liveness = LivenessCache()
+        return _liveness
+
+def load_inventory():
+    """Return the current inventory as an indexed in-memory model (shared: do not modify)"""
+    return get_inventory_cache().get()
+
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
@@ -48,7 +151,18 @@ def api_status():
             'server_management',
             'rdm_export',
             'custom_network_ranges',
-            'multi_server_types'
+            'multi_server_types',
+            'availability_history',
+            'server_query',
+            'delta_sync',
+            'event_stream',
+            'background_jobs',
+            'ssh_session_pool',
+            'fleet_commands',
+            'liveness_cache',
+            'launcher_bundle',
+            'incremental_rdm_export',
+            'multi_format_export'
         ]
     })
 
@@ -76,7 +190,11 @@ def execute_command():
         elif command == 'scan_custom_range':
             return scan_custom_range(params.get('ranges'))
         elif command == 'export_rdm':
-            return export_rdm(params.get('format', 'json'))
+            return export_rdm(params.get('format', 'json'), params.get('since'))
+        elif command == 'export':
+            return export_formats(params)
+        elif command == 'run_fleet':
+            return run_fleet(params)
         else:
             return jsonify({'error': f'Unknown command: {command}'}), 400
             
@@ -84,145 +202,117 @@ def execute_command():
         log_message(f"Error executing command: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def create_ssh_key(email, key_path=SSH_KEY_PATH):
+    """Replace the deployment key pair; returns the public key"""
+    for ext in ['', '.pub']:
+        if os.path.exists(f"{key_path}{ext}"):
+            os.remove(f"{key_path}{ext}")
+    
+    result = subprocess.run([
+        'ssh-keygen', '-t', 'rsa', '-b', '4096',
+        '-C', email, '-f', key_path, '-N', ''
+    ], capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(f'SSH key generation failed: {result.stderr}')
+    with open(f"{key_path}.pub", 'r') as f:
+        return f.read().strip()
+
 def generate_ssh_key(email):
-    """Generate SSH key for server access"""
+    """Generate SSH key for server access (as a background job: 4096-bit keygen takes seconds)"""
     if not email:
         return jsonify({'error': 'Email address required'}), 400
+    return start_job('generate_ssh_key', lambda job: write_ssh_key(job, email), {'email': email})
+
+def write_ssh_key(job, email):
+    """Generate the key pair and record it in admin_config.json"""
+    key_path = SSH_KEY_PATH
+    job.progress(message=f'Generating SSH key for {email}')
+    public_key = create_ssh_key(email, key_path)
     
-    try:
-        # Generate SSH key
-        key_path = '/root/.ssh/server_rsa'
-        cmd = [
-            'ssh-keygen', '-t', 'rsa', '-b', '4096',
-            '-C', email, '-f', key_path, '-N', ''
-        ]
-        
-        # Remove existing key if present
-        for ext in ['', '.pub']:
-            if os.path.exists(f"{key_path}{ext}"):
-                os.remove(f"{key_path}{ext}")
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            # Read public key
-            with open(f"{key_path}.pub", 'r') as f:
-                public_key = f.read().strip()
-            
-            # Update admin config
-            config_file = os.path.join(DATA_DIR, 'admin_config.json')
-            config = {
-                'admin_email': email,
-                'ssh_key_generated': True,
-                'ssh_key_path': key_path,
-                'public_key': public_key,
-                'last_updated': datetime.now().isoformat()
-            }
-            
-            with open(config_file, 'w') as f:
-                json.dump(config, f, indent=2)
-            
-            log_message(f"SSH key generated for {email}")
-            
-            return jsonify({
-                'status': 'success',
-                'message': f'SSH key generated for {email}',
-                'key_path': key_path,
-                'public_key': public_key
-            })
-        else:
-            return jsonify({'error': f'SSH key generation failed: {result.stderr}'}), 500
-            
-    except Exception as e:
-        return jsonify({'error': f'Failed to generate SSH key: {str(e)}'}), 500
+    # Update admin config
+    config_file = os.path.join(DATA_DIR, 'admin_config.json')
+    config = {
+        'admin_email': email,
+        'ssh_key_generated': True,
+        'ssh_key_path': key_path,
+        'public_key': public_key,
+        'last_updated': datetime.now().isoformat()
+    }
+    
+    write_snapshot(config_file, config)
+    
+    log_message(f"SSH key generated for {email}")
+    
+    return {
+        'status': 'success',
+        'message': f'SSH key generated for {email}',
+        'key_path': key_path,
+        'public_key': public_key
+    }
+
+def ssh_port(server):
+    """The port the scan found SSH on (22 for types that always run it), or None"""
+    for service in server.services:
+        if service.get('type') == 'ssh' and service.get('port'):
+            return int(service['port'])
+    if server.ports.get('22') or server.type in SSH_TYPES:
+        return 22
+    return None
+
+def deploy_target(server):
+    """SSH connection details (key deployment, fleet commands) for an inventory record"""
+    credentials = server.credentials or {}
+    return {
+        'ip': server.ip,
+        'type': server.type,
+        'port': ssh_port(server) or 22,
+        'username': credentials.get('username') or 'root',
+        'password': credentials.get('password') or None
+    }
 
 def deploy_ssh_keys():
     """Deploy SSH keys to all discovered servers with SSH support"""
     try:
-        # Read server list
-        servers_file = os.path.join(DATA_DIR, 'discovered_servers.json')
-        if not os.path.exists(servers_file):
-            # Try legacy file
-            servers_file = os.path.join(DATA_DIR, 'discovered_idracs.json')
-            if not os.path.exists(servers_file):
-                return jsonify({'error': 'No discovered servers found'}), 400
-        
-        with open(servers_file, 'r') as f:
-            data = json.load(f)
-        
-        # Filter servers with SSH capability
-        ssh_servers = []
-        for server in data.get('servers', []):
-            if server.get('status') == 'online':
-                # Check if server has SSH port open
-                if '22' in server.get('ports', {}) or server.get('type') in ['idrac', 'linux']:
-                    ssh_servers.append(server)
+        # Same hosts a run_fleet selector targets: SSH types or a scanned SSH port
+        ssh_servers = [server for server in load_inventory().select(status='online')
+                       if ssh_port(server) is not None]
         
         if not ssh_servers:
             return jsonify({'error': 'No online servers with SSH found'}), 400
         
         # Check if SSH key exists
-        key_path = '/root/.ssh/server_rsa'
-        pub_key_path = f"{key_path}.pub"
+        pub_key_path = f"{SSH_KEY_PATH}.pub"
         
         if not os.path.exists(pub_key_path):
             return jsonify({'error': 'SSH public key not found. Generate key first.'}), 400
         
-        results = []
-        
-        for server in ssh_servers:
-            ip = server.get('ip', server['url'].replace('https://', '').replace('http://', '').split('/')[0])
-            
-            try:
-                # Use ssh-copy-id to deploy key
-                cmd = ['ssh-copy-id', '-i', pub_key_path, '-o', 'StrictHostKeyChecking=no', 
-                       '-o', 'ConnectTimeout=10', f'root@{ip}']
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-                
-                success = result.returncode == 0
-                results.append({
-                    'ip': ip,
-                    'type': server.get('type', 'unknown'),
-                    'success': success,
-                    'message': result.stdout if success else result.stderr
-                })
-                
-                # Update SSH config
-                if success:
-                    update_ssh_config(ip, server.get('type', 'server'))
-                
-            except subprocess.TimeoutExpired:
-                results.append({
-                    'ip': ip,
-                    'type': server.get('type', 'unknown'),
-                    'success': False,
-                    'message': 'Connection timeout'
-                })
-            except Exception as e:
-                results.append({
-                    'ip': ip,
-                    'type': server.get('type', 'unknown'),
-                    'success': False,
-                    'message': str(e)
-                })
-        
-        successful = len([r for r in results if r['success']])
+        with open(pub_key_path, 'r') as f:
+            public_key = f.read().strip()
+        targets = [deploy_target(server) for server in ssh_servers]
+        
+        def run_deployment(job):
+            # Each host's result is streamed as a job step as soon as it finishes
+            results = ssh_deploy.deploy_keys(targets, public_key, private_key_path=SSH_KEY_PATH,
+                                             on_result=job.step)
+            for entry in results:
+                if entry['success']:
+                    update_ssh_config(entry['ip'], entry['type'])
+            successful = len([r for r in results if r['success']])
+            log_message(f"SSH deployment complete: {successful}/{len(results)} servers")
+            return {
+                'status': 'success',
+                'message': f'SSH deployment complete: {successful}/{len(results)} servers',
+                'results': results
+            }
         
-        log_message(f"SSH deployment complete: {successful}/{len(results)} servers")
-        
-        return jsonify({
-            'status': 'success',
-            'message': f'SSH deployment complete: {successful}/{len(results)} servers',
-            'results': results
-        })
+        return start_job('deploy_ssh_keys', run_deployment, total=len(ssh_servers))
         
     except Exception as e:
         return jsonify({'error': f'Failed to deploy SSH keys: {str(e)}'}), 500
 
 def update_ssh_config(ip, server_type='server'):
     """Update SSH config with server entry"""
-    ssh_config_path = '/root/.ssh/config'
+    ssh_config_path = SSH_CONFIG_PATH
     alias = f"{server_type}-{ip.replace('.', '-')}"
     
     # Check if entry already exists
@@ -237,7 +327,7 @@ Host {alias}
     HostName {ip}
     User root
     Port 22
-    IdentityFile /root/.ssh/server_rsa
+    IdentityFile {SSH_KEY_PATH}
     StrictHostKeyChecking no
     UserKnownHostsFile /dev/null
 """
@@ -245,124 +335,104 @@ Host {alias}
     with open(ssh_config_path, 'a') as f:
         f.write(config_entry)
 
+def select_fleet(params):
+    """Inventory records matching a run_fleet or bundle selector: ips, or type(s) and status"""
+    inventory = load_inventory()
+    if params.get('ips'):
+        return [inventory.get(ip) for ip in params['ips'] if ip in inventory]
+    types = params.get('type')
+    if isinstance(types, str):
+        types = [types]
+    status = params.get('status', 'online')
+    if status == 'any':
+        status = None
+    if not types:
+        return inventory.select(status=status)
+    return [server for server_type in types for server in inventory.select(server_type, status)]
+
+def run_fleet(params):
+    """Run one shell command on every selected server over pooled SSH sessions"""
+    command = (params.get('command') or '').strip()
+    if not command:
+        return jsonify({'error': 'command is required'}), 400
+    try:
+        concurrency = min(max(int(params.get('concurrency', fleet.FLEET_CONCURRENCY)), 1), 256)
+        timeout = min(max(float(params.get('timeout', 60)), 1), 3600)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'concurrency and timeout must be numbers'}), 400
+    
+    servers = select_fleet(params)
+    skipped = 0
+    if not params.get('ips'):
+        # A type/status selector only reaches hosts with SSH; ips names hosts explicitly
+        ssh_servers = [server for server in servers if ssh_port(server)]
+        skipped = len(servers) - len(ssh_servers)
+        servers = ssh_servers
+    if not servers:
+        return jsonify({'error': 'No servers with SSH match the selector'}), 400
+    targets = [deploy_target(server) for server in servers]
+    
+    def run(job):
+        # Output chunks are streamed as uncounted steps, each host's outcome as a counted one
+        def on_output(ip, stream, text):
+            job.step({'kind': 'output', 'ip': ip, 'stream': stream, 'text': text}, counts=False)
+        
+        def on_result(entry):
+            job.step({'kind': 'result', 'ip': entry['ip'], 'exit_status': entry['exit_status'],
+                      'elapsed': entry['elapsed'], 'error': entry.get('error')})
+        
+        started = time.monotonic()
+        results = fleet.run_fleet(get_ssh_pool(), targets, command, concurrency=concurrency,
+                                  timeout=timeout, on_output=on_output, on_result=on_result)
+        summary = fleet.summarize(results, time.monotonic() - started)
+        dropped = job.dropped_steps()
+        if dropped['counted'] or dropped['output']:
+            summary['dropped_steps'] = dropped
+            job.progress(message=f"Step stream truncated: {dropped['output']} output chunks and "
+                                 f"{dropped['counted']} host results were not streamed")
+        log_message(f"Fleet command finished on {summary['succeeded']}/{summary['hosts']} servers: {command}")
+        return summary
+    
+    return start_job('run_fleet', run,
+                     params={'command': command, 'hosts': len(targets), 'skipped_without_ssh': skipped},
+                     total=len(targets))
+
 def launch_virtual_console(ip):
-    """Launch Virtual Console for server"""
+    """Launch Virtual Console for server (as a background job)"""
     if not ip:
         return jsonify({'error': 'IP address required'}), 400
     
-    try:
-        # Check if server is accessible
-        cmd = ['ping', '-c', '1', '-W', '3', ip]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            # Determine server type from database
-            servers_file = os.path.join(DATA_DIR, 'discovered_servers.json')
-            server_type = 'unknown'
-            server_info = None
-            
-            if os.path.exists(servers_file):
-                with open(servers_file, 'r') as f:
-                    data = json.load(f)
-                    for server in data.get('servers', []):
-                        if server.get('ip') == ip:
-                            server_type = server.get('type', 'unknown')
-                            server_info = server
-                            break
-            
-            # Generate appropriate connection info based on server type
-            if server_type == 'idrac':
-                console_url = f"https://{ip}/console"
-                instructions = "Use Dell iDRAC Virtual Console"
-            elif server_type == 'proxmox':
-                console_url = f"https://{ip}:8006"
-                instructions = "Access Proxmox VE web interface"
-            elif server_type == 'windows':
-                console_url = f"rdp://{ip}"
-                instructions = "Use Remote Desktop Connection"
-            elif server_type == 'linux':
-                console_url = f"ssh://root@{ip}"
-                instructions = "Use SSH terminal"
-            elif server_type == 'vnc':
-                port = server_info.get('ports', {}).get('5900', '5900')
-                console_url = f"vnc://{ip}:{port}"
-                instructions = "Use VNC viewer"
-            else:
-                console_url = f"http://{ip}"
-                instructions = "Access via web browser"
-            
-            # Generate download script for users
-            script_content = f"""#!/bin/bash
-# Connection Launcher for {ip} ({server_type})
-# Run this on your local machine
+    return start_job('launch_virtual_console', lambda job: prepare_console(job, ip), {'ip': ip})
 
-echo "Connecting to {server_type} server at {ip}..."
-echo "Connection URL: {console_url}"
-
-# Try to open appropriate application
-"""
-            
-            if server_type == 'windows':
-                script_content += f"""
-if command -v mstsc >/dev/null; then
-    mstsc /v:{ip}  # Windows
-elif command -v rdesktop >/dev/null; then
-    rdesktop {ip}  # Linux with rdesktop
-elif command -v xfreerdp >/dev/null; then
-    xfreerdp /v:{ip}  # Linux with xfreerdp
-else
-    echo "Please connect manually using Remote Desktop to: {ip}"
-fi
-"""
-            elif server_type == 'linux':
-                script_content += f"""
-if command -v ssh >/dev/null; then
-    ssh root@{ip}
-else
-    echo "SSH client not found. Please install SSH."
-fi
-"""
-            else:
-                script_content += f"""
-if command -v open >/dev/null; then
-    open "{console_url}"  # macOS
-elif command -v xdg-open >/dev/null; then
-    xdg-open "{console_url}"  # Linux
-elif command -v start >/dev/null; then
-    start "{console_url}"  # Windows
-else
-    echo "Please open this URL manually: {console_url}"
-fi
-"""
-            
-            script_content += f"""
-echo ""
-echo "Connection details:"
-echo "Type: {server_type}"
-echo "Instructions: {instructions}"
-"""
-            
-            # Save script to downloads
-            script_file = os.path.join(DOWNLOADS_DIR, f"connect-{server_type}-{ip}.sh")
-            with open(script_file, 'w') as f:
-                f.write(script_content)
-            os.chmod(script_file, 0o755)
-            
-            log_message(f"Connection prepared for {server_type} server at {ip}")
-            
-            return jsonify({
-                'status': 'success',
-                'message': f'Connection prepared for {server_type} server at {ip}',
-                'console_url': console_url,
-                'download_script': f"connect-{server_type}-{ip}.sh",
-                'instructions': instructions,
-                'server_type': server_type
-            })
-        else:
-            return jsonify({'error': f'Server {ip} is not accessible'}), 400
-            
-    except Exception as e:
-        return jsonify({'error': f'Failed to prepare connection: {str(e)}'}), 500
+def prepare_console(job, ip):
+    """Check a server is reachable and write its connection launcher; returns the details"""
+    # Check if server is accessible (answered from the liveness cache for known hosts)
+    job.progress(message=f'Checking that {ip} is reachable')
+    server = load_inventory().get(ip)
+    liveness = get_liveness().check(ip, server)
+    
+    if liveness['online']:
+        server_type = server.type if server else 'unknown'
+        
+        port = launchers.console_port(server) if server else None
+        console_url, instructions = launchers.connection(server_type, ip, port)
+        
+        # Launchers are rewritten only when their type, address, port or template changes
+        job.progress(message='Writing connection launcher')
+        script_name, _ = launchers.write_launcher(DOWNLOADS_DIR, server_type, ip, port)
+        
+        log_message(f"Connection prepared for {server_type} server at {ip}")
+        
+        return {
+            'status': 'success',
+            'message': f'Connection prepared for {server_type} server at {ip}',
+            'console_url': console_url,
+            'download_script': script_name,
+            'instructions': instructions,
+            'server_type': server_type
+        }
+    else:
+        raise RuntimeError(f'Server {ip} is not accessible')
 
 def rescan_network():
     """Trigger network rescan"""
@@ -409,233 +479,487 @@ def scan_custom_range(ranges):
 def remove_server(url):
     """Remove server from discovered list"""
     try:
-        servers_file = os.path.join(DATA_DIR, 'discovered_servers.json')
-        
-        if not os.path.exists(servers_file):
-            # Try legacy file
-            servers_file = os.path.join(DATA_DIR, 'discovered_idracs.json')
-            if not os.path.exists(servers_file):
-                return jsonify({'error': 'No servers file found'}), 400
-        
-        with open(servers_file, 'r') as f:
-            data = json.load(f)
-        
-        # Remove server from list
-        data['servers'] = [s for s in data['servers'] if s['url'] != url]
-        
-        with open(servers_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        version, result = get_journal().remove(url)
+        if not result['removed']:
+            return jsonify({'error': f'Server not found: {url}'}), 404
         
         log_message(f"Removed server: {url}")
         
         return jsonify({
             'status': 'success',
-            'message': f'Server removed: {url}'
+            'message': f'Server removed: {url}',
+            'version': version
         })
         
     except Exception as e:
         return jsonify({'error': f'Failed to remove server: {str(e)}'}), 500
 
-def export_rdm(format='json'):
-    """Export servers to Remote Desktop Manager format"""
+def get_export_cache():
+    """Return the cache of export files in the downloads directory"""
+    global _export_cache
+    with _store_lock:
+        if _export_cache is None:
+            _export_cache = exporters.ExportCache(DOWNLOADS_DIR)
+        return _export_cache
+
+def export_selection(since=None):
+    """Return (version, servers, since, removed) to export
+
+    With since, the records added or changed after that inventory version
+    and the removed ones; since comes back None when the store can only
+    answer with the full inventory (unknown or too old a version).
+    """
+    if since is not None:
+        changes = get_store().changes_since(since)
+        if not changes['full']:
+            servers = [ServerRecord.from_dict(data) for data in changes['added'] + changes['modified']]
+            removed = [item for item in changes['removed'] if item.get('ip')]
+            return changes['version'], servers, since, removed
+    inventory = load_inventory()
+    return inventory.version, inventory.select(), None, None
+
+def parse_export_since(formats, since):
+    """Validate since for an export of formats; returns the version or raises ValueError"""
+    if since is None or since == '':
+        return None
+    not_incremental = [format for format in formats if not exporters.is_incremental(format)]
+    if not_incremental:
+        raise ValueError(f"Incremental export is not supported for: {', '.join(not_incremental)}")
+    return exporters.parse_since(since)
+
+def export_rdm(format='json', since=None):
+    """Export servers to Remote Desktop Manager format (as a background job)"""
+    if format not in exporters.RDM_FORMATS:
+        return jsonify({'error': f'Unsupported format: {format}'}), 400
+    if since is not None:
+        try:
+            since = exporters.parse_since(since)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    elif not load_inventory():
+        return jsonify({'error': 'No servers to export'}), 400
+    return start_job('export_rdm', lambda job: write_rdm_export(job, format, since),
+                     {'format': format, 'since': since})
+
+def write_rdm_export(job, format, since=None):
+    """Write the RDM export (all servers, or the changes after since) unless it exists; returns where to fetch it"""
+    version, servers, since, removed = export_selection(since)
+    if not servers and since is None:
+        raise RuntimeError('No servers to export')
+    job.progress(total=len(servers), message=f'Exporting {len(servers)} servers')
+    filename, built = get_export_cache().ensure(format, version, servers, since, removed)
+    job.progress(done=len(servers))
+    if built:
+        scope = f'changes since version {since}' if since is not None else 'servers'
+        log_message(f"Exported {len(servers)} {scope} to RDM {format} format (version {version})")
+    return {
+        'status': 'success',
+        'format': format,
+        'version': version,
+        'incremental': since is not None,
+        'since': since,
+        'count': len(servers),
+        'removed': len(removed or []),
+        'filename': filename,
+        'download_url': f'/downloads/{filename}',
+        'mimetype': exporters.FORMATS[format][1],
+        'cached': not built
+    }
+
+def export_formats(params):
+    """Export servers to several formats in one pass (as a background job)
+
+    params: formats (list or comma-separated; all formats when missing) and
+    an optional since for an incremental export.
+    """
+    formats = params.get('formats')
+    if isinstance(formats, list):
+        formats = ','.join(str(format) for format in formats)
     try:
-        # Read server list
-        servers_file = os.path.join(DATA_DIR, 'discovered_servers.json')
-        if not os.path.exists(servers_file):
-            servers_file = os.path.join(DATA_DIR, 'discovered_idracs.json')
-            if not os.path.exists(servers_file):
-                return jsonify({'error': 'No discovered servers found'}), 400
-        
-        with open(servers_file, 'r') as f:
-            data = json.load(f)
-        
-        servers = data.get('servers', [])
-        if not servers:
+        formats = exporters.parse_formats(formats)
+        since = parse_export_since(formats, params.get('since'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if since is None and not load_inventory():
+        return jsonify({'error': 'No servers to export'}), 400
+    return start_job('export', lambda job: write_exports(job, formats, since),
+                     {'formats': formats, 'since': since})
+
+def write_exports(job, formats, since=None):
+    """Write every missing export of formats in one pass; returns where to fetch each and the archive"""
+    version, servers, since, removed = export_selection(since)
+    if not servers and since is None:
+        raise RuntimeError('No servers to export')
+    job.progress(total=len(servers), message=f'Exporting {len(servers)} servers to {len(formats)} formats')
+    files = get_export_cache().build(formats, version, servers, since, removed)
+    job.progress(done=len(servers))
+    built = [format for format, (_, was_built) in files.items() if was_built]
+    if built:
+        log_message(f"Exported {len(servers)} servers to {', '.join(built)} (version {version})")
+    query = f"formats={','.join(formats)}" + (f'&since={since}' if since is not None else '')
+    return {
+        'status': 'success',
+        'version': version,
+        'incremental': since is not None,
+        'since': since,
+        'count': len(servers),
+        'removed': len(removed or []),
+        'files': {format: {
+            'filename': filename,
+            'download_url': f'/downloads/{filename}',
+            'mimetype': exporters.FORMATS[format][1],
+            'cached': not was_built
+        } for format, (filename, was_built) in files.items()},
+        'archive_url': f'/api/export/archive?{query}'
+    }
+
+def export_headers(etag, version, since):
+    return {
+        'ETag': f'"{etag}"',
+        'Cache-Control': 'no-cache',
+        'X-Inventory-Version': str(version),
+        'X-Export-Mode': 'incremental' if since is not None else 'full'
+    }
+
+@app.route('/api/export/archive')
+@app.route('/export/archive')
+def api_export_archive():
+    """Zip (or ?archive=tar) of the exports in ?formats= (default all), rendered in one pass
+
+    Accepts ?since= like a single export when every format is incremental.
+    """
+    archive = request.args.get('archive', 'zip')
+    if archive not in ('zip', 'tar'):
+        return jsonify({'error': f'Unsupported archive: {archive}'}), 400
+    try:
+        formats = exporters.parse_formats(request.args.get('formats'))
+        since = parse_export_since(formats, request.args.get('since'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        version, servers, since, removed = export_selection(since)
+        if not servers and since is None:
             return jsonify({'error': 'No servers to export'}), 400
-        
-        if format == 'json':
-            return export_rdm_json(servers)
-        elif format == 'rdm':
-            return export_rdm_xml(servers)
-        else:
-            return jsonify({'error': f'Unsupported format: {format}'}), 400
-            
+        cache = get_export_cache()
+        etag = cache.etag(f"{archive}-{'+'.join(formats)}", version, since)
+        headers = export_headers(etag, version, since)
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+        
+        files = cache.build(formats, version, servers, since, removed)
+        members = [(filename, os.path.join(cache.directory, filename)) for filename, _ in files.values()]
+        base = f"exports_delta_v{since}-v{version}" if since is not None else f"exports_v{version}"
+        filename = f"{base}.zip" if archive == 'zip' else f"{base}.tar.gz"
+        headers.update({
+            'Content-Type': 'application/zip' if archive == 'zip' else 'application/gzip',
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no'
+        })
+        return Response(exporters.stream_archive(members, archive), headers=headers)
     except Exception as e:
         return jsonify({'error': f'Failed to export: {str(e)}'}), 500
 
-def export_rdm_json(servers):
-    """Export servers as RDM JSON format"""
-    rdm_entries = []
-    
-    for server in servers:
-        ip = server.get('ip', server['url'].replace('https://', '').replace('http://', '').split('/')[0])
-        server_type = server.get('type', 'unknown')
-        
-        # Base entry
-        entry = {
-            'ID': str(uuid.uuid4()),
-            'Name': server.get('title', f'{server_type} - {ip}'),
-            'Group': 'Homelab Servers',
-            'Host': ip,
-            'Description': f"Auto-discovered {server_type} server",
-            'Tags': ['auto-discovered', server_type, 'homelab']
-        }
-        
-        # Type-specific configurations
-        if server_type == 'idrac':
-            entry.update({
-                'ConnectionType': 'WebBrowser',
-                'ConnectionSubType': 'GoogleChrome',
-                'Url': server.get('url', f'https://{ip}'),
-                'Username': 'root',
-                'Domain': '',
-                'UseDefaultCredentials': False
-            })
-        elif server_type == 'proxmox':
-            entry.update({
-                'ConnectionType': 'WebBrowser',
-                'ConnectionSubType': 'GoogleChrome',
-                'Url': f'https://{ip}:8006',
-                'Username': 'root@pam',
-                'Domain': '',
-                'UseDefaultCredentials': False
-            })
-        elif server_type == 'linux':
-            entry.update({
-                'ConnectionType': 'SSH',
-                'ConnectionSubType': 'SSHShell',
-                'Port': 22,
-                'Username': 'root',
-                'UsePrivateKey': True,
-                'PrivateKeyPath': '/root/.ssh/server_rsa'
-            })
-        elif server_type == 'windows':
-            entry.update({
-                'ConnectionType': 'RDPConfigured',
-                'Port': 3389,
-                'Username': 'Administrator',
-                'Domain': '',
-                'UseDefaultCredentials': False,
-                'ScreenColor': '32',
-                'ScreenSize': 'FullScreen'
-            })
-        elif server_type == 'vnc':
-            port = list(server.get('ports', {}).keys())[0] if server.get('ports') else '5900'
-            entry.update({
-                'ConnectionType': 'VNC',
-                'Port': int(port),
-                'Username': '',
-                'VNCEncoding': 'Auto',
-                'ColorDepth': 'Depth32Bit'
-            })
-        
-        rdm_entries.append(entry)
-    
-    # Create RDM JSON structure
-    rdm_data = {
-        'Connections': rdm_entries,
-        'ExportVersion': '2.0',
-        'ExportDate': datetime.now().isoformat(),
-        'Source': 'Homelab Multi-Server Scanner'
-    }
-    
-    # Save to file
-    filename = f"rdm_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    filepath = os.path.join(DOWNLOADS_DIR, filename)
-    
-    with open(filepath, 'w') as f:
-        json.dump(rdm_data, f, indent=2)
-    
-    log_message(f"Exported {len(servers)} servers to RDM JSON format")
-    
-    return send_file(filepath, as_attachment=True, download_name=filename, mimetype='application/json')
+@app.route('/api/export/<format>')
+@app.route('/export/<format>')
+def api_export(format):
+    """Export download, rendered once per inventory version and revalidated by ETag
 
-def export_rdm_xml(servers):
-    """Export servers as RDM XML format"""
-    # Create root element
-    root = ET.Element('RDM')
-    root.set('Version', '2.0')
-    
-    # Create connections group
-    connections = ET.SubElement(root, 'Connections')
-    group = ET.SubElement(connections, 'Group')
-    group.set('Name', 'Homelab Servers')
-    
-    for server in servers:
-        ip = server.get('ip', server['url'].replace('https://', '').replace('http://', '').split('/')[0])
-        server_type = server.get('type', 'unknown')
-        
-        # Create connection element
-        conn = ET.SubElement(group, 'Connection')
-        conn.set('ID', str(uuid.uuid4()))
-        conn.set('Name', server.get('title', f'{server_type} - {ip}'))
-        
-        # Add common properties
-        ET.SubElement(conn, 'Host').text = ip
-        ET.SubElement(conn, 'Description').text = f"Auto-discovered {server_type} server"
-        
-        # Type-specific configurations
-        if server_type == 'idrac':
-            conn.set('Type', 'WebBrowser')
-            ET.SubElement(conn, 'Url').text = server.get('url', f'https://{ip}')
-            ET.SubElement(conn, 'Username').text = 'root'
-        elif server_type == 'proxmox':
-            conn.set('Type', 'WebBrowser')
-            ET.SubElement(conn, 'Url').text = f'https://{ip}:8006'
-            ET.SubElement(conn, 'Username').text = 'root@pam'
-        elif server_type == 'linux':
-            conn.set('Type', 'SSHShell')
-            ET.SubElement(conn, 'Port').text = '22'
-            ET.SubElement(conn, 'Username').text = 'root'
-            ET.SubElement(conn, 'UsePrivateKey').text = 'true'
-        elif server_type == 'windows':
-            conn.set('Type', 'RDPConfigured')
-            ET.SubElement(conn, 'Port').text = '3389'
-            ET.SubElement(conn, 'Username').text = 'Administrator'
-            ET.SubElement(conn, 'ScreenColor').text = '32'
-        elif server_type == 'vnc':
-            conn.set('Type', 'VNC')
-            port = list(server.get('ports', {}).keys())[0] if server.get('ports') else '5900'
-            ET.SubElement(conn, 'Port').text = port
-    
-    # Convert to string
-    xml_str = ET.tostring(root, encoding='unicode', method='xml')
-    
-    # Pretty print
-    import xml.dom.minidom
-    dom = xml.dom.minidom.parseString(xml_str)
-    pretty_xml = dom.toprettyxml(indent='  ')
-    
-    # Save to file
-    filename = f"rdm_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.rdm"
-    filepath = os.path.join(DOWNLOADS_DIR, filename)
-    
-    with open(filepath, 'w') as f:
-        f.write(pretty_xml)
-    
-    log_message(f"Exported {len(servers)} servers to RDM XML format")
-    
-    return send_file(filepath, as_attachment=True, download_name=filename, mimetype='application/xml')
+    ?since=<version or previous export file name> exports only the
+    connections added, changed or removed after that version (RDM formats);
+    when the store no longer knows it, the full export is sent
+    (X-Export-Mode says which one it is).
+    """
+    if format not in exporters.FORMATS:
+        return jsonify({'error': f'Unsupported format: {format}'}), 400
+    try:
+        since = parse_export_since([format], request.args.get('since'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        version, servers, since, removed = export_selection(since)
+        if not servers and since is None:
+            return jsonify({'error': 'No servers to export'}), 400
+        cache = get_export_cache()
+        etag = cache.etag(format, version, since)
+        headers = export_headers(etag, version, since)
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+        
+        filename = cache.filename(format, version, since)
+        mimetype = exporters.FORMATS[format][1]
+        path = cache.cached(format, version, since)
+        if path:
+            response = send_file(path, as_attachment=True, download_name=filename, mimetype=mimetype)
+            response.headers.update(headers)
+            return response
+        
+        # First export of this version: stream it while it is saved for the next request
+        headers.update({
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no'
+        })
+        return Response(cache.stream(format, version, servers, since, removed), mimetype=mimetype,
+                        headers=headers)
+    except Exception as e:
+        return jsonify({'error': f'Failed to export: {str(e)}'}), 500
 
 @app.route('/api/export/rdm/<format>')
+@app.route('/export/rdm/<format>')
 def api_export_rdm(format):
-    """API endpoint for RDM export"""
-    return export_rdm(format)
+    """RDM export download (json or rdm); see api_export()"""
+    if format not in exporters.RDM_FORMATS:
+        return jsonify({'error': f'Unsupported format: {format}'}), 400
+    return api_export(format)
+
+@app.route('/api/servers')
+@app.route('/servers')
+def api_list_servers():
+    """Query servers: ?type=&status=&q=&sort=[-]key&limit=&cursor=&fields=ip,title"""
+    args = request.args
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()]
+    try:
+        result = query_servers(
+            load_inventory(),
+            type=args.get('type') or None,
+            status=args.get('status') or None,
+            text=args.get('q') or None,
+            sort=args.get('sort', 'ip'),
+            cursor=args.get('cursor') or None,
+            limit=int(args.get('limit', 100)),
+            fields=fields or None
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
+@app.route('/api/servers/summary')
+@app.route('/servers/summary')
+def api_servers_summary():
+    """Status panel counts without any server records"""
+    return jsonify(load_inventory().summary())
+
+@app.route('/api/servers/changes')
+@app.route('/servers/changes')
+def api_server_changes():
+    """Records added, modified and removed since ?since=<version>, or a full snapshot"""
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'error': 'since must be an inventory version number'}), 400
+    return jsonify(get_store().changes_since(since))
+
+def format_event(event, data, event_id=None):
+    """Encode one Server-Sent Events message"""
+    message = f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+    return f"id: {event_id}\n{message}" if event_id is not None else message
+
+def release_stream():
+    global _open_streams
+    with _streams_lock:
+        _open_streams -= 1
+
+def event_stream(events):
+    """Serve an event stream if this worker has a free MAX_EVENT_STREAMS slot
+
+    A stream ties up a worker thread for as long as it is open, so past the
+    cap the client gets 503 with Retry-After and falls back to polling,
+    leaving the other threads to /health, jobs and the rest of the API.
+    """
+    global _open_streams
+    with _streams_lock:
+        if _open_streams >= MAX_EVENT_STREAMS:
+            return jsonify({'error': 'Too many open event streams, poll instead'}), 503, {
+                'Retry-After': str(STREAM_RETRY_AFTER)
+            }
+        _open_streams += 1
+    response = Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # stop nginx from buffering the stream
+    })
+    # Runs when the server closes the response, whether or not the stream was started
+    response.call_on_close(release_stream)
+    return response
+
+def inventory_events(since):
+    """Yield inventory change and scan progress events until the client disconnects"""
+    store = get_store()
+    version = since
+    progress = None
+    last_sent = time.monotonic()
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            if store.version() != version:
+                changes = store.changes_since(version)
+                version = changes['version']
+                yield format_event('inventory', changes, version)
+                last_sent = time.monotonic()
+            
+            scan = store.scan_progress()
+            if scan != progress:
+                progress = scan
+                yield format_event('scan', scan)
+                last_sent = time.monotonic()
+            
+            if time.monotonic() - last_sent >= EVENT_HEARTBEAT:
+                yield ': keep-alive\n\n'
+                last_sent = time.monotonic()
+            time.sleep(EVENT_POLL_INTERVAL)
+    finally:
+        # Each stream runs in its own thread with its own SQLite connection
+        store.close()
+
+@app.route('/api/events')
+@app.route('/events')
+def api_events():
+    """Server-Sent Events stream of inventory changes ('inventory') and scan progress ('scan')
+
+    Resumes from the Last-Event-ID header sent on reconnect, else from ?since=<version>.
+    """
+    try:
+        since = int(request.headers.get('Last-Event-ID') or request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'error': 'since must be an inventory version number'}), 400
+    return event_stream(inventory_events(since))
+
+@app.route('/api/servers/<ip>/availability')
+@app.route('/servers/<ip>/availability')
+def api_server_availability(ip):
+    """Uptime percentage and flap count for a server over a window (?window=7d)"""
+    window = request.args.get('window', '7d')
+    try:
+        until = int(request.args.get('until', int(time.time()) + 1))
+        summary = get_availability_log().summarize(ip, until - parse_window(window), until)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    summary['window'] = window
+    return jsonify(summary)
+
+@app.route('/api/launchers/bundle')
+@app.route('/launchers/bundle')
+def api_launcher_bundle():
+    """Stream a zip (or ?format=tar) of launchers for servers matching ?type=&status=&ips="""
+    format = request.args.get('format', 'zip')
+    if format not in ('zip', 'tar'):
+        return jsonify({'error': f'Unsupported format: {format}'}), 400
+    selector = {
+        'type': [t for t in request.args.get('type', '').split(',') if t] or None,
+        'status': request.args.get('status', 'online'),
+        'ips': [ip for ip in request.args.get('ips', '').split(',') if ip] or None
+    }
+    servers = select_fleet(selector)
+    if not servers:
+        return jsonify({'error': 'No servers match the selector'}), 404
+    filename = 'launchers.zip' if format == 'zip' else 'launchers.tar.gz'
+    return Response(launchers.stream_bundle(servers, format), headers={
+        'Content-Type': 'application/zip' if format == 'zip' else 'application/gzip',
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/servers/<ip>/liveness')
+@app.route('/servers/<ip>/liveness')
+def api_server_liveness(ip):
+    """Whether a server is reachable now, from the liveness cache or a quick TCP probe"""
+    server = load_inventory().get(ip)
+    if server is None:
+        return jsonify({'error': f'Unknown server: {ip}'}), 404
+    result = get_liveness().check(ip, server)
+    result['ip'] = ip
+    return jsonify(result)
+
+@app.route('/api/metrics')
+@app.route('/metrics')
+def api_metrics():
+    """Runtime counters for this API worker process"""
+    return jsonify({
+        'pid': os.getpid(),
+        'inventory_cache': get_inventory_cache().metrics(),
+        'liveness': get_liveness().metrics(),
+        'ssh_sessions': get_ssh_pool().metrics(),
+        'event_streams': {'open': _open_streams, 'max': MAX_EVENT_STREAMS}
+    })
+
+@app.route('/api/jobs/<job_id>')
+@app.route('/jobs/<job_id>')
+def api_job(job_id):
+    """Job status, progress and result (once finished); ?steps_since=<seq> adds step entries"""
+    store = get_job_runner().store
+    job = store.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job not found or expired: {job_id}'}), 404
+    if 'steps_since' in request.args:
+        try:
+            since = int(request.args['steps_since'])
+        except ValueError:
+            return jsonify({'error': 'steps_since must be a step number'}), 400
+        job['step_entries'] = [{'seq': seq, 'entry': entry}
+                               for seq, entry in store.steps_since(job_id, since)]
+    return jsonify(job)
+
+def job_events(job_id, since):
+    """Yield a job's steps ('step', id = step number) and progress until it finishes ('done')"""
+    store = get_job_runner().store
+    updated = None
+    last_sent = time.monotonic()
+    try:
+        yield 'retry: 2000\n\n'
+        while True:
+            job = store.get(job_id, include_result=False)
+            if job is None:
+                yield format_event('gone', {'id': job_id})
+                return
+            for seq, entry in store.steps_since(job_id, since):
+                since = seq
+                yield format_event('step', entry, seq)
+                last_sent = time.monotonic()
+            
+            finished = job['status'] not in ('queued', 'running')
+            state = (job['status'], job['progress'])
+            if finished:
+                yield format_event('done', store.get(job_id), since)
+                return
+            if state != updated:
+                updated = state
+                yield format_event('progress', job)
+                last_sent = time.monotonic()
+            
+            if time.monotonic() - last_sent >= EVENT_HEARTBEAT:
+                yield ': keep-alive\n\n'
+                last_sent = time.monotonic()
+            time.sleep(JOB_POLL_INTERVAL)
+    finally:
+        store.close()
+
+@app.route('/api/jobs/<job_id>/events')
+@app.route('/jobs/<job_id>/events')
+def api_job_events(job_id):
+    """Server-Sent Events stream of one job; resumes steps from Last-Event-ID"""
+    try:
+        since = int(request.headers.get('Last-Event-ID') or request.args.get('steps_since', 0))
+    except ValueError:
+        return jsonify({'error': 'steps_since must be a step number'}), 400
+    if get_job_runner().store.get(job_id, include_result=False) is None:
+        return jsonify({'error': f'Job not found or expired: {job_id}'}), 404
+    return event_stream(job_events(job_id, since))
 
 @app.route('/api/scan/custom', methods=['POST'])
+@app.route('/scan/custom', methods=['POST'])
 def api_scan_custom():
     """API endpoint for custom network scanning"""
     data = request.get_json()
     ranges = data.get('ranges', [])
     return scan_custom_range(ranges)
 
-if __name__ == '__main__':
-    log_message("Starting Multi-Server Container API...")
-    
-    # Ensure directories exist
+def ensure_directories():
+    """Create the data, downloads and log directories the API writes to"""
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(DOWNLOADS_DIR, exist_ok=True)
     os.makedirs(LOGS_DIR, exist_ok=True)
-    
-    # Run Flask app
+
+if __name__ == '__main__':
+    # Development server; the container runs the API under gunicorn (see wsgi.py)
+    log_message("Starting Multi-Server Container API (development server)...")
+    ensure_directories()
     app.run(host='0.0.0.0', port=8765, debug=False)
\ No newline at end of file
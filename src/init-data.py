@@ -4,8 +4,8 @@ Initialize data files for the multi-server scanner
 """
 
 import os
-import json
-from datetime import datetime, timezone
+from inventory_store import InventoryStore
+from snapshot_writer import write_snapshot
 
 DATA_DIR = '/app/www/data'
 
@@ -22,8 +22,7 @@ def create_initial_data():
             'scan_count': 0,
             'server_types': ['idrac', 'proxmox', 'linux', 'windows', 'vnc']
         }
-        with open(servers_file, 'w') as f:
-            json.dump(initial_data, f, indent=2)
+        write_snapshot(servers_file, initial_data)
         print(f"Created initial {servers_file}")
     
     # Also create legacy file for compatibility
@@ -34,9 +33,12 @@ def create_initial_data():
             'last_scan': '',
             'scan_count': 0
         }
-        with open(legacy_file, 'w') as f:
-            json.dump(legacy_data, f, indent=2)
+        write_snapshot(legacy_file, legacy_data)
         print(f"Created legacy {legacy_file}")
+    
+    # Create the inventory database, importing any existing JSON data
+    store = InventoryStore(data_dir=DATA_DIR)
+    print(f"Inventory database ready at {store.path} (version {store.version()})")
 
 if __name__ == '__main__':
     create_initial_data()
\ No newline at end of file
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Inventory Model
+Compact server records with maintained lookups by IP, URL, type and status
+"""
+
+import json
+import base64
+import bisect
+import ipaddress
+
+RECORD_FIELDS = ('ip', 'url', 'type', 'title', 'status', 'services', 'ports',
+                 'first_discovered', 'last_seen', 'credentials')
+
+
+def extract_ip(url):
+    """Return the host part of a server URL (https://ip, vnc://ip:port, ssh://user@ip)"""
+    host = url.split('//', 1)[-1].split('/', 1)[0].split('@')[-1]
+    return host.split(':')[0]
+
+
+def server_ip(server):
+    """Return the IP of a server record dict, deriving it from the URL if needed"""
+    return server.get('ip') or extract_ip(server['url'])
+
+
+class ServerRecord:
+    """One discovered server; unknown keys from older data are kept in extra"""
+
+    __slots__ = RECORD_FIELDS + ('extra',)
+
+    def __init__(self, ip, url=None, type='unknown', title=None, status='offline',
+                 services=None, ports=None, first_discovered=None, last_seen=None,
+                 credentials=None, extra=None):
+        self.ip = ip
+        self.url = url or f"http://{ip}"
+        self.type = type
+        self.title = title or 'Unknown Server'
+        self.status = status
+        self.services = services if services is not None else []
+        self.ports = ports if ports is not None else {}
+        self.first_discovered = first_discovered
+        self.last_seen = last_seen
+        self.credentials = credentials if credentials is not None else {}
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from the discovered_servers.json layout"""
+        fields = {key: data[key] for key in RECORD_FIELDS if key in data}
+        fields['ip'] = server_ip(data)
+        extra = {key: value for key, value in data.items() if key not in RECORD_FIELDS}
+        return cls(extra=extra or None, **fields)
+
+    def to_dict(self):
+        """Return the record in the discovered_servers.json layout"""
+        data = {key: getattr(self, key) for key in RECORD_FIELDS
+                if getattr(self, key) is not None}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @property
+    def is_online(self):
+        return self.status == 'online'
+
+    def __repr__(self):
+        return f"ServerRecord({self.ip!r}, type={self.type!r}, status={self.status!r})"
+
+
+class Inventory:
+    """Server records indexed by IP, URL, type and status
+
+    Records must be changed through update() (or re-added) so the secondary
+    indexes stay in step with their url/type/status attributes.
+    """
+
+    INDEXED = ('url', 'type', 'status')
+
+    def __init__(self, records=(), last_scan='', scan_count=0, server_types=None, version=0):
+        self.version = version
+        self.last_scan = last_scan
+        self.scan_count = scan_count
+        self.server_types = server_types or []
+        self._by_ip = {}
+        self._by_url = {}
+        self._by_type = {}
+        self._by_status = {}
+        for record in records:
+            self.add(record)
+
+    @classmethod
+    def from_document(cls, document):
+        """Build an inventory from the discovered_servers.json document layout"""
+        return cls(
+            (ServerRecord.from_dict(server) for server in document.get('servers', [])),
+            last_scan=document.get('last_scan', ''),
+            scan_count=document.get('scan_count', 0),
+            server_types=document.get('server_types'),
+            version=document.get('version', 0)
+        )
+
+    def to_document(self):
+        """Return the inventory in the discovered_servers.json document layout"""
+        return {
+            'servers': [record.to_dict() for record in self._by_ip.values()],
+            'last_scan': self.last_scan,
+            'scan_count': self.scan_count,
+            'server_types': self.server_types
+        }
+
+    # Index maintenance
+
+    def _index(self, record):
+        self._by_url[record.url] = record
+        self._by_type.setdefault(record.type, {})[record.ip] = record
+        self._by_status.setdefault(record.status, {})[record.ip] = record
+
+    def _unindex(self, record):
+        if self._by_url.get(record.url) is record:
+            del self._by_url[record.url]
+        for index, key in ((self._by_type, record.type), (self._by_status, record.status)):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(record.ip, None)
+                if not bucket:
+                    del index[key]
+
+    def add(self, record):
+        """Insert a record, replacing any existing record with the same IP"""
+        existing = self._by_ip.get(record.ip)
+        if existing is not None:
+            self._unindex(existing)
+        self._by_ip[record.ip] = record
+        self._index(record)
+        return record
+
+    def update(self, ip, **changes):
+        """Change attributes of the record for ip, keeping the indexes current"""
+        record = self._by_ip[ip]
+        reindex = any(key in self.INDEXED for key in changes)
+        if reindex:
+            self._unindex(record)
+        for key, value in changes.items():
+            setattr(record, key, value)
+        if reindex:
+            self._index(record)
+        return record
+
+    def remove(self, ip):
+        """Remove and return the record for ip, or None"""
+        record = self._by_ip.pop(ip, None)
+        if record is not None:
+            self._unindex(record)
+        return record
+
+    def remove_by_url(self, url):
+        """Remove and return the record with the given URL, or None"""
+        record = self._by_url.get(url)
+        return self.remove(record.ip) if record is not None else None
+
+    def merge_scan(self, discovered_servers, scanned_at, credentials_by_type=None, skip=()):
+        """Apply one scan's results: refresh discovered hosts, mark the rest offline
+
+        IPs in skip (e.g. removed while the scan was running) are not re-added.
+        """
+        credentials_by_type = credentials_by_type or {}
+        discovered_by_ip = {server['ip']: server for server in discovered_servers}
+
+        # Update existing servers
+        for record in self:
+            discovered = discovered_by_ip.get(record.ip)
+            if discovered:
+                self.update(
+                    record.ip,
+                    status='online',
+                    last_seen=scanned_at,
+                    services=discovered.get('services', []),
+                    ports=discovered.get('ports', {}),
+                    type=discovered.get('type', record.type)
+                )
+            else:
+                self.update(record.ip, status='offline')
+
+        # Add new servers
+        for ip, discovered in discovered_by_ip.items():
+            if ip not in self and ip not in skip:
+                self.add(ServerRecord(
+                    ip=ip,
+                    url=discovered['url'],
+                    type=discovered['type'],
+                    title=discovered['title'],
+                    services=discovered.get('services', []),
+                    ports=discovered.get('ports', {}),
+                    first_discovered=scanned_at,
+                    last_seen=scanned_at,
+                    status='online',
+                    credentials=credentials_by_type.get(discovered['type'], {})
+                ))
+
+        # Update scan metadata
+        self.last_scan = scanned_at
+        self.scan_count += 1
+        return self
+
+    # Lookups
+
+    def get(self, ip):
+        return self._by_ip.get(ip)
+
+    def by_url(self, url):
+        return self._by_url.get(url)
+
+    def select(self, type=None, status=None):
+        """Return records matching the given type and/or status"""
+        if type is None and status is None:
+            return list(self._by_ip.values())
+        if type is None:
+            return list(self._by_status.get(status, {}).values())
+        of_type = self._by_type.get(type, {})
+        if status is None:
+            return list(of_type.values())
+        with_status = self._by_status.get(status, {})
+        smaller, other = sorted((of_type, with_status), key=len)
+        return [record for ip, record in smaller.items() if ip in other]
+
+    def count(self, type=None, status=None):
+        """Return the number of records matching type and/or status"""
+        if type is None and status is None:
+            return len(self._by_ip)
+        if type is None:
+            return len(self._by_status.get(status, {}))
+        if status is None:
+            return len(self._by_type.get(type, {}))
+        return len(self.select(type, status))
+
+    def type_counts(self):
+        """Return {type: count} for every type present"""
+        return {server_type: len(records) for server_type, records in self._by_type.items()}
+
+    def summary(self):
+        """Return the counts shown in the dashboard status panel"""
+        return {
+            'total': len(self),
+            'online': self.count(status='online'),
+            'by_type': self.type_counts(),
+            'by_status': {status: len(records) for status, records in self._by_status.items()},
+            'last_scan': self.last_scan,
+            'scan_count': self.scan_count,
+            'version': self.version
+        }
+
+    def __len__(self):
+        return len(self._by_ip)
+
+    def __iter__(self):
+        return iter(list(self._by_ip.values()))
+
+    def __contains__(self, ip):
+        return ip in self._by_ip
+
+
+# Querying
+
+SORT_KEYS = {
+    'ip': lambda record: 0,
+    'title': lambda record: (record.title or '').lower(),
+    'type': lambda record: record.type,
+    'status': lambda record: record.status,
+    'last_seen': lambda record: record.last_seen or '',
+    'first_discovered': lambda record: record.first_discovered or ''
+}
+MAX_PAGE_SIZE = 1000
+
+
+def ip_sort_key(ip):
+    """Sort IPs numerically, with unparseable values last"""
+    try:
+        address = ipaddress.ip_address(ip)
+        return (address.version, int(address))
+    except ValueError:
+        return (9, ip)
+
+
+def encode_cursor(key):
+    """Encode a sort key as an opaque, URL-safe cursor"""
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor()"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return (key[0], tuple(key[1]))
+    except (ValueError, TypeError, IndexError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def matches_text(record, text):
+    """Case-insensitive substring match over ip, title, url, type and services"""
+    haystack = ' '.join([record.ip, record.title or '', record.url, record.type] +
+                        [str(service.get('type', '')) for service in record.services])
+    return text in haystack.lower()
+
+
+def query_servers(inventory, type=None, status=None, text=None, sort='ip', cursor=None,
+                  limit=100, fields=None):
+    """Filter, sort and page through an inventory using keyset cursors
+
+    sort is a SORT_KEYS name, prefixed with '-' for descending order. The
+    returned next_cursor resumes after the last record of the page, so pages
+    stay stable while records are added or removed.
+    """
+    descending = sort.startswith('-')
+    sort_name = sort.lstrip('-')
+    if sort_name not in SORT_KEYS:
+        raise ValueError(f"Invalid sort key: {sort_name} (expected one of {', '.join(SORT_KEYS)})")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    records = inventory.select(type=type, status=status)
+    if text:
+        text = text.lower()
+        records = [record for record in records if matches_text(record, text)]
+
+    key_of = SORT_KEYS[sort_name]
+    keyed = sorted((((key_of(record), ip_sort_key(record.ip)), record) for record in records),
+                   key=lambda item: item[0])
+    keys = [key for key, _ in keyed]
+    after = decode_cursor(cursor) if cursor else None
+
+    try:
+        if descending:
+            end = bisect.bisect_left(keys, after) if after is not None else len(keyed)
+            page = keyed[max(0, end - limit):end][::-1]
+            has_more = end - limit > 0
+        else:
+            start = bisect.bisect_right(keys, after) if after is not None else 0
+            page = keyed[start:start + limit]
+            has_more = start + limit < len(keyed)
+    except TypeError:
+        raise ValueError(f"Cursor does not match sort key {sort_name}")
+
+    next_cursor = encode_cursor(page[-1][0]) if has_more and page else None
+
+    servers = [record.to_dict() for _, record in page]
+    if fields:
+        servers = [{key: server[key] for key in fields if key in server} for server in servers]
+
+    return {
+        'servers': servers,
+        'total': len(keyed),
+        'next_cursor': next_cursor,
+        'version': inventory.version
+    }
@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+"""
+Inventory Store
+SQLite-backed server inventory shared by the network scanner and the API
+"""
+
+import os
+import json
+import sqlite3
+import time
+import threading
+from contextlib import contextmanager
+from inventory import Inventory, server_ip
+from snapshot_writer import write_snapshot
+from search_index import build_search_index
+
+# Configuration
+DATA_DIR = '/app/www/data'
+DB_FILE = os.environ.get('INVENTORY_DB', '/app/data/inventory.db')
+SERVERS_FILE = os.path.join(DATA_DIR, 'discovered_servers.json')
+LEGACY_FILE = os.path.join(DATA_DIR, 'discovered_idracs.json')
+SEARCH_INDEX_FILE = os.path.join(DATA_DIR, 'search_index.json')
+DEFAULT_SERVER_TYPES = ['idrac', 'proxmox', 'linux', 'windows', 'vnc']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS servers (
+    ip TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    type TEXT NOT NULL DEFAULT 'unknown',
+    status TEXT NOT NULL DEFAULT 'offline',
+    last_seen TEXT,
+    record TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    created_version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_servers_type ON servers(type);
+CREATE INDEX IF NOT EXISTS idx_servers_status ON servers(status);
+CREATE INDEX IF NOT EXISTS idx_servers_url ON servers(url);
+CREATE INDEX IF NOT EXISTS idx_servers_version ON servers(version);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS tombstones (
+    ip TEXT PRIMARY KEY,
+    url TEXT,
+    removed_at REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_tombstones_version ON tombstones(version);
+CREATE TABLE IF NOT EXISTS mutations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL,
+    applied_version INTEGER,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_mutations_pending ON mutations(applied_version);
+'''
+MUTATION_HISTORY = 1000
+TOMBSTONE_RETENTION = 30 * 86400  # removals older than this can no longer be sent as deltas
+# Refreshed for every online host on every scan; on its own not a change for delta sync
+VOLATILE_FIELDS = ('last_seen',)
+# A file modified this recently may change again without its mtime moving
+RACY_WINDOW = 1.0
+
+
+class InventoryStore:
+    """Data-access layer for the server inventory database"""
+
+    def __init__(self, path=None, data_dir=None):
+        self.path = path or DB_FILE
+        self.data_dir = data_dir or DATA_DIR
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._connect().executescript(SCHEMA)
+        self._import_legacy_snapshot()
+
+    def _connect(self):
+        """Return the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=10000')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def snapshot(self):
+        """Run several reads against one consistent view of the database"""
+        conn = self._connect()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute('BEGIN')
+        try:
+            yield conn
+        finally:
+            conn.execute('COMMIT')
+
+    @contextmanager
+    def transaction(self):
+        """Run a block inside an immediate (write-locked) transaction"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def close(self):
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Metadata
+
+    def _get_meta(self, conn, key, default=None):
+        row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row['value']) if row else default
+
+    def _set_meta(self, conn, key, value):
+        conn.execute(
+            'INSERT INTO meta (key, value) VALUES (?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            (key, json.dumps(value))
+        )
+
+    def _next_version(self, conn):
+        """Return the version rows changed by the current transaction are stamped with"""
+        return self._get_meta(conn, 'version', 0) + 1
+
+    def version(self):
+        """Return the inventory version, incremented on every change"""
+        return self._get_meta(self._connect(), 'version', 0)
+
+    def metadata(self):
+        """Return scan metadata (last_scan, scan_count, server_types)"""
+        conn = self._connect()
+        return {
+            'last_scan': self._get_meta(conn, 'last_scan', ''),
+            'scan_count': self._get_meta(conn, 'scan_count', 0),
+            'server_types': self._get_meta(conn, 'server_types', DEFAULT_SERVER_TYPES)
+        }
+
+    def set_scan_progress(self, progress):
+        """Publish the running scan's progress; does not change the inventory version"""
+        with self.transaction() as conn:
+            self._set_meta(conn, 'scan_progress', progress)
+
+    def scan_progress(self):
+        """Return the last published scan progress, or None"""
+        return self._get_meta(self._connect(), 'scan_progress')
+
+    # Queries
+
+    def get_server(self, ip):
+        """Return the server record for an IP, or None"""
+        row = self._connect().execute(
+            'SELECT record FROM servers WHERE ip = ?', (ip,)
+        ).fetchone()
+        return json.loads(row['record']) if row else None
+
+    def find_by_url(self, url):
+        """Return the server record for a URL, or None"""
+        row = self._connect().execute(
+            'SELECT record FROM servers WHERE url = ?', (url,)
+        ).fetchone()
+        return json.loads(row['record']) if row else None
+
+    def list_servers(self, server_type=None, status=None):
+        """Return server records, optionally filtered by type and status"""
+        clauses, args = [], []
+        if server_type:
+            clauses.append('type = ?')
+            args.append(server_type)
+        if status:
+            clauses.append('status = ?')
+            args.append(status)
+        sql = 'SELECT record FROM servers'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY rowid'
+        return [json.loads(row['record']) for row in self._connect().execute(sql, args)]
+
+    def load_document(self):
+        """Return the inventory in the discovered_servers.json document layout"""
+        with self.snapshot():
+            document = {'servers': self.list_servers(), 'version': self.version()}
+            document.update(self.metadata())
+        return document
+
+    def load_inventory(self):
+        """Return the inventory as an indexed in-memory Inventory"""
+        return Inventory.from_document(self.load_document())
+
+    # Mutations
+
+    def _upsert(self, conn, server, version):
+        """Insert or update a row, stamping it with version if its content changed
+
+        Returns True if the stored record changed at all. A change confined to
+        VOLATILE_FIELDS rewrites the record but keeps the row's version, so it
+        does not appear in changes_since().
+        """
+        record = json.dumps(server, sort_keys=True)
+        ip = server_ip(server)
+        existing = conn.execute(
+            'SELECT record, version, created_version FROM servers WHERE ip = ?', (ip,)
+        ).fetchone()
+        if existing and existing['record'] == record:
+            return False
+        if existing is None:
+            row_version = created_version = version
+        else:
+            created_version = existing['created_version']
+            previous = json.loads(existing['record'])
+            material = any(previous.get(key) != server.get(key)
+                           for key in set(previous) | set(server) if key not in VOLATILE_FIELDS)
+            row_version = version if material else existing['version']
+        conn.execute(
+            'INSERT INTO servers (ip, url, type, status, last_seen, record, version, created_version) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT(ip) DO UPDATE SET url = excluded.url, type = excluded.type, '
+            'status = excluded.status, last_seen = excluded.last_seen, record = excluded.record, '
+            'version = excluded.version',
+            (ip, server.get('url', f"http://{ip}"), server.get('type', 'unknown'),
+             server.get('status', 'offline'), server.get('last_seen'), record,
+             row_version, created_version)
+        )
+        return True
+
+    def save_document(self, data):
+        """Persist a full inventory document, touching only rows that changed"""
+        changed = False
+        with self.transaction() as conn:
+            version = self._next_version(conn)
+            keep = set()
+            for server in data.get('servers', []):
+                keep.add(server_ip(server))
+                changed |= self._upsert(conn, server, version)
+
+            for row in conn.execute('SELECT ip FROM servers').fetchall():
+                if row['ip'] not in keep:
+                    changed |= self._delete(conn, 'ip', row['ip'], version)
+
+            for key in ('last_scan', 'scan_count', 'server_types'):
+                if key in data and self._get_meta(conn, key) != data[key]:
+                    self._set_meta(conn, key, data[key])
+                    changed = True
+
+            if changed:
+                self._set_meta(conn, 'version', version)
+        return changed
+
+    def _delete(self, conn, where, value, version):
+        rows = conn.execute(f'SELECT ip, url FROM servers WHERE {where} = ?', (value,)).fetchall()
+        for row in rows:
+            conn.execute('DELETE FROM servers WHERE ip = ?', (row['ip'],))
+            conn.execute(
+                'INSERT OR REPLACE INTO tombstones (ip, url, removed_at, version) '
+                'VALUES (?, ?, ?, ?)',
+                (row['ip'], row['url'], time.time(), version)
+            )
+        return len(rows) > 0
+
+    def remove_by_url(self, url):
+        """Remove the server with the given URL, returning True if one was removed"""
+        with self.transaction() as conn:
+            version = self._next_version(conn)
+            removed = self._delete(conn, 'url', url, version)
+            if removed:
+                self._set_meta(conn, 'version', version)
+        return removed
+
+    # Mutation journal
+
+    def append_mutation(self, op, payload):
+        """Append a pending mutation to the journal and return its id"""
+        with self.transaction() as conn:
+            return conn.execute(
+                'INSERT INTO mutations (op, payload, created) VALUES (?, ?, ?)',
+                (op, json.dumps(payload), time.time())
+            ).lastrowid
+
+    def mutation_status(self, mutation_id):
+        """Return (applied_version, result) for a mutation; version is None while pending"""
+        row = self._connect().execute(
+            'SELECT applied_version, result FROM mutations WHERE id = ?', (mutation_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(mutation_id)
+        return row['applied_version'], json.loads(row['result']) if row['result'] else None
+
+    def apply_pending(self):
+        """Apply every pending mutation as one atomic batch
+
+        Returns (version, applied ids); the version is bumped once per batch.
+        """
+        with self.transaction() as conn:
+            pending = conn.execute(
+                'SELECT id, op, payload FROM mutations WHERE applied_version IS NULL ORDER BY id'
+            ).fetchall()
+            if not pending:
+                return self._get_meta(conn, 'version', 0), []
+
+            next_version = self._next_version(conn)
+            results = []
+            changed = False
+            for row in pending:
+                handler = getattr(self, f"_apply_{row['op']}", None)
+                if handler is None:
+                    result = {'error': f"Unknown mutation: {row['op']}"}
+                else:
+                    result = handler(conn, json.loads(row['payload']), next_version)
+                changed |= bool(result.get('changed'))
+                results.append((row['id'], result))
+
+            if changed:
+                self._set_meta(conn, 'version', next_version)
+                self._prune_tombstones(conn)
+            version = self._get_meta(conn, 'version', 0)
+            conn.executemany(
+                'UPDATE mutations SET applied_version = ?, result = ? WHERE id = ?',
+                [(version, json.dumps(result), mutation_id) for mutation_id, result in results]
+            )
+            conn.execute(
+                'DELETE FROM mutations WHERE applied_version IS NOT NULL AND id <= ?',
+                (pending[-1]['id'] - MUTATION_HISTORY,)
+            )
+        return version, [mutation_id for mutation_id, _ in results]
+
+    def _apply_remove(self, conn, payload, version):
+        removed = self._delete(conn, 'url', payload['url'], version)
+        return {'changed': removed, 'removed': removed}
+
+    def _apply_update(self, conn, payload, version):
+        row = conn.execute('SELECT record FROM servers WHERE ip = ?', (payload['ip'],)).fetchone()
+        if row is None:
+            return {'changed': False, 'found': False}
+        server = json.loads(row['record'])
+        server.update(payload['fields'])
+        return {'changed': self._upsert(conn, server, version), 'found': True}
+
+    def _apply_merge_scan(self, conn, payload, version):
+        records = [json.loads(row['record'])
+                   for row in conn.execute('SELECT record FROM servers ORDER BY rowid')]
+        inventory = Inventory.from_document({
+            'servers': records,
+            'scan_count': self._get_meta(conn, 'scan_count', 0)
+        })
+        # Hosts removed while this scan was running stay removed
+        skip = {row['ip'] for row in conn.execute(
+            'SELECT ip FROM tombstones WHERE removed_at >= ?', (payload['started_at'],)
+        )}
+        inventory.merge_scan(payload['discovered'], payload['scanned_at'],
+                             payload.get('credentials_by_type'), skip)
+
+        changed = False
+        for record in inventory:
+            changed |= self._upsert(conn, record.to_dict(), version)
+        meta = {'last_scan': inventory.last_scan, 'scan_count': inventory.scan_count,
+                'server_types': payload.get('server_types', DEFAULT_SERVER_TYPES)}
+        for key, value in meta.items():
+            if self._get_meta(conn, key) != value:
+                self._set_meta(conn, key, value)
+                changed = True
+        return {'changed': changed, 'servers': len(inventory), 'skipped': sorted(skip)}
+
+    # Delta sync
+
+    def _prune_tombstones(self, conn):
+        """Drop expired tombstones, remembering the newest version that was dropped"""
+        cutoff = time.time() - TOMBSTONE_RETENTION
+        row = conn.execute(
+            'SELECT MAX(version) AS version FROM tombstones WHERE removed_at < ?', (cutoff,)
+        ).fetchone()
+        if row['version'] is not None:
+            conn.execute('DELETE FROM tombstones WHERE removed_at < ?', (cutoff,))
+            horizon = max(self._get_meta(conn, 'changes_horizon', 0), row['version'])
+            self._set_meta(conn, 'changes_horizon', horizon)
+
+    def changes_since(self, since):
+        """Return the records added, modified and removed after version since
+
+        Falls back to the full document (with 'full': True) when since is
+        unknown, older than the retained removal history, or when the delta
+        would be larger than half the inventory.
+        """
+        with self.snapshot() as conn:
+            version = self._get_meta(conn, 'version', 0)
+            horizon = self._get_meta(conn, 'changes_horizon', 0)
+            result = {'since': since, 'version': version}
+            result.update(self.metadata())
+
+            if 0 < since <= version and since >= horizon:
+                rows = conn.execute(
+                    'SELECT record, created_version FROM servers WHERE version > ? ORDER BY rowid',
+                    (since,)
+                ).fetchall()
+                total = conn.execute('SELECT COUNT(*) FROM servers').fetchone()[0]
+                if len(rows) <= max(1, total // 2):
+                    removed = conn.execute(
+                        'SELECT ip, url FROM tombstones WHERE version > ? '
+                        'AND ip NOT IN (SELECT ip FROM servers) ORDER BY version',
+                        (since,)
+                    ).fetchall()
+                    result.update({
+                        'full': False,
+                        'added': [json.loads(row['record']) for row in rows
+                                  if row['created_version'] > since],
+                        'modified': [json.loads(row['record']) for row in rows
+                                     if row['created_version'] <= since],
+                        'removed': [{'ip': row['ip'], 'url': row['url']} for row in removed]
+                    })
+                    return result
+
+            result.update({'full': True, 'servers': self.list_servers()})
+            return result
+
+    # JSON snapshots
+
+    def _import_legacy_snapshot(self):
+        """Seed an empty database from the existing JSON files"""
+        with self.transaction() as conn:
+            if self._get_meta(conn, 'initialized'):
+                return
+            self._set_meta(conn, 'initialized', True)
+
+        for path in (os.path.join(self.data_dir, os.path.basename(SERVERS_FILE)),
+                     os.path.join(self.data_dir, os.path.basename(LEGACY_FILE))):
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r') as f:
+                        self.save_document(json.load(f))
+                except (OSError, ValueError, KeyError):
+                    continue
+                # The JSON files already reflect this data
+                with self.transaction() as conn:
+                    self._set_meta(conn, 'exported_version', self._get_meta(conn, 'version', 0))
+                return
+
+    def export_snapshots(self, force=False):
+        """Publish the JSON snapshot files if the inventory changed since the last export"""
+        if not force and self._get_meta(self._connect(), 'exported_version') == self.version():
+            return False
+
+        document = self.load_document()
+        version = document['version']
+        changed = write_snapshot(os.path.join(self.data_dir, os.path.basename(SERVERS_FILE)),
+                                 document)
+
+        # Also maintain backward compatibility with old file
+        idrac_only = {
+            'servers': [s for s in document['servers'] if s.get('type') == 'idrac'],
+            'last_scan': document['last_scan'],
+            'scan_count': document['scan_count']
+        }
+        changed |= write_snapshot(os.path.join(self.data_dir, os.path.basename(LEGACY_FILE)),
+                                  idrac_only)
+        changed |= write_snapshot(os.path.join(self.data_dir, os.path.basename(SEARCH_INDEX_FILE)),
+                                  build_search_index(document['servers'], version))
+
+        with self.transaction() as conn:
+            self._set_meta(conn, 'exported_version', version)
+        return changed
+
+
+class InventoryCache:
+    """In-process Inventory for one store, rebuilt only when the database changes
+
+    Each lookup stats the database and its WAL file; while neither has
+    changed, the cached Inventory is returned without touching SQLite. A
+    change is confirmed against the inventory version before reloading, so
+    checkpoints and scan-progress writes do not cost a reload. Every caller
+    shares the returned Inventory, so treat it as read-only.
+    """
+
+    def __init__(self, store, racy_window=RACY_WINDOW):
+        self.store = store
+        self.racy_window = racy_window
+        self._lock = threading.Lock()
+        self._inventory = None
+        self._signature = None
+        self._checked = 0.0
+        self._stats = {'hits': 0, 'revalidations': 0, 'reloads': 0, 'reload_seconds': 0.0}
+
+    def _stat(self):
+        """(inode, mtime, size) of the database and its WAL, None where missing"""
+        signature = []
+        for path in (self.store.path, self.store.path + '-wal'):
+            try:
+                st = os.stat(path)
+            except OSError:
+                signature.append(None)
+                continue
+            signature.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def _fresh(self, signature):
+        """True if signature matches the cached one and was not taken in the racy window"""
+        if self._inventory is None or signature != self._signature:
+            return False
+        newest = max((entry[1] for entry in signature if entry), default=0) / 1e9
+        return newest < self._checked - self.racy_window
+
+    def get(self):
+        """Return the current Inventory, reloading it only if the database changed"""
+        signature = self._stat()
+        with self._lock:
+            if self._fresh(signature):
+                self._stats['hits'] += 1
+                return self._inventory
+            # One thread reloads while the others wait for its result
+            checked = time.time()
+            if self._inventory is not None and self.store.version() == self._inventory.version:
+                self._stats['revalidations'] += 1
+            else:
+                started = time.monotonic()
+                self._inventory = self.store.load_inventory()
+                self._stats['reloads'] += 1
+                self._stats['reload_seconds'] += time.monotonic() - started
+            self._signature, self._checked = signature, checked
+            return self._inventory
+
+    def invalidate(self):
+        """Force the next get() to reload"""
+        with self._lock:
+            self._inventory = None
+
+    def metrics(self):
+        """Hit, revalidation and reload counts plus the cached version and size"""
+        with self._lock:
+            stats = dict(self._stats)
+            inventory = self._inventory
+        lookups = stats['hits'] + stats['revalidations'] + stats['reloads']
+        stats['hit_rate'] = round((lookups - stats['reloads']) / lookups, 4) if lookups else 0.0
+        stats['reload_seconds'] = round(stats['reload_seconds'], 3)
+        stats['version'] = inventory.version if inventory is not None else None
+        stats['servers'] = len(inventory) if inventory is not None else 0
+        return stats
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Jobs
+Background jobs for long-running API commands, with progress kept in SQLite
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import weakref
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Configuration
+DB_FILE = os.environ.get('JOBS_DB', '/app/data/jobs.db')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '4'))   # jobs running at once per API process
+JOB_TTL = 3600                          # seconds a finished job stays readable
+RESULT_MAX_BYTES = 1024 * 1024          # larger results are dropped (the job keeps its status)
+STORE_MAX_BYTES = 32 * 1024 * 1024      # total stored results; the oldest finished go first
+MAX_STEPS = 10000                       # counted step entries (e.g. per-host results) kept per job
+MAX_OUTPUT_STEPS = 10000                # uncounted step entries (e.g. output chunks) kept per job
+DRAIN_INTERVAL = 1.0                    # seconds between checks while waiting for jobs to finish
+
+ACTIVE = ('queued', 'running')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    command TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    updated REAL NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    total INTEGER,
+    message TEXT,
+    steps INTEGER NOT NULL DEFAULT 0,
+    output_steps INTEGER NOT NULL DEFAULT 0,
+    dropped_steps INTEGER NOT NULL DEFAULT 0,
+    dropped_output INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    result_size INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs(finished);
+CREATE TABLE IF NOT EXISTS job_steps (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+'''
+
+
+_runners = weakref.WeakSet()   # every JobRunner in this process, for drain()
+
+
+def encode_result(result):
+    """JSON text stored for a job's result (None for no result); raises TypeError if not serializable"""
+    return json.dumps(result) if result is not None else None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobStore:
+    """Job records, progress and per-step entries, shared by every API worker process"""
+
+    def __init__(self, path=None, ttl=JOB_TTL, result_max_bytes=RESULT_MAX_BYTES,
+                 store_max_bytes=STORE_MAX_BYTES):
+        self.path = path or DB_FILE
+        self.ttl = ttl
+        self.result_max_bytes = result_max_bytes
+        self.store_max_bytes = store_max_bytes
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        """Return the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=10000')
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Writers (called by the process running the job)
+
+    def create(self, command, params=None):
+        """Record a queued job owned by this process; returns its id"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            'INSERT INTO jobs (id, command, params, status, pid, created, updated) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (job_id, command, json.dumps(params or {}), 'queued', os.getpid(), now, now)
+        )
+        return job_id
+
+    def start(self, job_id):
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET status = 'running', started = ?, updated = ? WHERE id = ?",
+            (now, now, job_id)
+        )
+
+    def progress(self, job_id, done=None, total=None, message=None):
+        """Update whichever of done/total/message are given"""
+        self._connect().execute(
+            'UPDATE jobs SET done = COALESCE(?, done), total = COALESCE(?, total), '
+            'message = COALESCE(?, message), updated = ? WHERE id = ?',
+            (done, total, message, time.time(), job_id)
+        )
+
+    def add_step(self, job_id, entry, counts=True):
+        """Append a step entry (e.g. one host's result); returns its seq, or None if dropped
+
+        The step advances done unless counts is false (e.g. a chunk of output).
+        Counted and uncounted steps are capped separately (MAX_STEPS,
+        MAX_OUTPUT_STEPS), so chatty output cannot crowd out results; steps
+        over a cap are dropped and counted in the job's dropped_steps.
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT steps, output_steps FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            stored = row['steps'] - row['output_steps']
+            if (stored if counts else row['output_steps']) >= (MAX_STEPS if counts else MAX_OUTPUT_STEPS):
+                seq = None
+                column = 'dropped_steps' if counts else 'dropped_output'
+                conn.execute(f'UPDATE jobs SET {column} = {column} + 1, done = done + ?, updated = ? '
+                             'WHERE id = ?', (1 if counts else 0, time.time(), job_id))
+            else:
+                seq = row['steps'] + 1
+                conn.execute('INSERT INTO job_steps (job_id, seq, entry) VALUES (?, ?, ?)',
+                             (job_id, seq, json.dumps(entry)))
+                conn.execute('UPDATE jobs SET steps = ?, output_steps = output_steps + ?, '
+                             'done = done + ?, updated = ? WHERE id = ?',
+                             (seq, 0 if counts else 1, 1 if counts else 0, time.time(), job_id))
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return seq
+
+    def finish(self, job_id, payload=None):
+        """Mark a job succeeded with its result, already encoded by encode_result()"""
+        size = len(payload) if payload else 0
+        message = None
+        if size > self.result_max_bytes:
+            payload, message = None, f"Result dropped: {size} bytes exceeds {self.result_max_bytes}"
+            size = 0
+        self._finish(job_id, 'succeeded', payload, size, None, message)
+
+    def fail(self, job_id, error):
+        """Mark a job failed with error"""
+        self._finish(job_id, 'failed', None, 0, error, None)
+
+    def _finish(self, job_id, status, payload, size, error, message):
+        now = time.time()
+        self._connect().execute(
+            'UPDATE jobs SET status = ?, finished = ?, updated = ?, result = ?, result_size = ?, '
+            'error = ?, message = COALESCE(?, message) WHERE id = ?',
+            (status, now, now, payload, size, error, message, job_id)
+        )
+
+    def prune(self):
+        """Delete finished jobs past their TTL, then the oldest until results fit the size bound"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            expired = [row['id'] for row in conn.execute(
+                'SELECT id FROM jobs WHERE finished IS NOT NULL AND finished < ?',
+                (time.time() - self.ttl,))]
+            total = conn.execute(
+                'SELECT COALESCE(SUM(result_size), 0) FROM jobs WHERE finished IS NOT NULL').fetchone()[0]
+            if total > self.store_max_bytes:
+                for row in conn.execute('SELECT id, result_size FROM jobs '
+                                        'WHERE finished IS NOT NULL ORDER BY finished'):
+                    if total <= self.store_max_bytes:
+                        break
+                    if row['id'] not in expired:
+                        expired.append(row['id'])
+                        total -= row['result_size']
+            for job_id in expired:
+                conn.execute('DELETE FROM job_steps WHERE job_id = ?', (job_id,))
+                conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return len(expired)
+
+    # Readers (any process)
+
+    def get(self, job_id, include_result=True):
+        """Return a job as a dict, or None if it is unknown or has expired"""
+        conn = self._connect()
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        if row['status'] in ACTIVE and row['pid'] != os.getpid() and not _pid_alive(row['pid']):
+            self.fail(job_id, 'The API worker running this job exited')
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        job = {
+            'id': row['id'],
+            'command': row['command'],
+            'params': json.loads(row['params']),
+            'status': row['status'],
+            'created': row['created'],
+            'started': row['started'],
+            'finished': row['finished'],
+            'progress': {'done': row['done'], 'total': row['total'], 'message': row['message']},
+            'steps': row['steps'],
+            'dropped_steps': {'counted': row['dropped_steps'], 'output': row['dropped_output']},
+            'error': row['error']
+        }
+        if include_result:
+            job['result'] = json.loads(row['result']) if row['result'] else None
+        return job
+
+    def steps_since(self, job_id, seq=0):
+        """Return [(seq, entry)] of the job's steps after seq"""
+        return [(row['seq'], json.loads(row['entry'])) for row in self._connect().execute(
+            'SELECT seq, entry FROM job_steps WHERE job_id = ? AND seq > ? ORDER BY seq',
+            (job_id, seq))]
+
+
+class JobContext:
+    """Handed to a job function to report progress"""
+
+    def __init__(self, store, job_id):
+        self.store = store
+        self.id = job_id
+
+    def progress(self, done=None, total=None, message=None):
+        self.store.progress(self.id, done, total, message)
+
+    def step(self, entry, counts=True):
+        """Record one step, advancing done by one unless counts is false"""
+        return self.store.add_step(self.id, entry, counts)
+
+    def dropped_steps(self):
+        """{'counted': n, 'output': n} steps dropped so far for being over the caps"""
+        return self.store.get(self.id, include_result=False)['dropped_steps']
+
+
+class JobRunner:
+    """Run job functions on a bounded thread pool and record their outcome
+
+    A job function takes a JobContext and returns a JSON-serializable result;
+    an exception fails the job with its message.
+    """
+
+    def __init__(self, store, max_workers=JOB_WORKERS):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        _runners.add(self)
+
+    def submit(self, command, func, params=None, total=None):
+        """Queue func and return the new job's id straight away"""
+        job_id = self.store.create(command, params)
+        if total is not None:
+            self.store.progress(job_id, total=total)
+        with self._pending_lock:
+            self._pending += 1
+        self._executor.submit(self._run, job_id, func)
+        return job_id
+
+    def pending(self):
+        """Number of submitted jobs that have not finished yet"""
+        with self._pending_lock:
+            return self._pending
+
+    def _run(self, job_id, func):
+        try:
+            try:
+                self.store.start(job_id)
+                payload = encode_result(func(JobContext(self.store, job_id)))
+            except Exception as e:
+                self.store.fail(job_id, str(e) or e.__class__.__name__)
+            else:
+                self.store.finish(job_id, payload)
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+        try:
+            self.store.prune()
+        except sqlite3.Error as e:
+            print(f"[JOBS] Failed to prune finished jobs: {e}")
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def drain(timeout=None, keep_alive=None, interval=DRAIN_INTERVAL):
+    """Wait until every job submitted in this process has finished
+
+    Called by an API worker that is about to exit (graceful reload or
+    recycle), so its jobs are not cut off. keep_alive is called between
+    checks (the gunicorn worker heartbeat). Returns True once no job is
+    pending, False if timeout seconds pass first.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        pending = sum(runner.pending() for runner in list(_runners))
+        if not pending:
+            return True
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        if keep_alive is not None:
+            keep_alive()
+        time.sleep(interval)
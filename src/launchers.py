@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Launchers
+Connection launcher scripts rendered from templates, rewritten only when their inputs change
+"""
+
+import io
+import os
+import time
+import hashlib
+import tarfile
+import zipfile
+import ipaddress
+import threading
+from string import Template
+
+from snapshot_writer import atomic_write
+from streaming import UnseekableSink
+
+# Bump when a template changes, so every launcher is rewritten once
+TEMPLATE_VERSION = 1
+BUNDLE_CHUNK = 64 * 1024   # archive bytes gathered before they are sent on
+
+# type -> (console URL, instructions, default console port)
+CONSOLES = {
+    'idrac': ('https://$ip/console', 'Use Dell iDRAC Virtual Console', 443),
+    'proxmox': ('https://$ip:$port', 'Access Proxmox VE web interface', 8006),
+    'windows': ('rdp://$ip', 'Use Remote Desktop Connection', 3389),
+    'linux': ('ssh://root@$ip', 'Use SSH terminal', 22),
+    'vnc': ('vnc://$ip:$port', 'Use VNC viewer', 5900)
+}
+DEFAULT_CONSOLE = ('http://$ip', 'Access via web browser', 80)
+# Scan service type -> server type whose console it is
+SERVICE_CONSOLES = {'ssh': 'linux', 'rdp': 'windows', 'vnc': 'vnc', 'idrac': 'idrac', 'proxmox': 'proxmox'}
+
+HEADER = Template('''#!/bin/bash
+# Connection Launcher for $ip ($server_type)
+# Launcher: $digest
+# Run this on your local machine
+
+echo "Connecting to $server_type server at $ip..."
+echo "Connection URL: $console_url"
+
+# Try to open appropriate application
+''')
+BODIES = {
+    'windows': Template('''
+if command -v mstsc >/dev/null; then
+    mstsc /v:$ip  # Windows
+elif command -v rdesktop >/dev/null; then
+    rdesktop $ip  # Linux with rdesktop
+elif command -v xfreerdp >/dev/null; then
+    xfreerdp /v:$ip  # Linux with xfreerdp
+else
+    echo "Please connect manually using Remote Desktop to: $ip"
+fi
+'''),
+    'linux': Template('''
+if command -v ssh >/dev/null; then
+    ssh root@$ip
+else
+    echo "SSH client not found. Please install SSH."
+fi
+''')
+}
+DEFAULT_BODY = Template('''
+if command -v open >/dev/null; then
+    open "$console_url"  # macOS
+elif command -v xdg-open >/dev/null; then
+    xdg-open "$console_url"  # Linux
+elif command -v start >/dev/null; then
+    start "$console_url"  # Windows
+else
+    echo "Please open this URL manually: $console_url"
+fi
+''')
+FOOTER = Template('''
+echo ""
+echo "Connection details:"
+echo "Type: $server_type"
+echo "Instructions: $instructions"
+''')
+
+_written = {}   # path -> digest of the launcher this process last saw there
+_written_lock = threading.Lock()
+
+
+def console_port(record):
+    """The port of the record's console service, or its type's default"""
+    for service in record.services:
+        if SERVICE_CONSOLES.get(service.get('type')) == record.type and service.get('port'):
+            return int(service['port'])
+    return CONSOLES.get(record.type, DEFAULT_CONSOLE)[2]
+
+
+def connection(server_type, ip, port=None):
+    """Return (console_url, instructions) for a server"""
+    url, instructions, default_port = CONSOLES.get(server_type, DEFAULT_CONSOLE)
+    return Template(url).substitute(ip=ip, port=port or default_port), instructions
+
+
+def launcher_name(server_type, ip):
+    return f"connect-{server_type}-{ip}.sh"
+
+
+def launcher_digest(server_type, ip, port):
+    """Content hash of everything a launcher is rendered from"""
+    key = f"{TEMPLATE_VERSION}\0{server_type}\0{ip}\0{port}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def render(server_type, ip, port=None):
+    """Render the launcher script for a server; ip must be an IP address"""
+    ip = str(ipaddress.ip_address(ip))  # the address is pasted into a shell script
+    console_url, instructions = connection(server_type, ip, port)
+    fields = {
+        'ip': ip,
+        'server_type': server_type,
+        'console_url': console_url,
+        'instructions': instructions,
+        'digest': launcher_digest(server_type, ip, port)
+    }
+    body = BODIES.get(server_type, DEFAULT_BODY)
+    return ''.join(template.substitute(fields) for template in (HEADER, body, FOOTER))
+
+
+def _digest_on_disk(path):
+    try:
+        with open(path, 'r') as f:
+            head = f.read(256)
+    except OSError:
+        return None
+    for line in head.splitlines():
+        if line.startswith('# Launcher: '):
+            return line[len('# Launcher: '):].strip()
+    return None
+
+
+def write_launcher(directory, server_type, ip, port=None):
+    """Write a server's launcher into directory unless the same one is already there
+
+    Returns (filename, written).
+    """
+    filename = launcher_name(server_type, ip)
+    path = os.path.join(directory, filename)
+    digest = launcher_digest(server_type, ip, port)
+    with _written_lock:
+        known = _written.get(path)
+    if known == digest and os.path.exists(path):
+        return filename, False
+    if known is None and _digest_on_disk(path) == digest:
+        with _written_lock:
+            _written[path] = digest
+        return filename, False
+
+    atomic_write(path, render(server_type, ip, port).encode(), mode=0o755)
+    with _written_lock:
+        _written[path] = digest
+    return filename, True
+
+
+def stream_bundle(records, format='zip'):
+    """Yield a zip or tar.gz archive of launchers for records in BUNDLE_CHUNK pieces
+
+    Launchers are rendered one at a time and the archive is sent as it is
+    produced, so memory stays flat whatever the size of the fleet (apart
+    from the zip central directory's small entry per member).
+    """
+    sink = UnseekableSink()
+    now = time.time()
+    if format == 'zip':
+        archive = zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED)
+    else:
+        archive = tarfile.open(fileobj=sink, mode='w|gz')
+    try:
+        for record in records:
+            try:
+                script = render(record.type, record.ip, console_port(record)).encode()
+            except ValueError:
+                continue  # not an IP address; no launcher for it
+            name = launcher_name(record.type, record.ip)
+            if format == 'zip':
+                info = zipfile.ZipInfo(name, time.localtime(now)[:6])
+                info.external_attr = (0o100755 << 16)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                archive.writestr(info, script)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size, info.mode, info.mtime = len(script), 0o755, int(now)
+                archive.addfile(info, io.BytesIO(script))
+            if sink.pending >= BUNDLE_CHUNK:
+                yield sink.drain()
+    finally:
+        archive.close()
+    yield sink.drain()
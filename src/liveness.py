@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Liveness
+Cached reachability answers for the API, from scan results and in-process TCP probes
+"""
+
+import time
+import asyncio
+import threading
+from datetime import datetime
+
+import async_core
+
+# Configuration
+ONLINE_TTL = 60         # seconds a successful probe answers lookups
+OFFLINE_TTL = 10        # seconds a failed probe does (a rebooting host comes back quickly)
+SCAN_FRESHNESS = 660    # seconds a scan's 'online' answers lookups (two scan intervals plus slack)
+PROBE_TIMEOUT = 1.0     # seconds per TCP connect
+CLOSE_TIMEOUT = 0.2     # seconds to wait for a probe connection to finish closing
+MAX_ENTRIES = 10000     # probe results kept; expired ones are dropped past this
+
+# Console port per server type, probed alongside the ports the scan found open
+SERVICE_PORTS = {
+    'idrac': [443],
+    'proxmox': [8006],
+    'windows': [3389],
+    'linux': [22],
+    'vnc': [5900, 5901]
+}
+DEFAULT_PORTS = [22, 443, 80, 3389, 5900]
+
+
+def probe_ports(record):
+    """Ports to probe for an inventory record (or None): its service ports, then those seen open"""
+    ports = list(SERVICE_PORTS.get(record.type, [])) if record is not None else []
+    if record is not None:
+        ports += [int(port) for port, is_open in record.ports.items() if is_open and str(port).isdigit()]
+        ports += [service['port'] for service in record.services if isinstance(service.get('port'), int)]
+    return list(dict.fromkeys(ports)) or list(DEFAULT_PORTS)
+
+
+def _seen_at(record):
+    """The record's last_seen as a Unix timestamp, or None"""
+    try:
+        return datetime.fromisoformat(record.last_seen).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+async def probe(ip, ports, timeout=PROBE_TIMEOUT):
+    """Connect to every port at once; returns (port, latency_ms) for the first to accept, or None"""
+    async def connect(port):
+        started = time.monotonic()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        latency = round((time.monotonic() - started) * 1000, 1)
+        writer.close()
+        try:
+            await asyncio.wait_for(writer.wait_closed(), CLOSE_TIMEOUT)
+        except (OSError, asyncio.TimeoutError):
+            pass
+        return port, latency
+
+    tasks = [asyncio.ensure_future(connect(port)) for port in ports]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            if result:
+                return result
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class LivenessCache:
+    """Answer "is this host reachable?" without blocking on the network where possible
+
+    A recent probe result answers first. Otherwise a host the last scan saw
+    online answers from the inventory straight away while a probe refreshes
+    it in the background. Only hosts with neither are probed inline, over TCP
+    on their known ports, for at most PROBE_TIMEOUT.
+    """
+
+    def __init__(self, online_ttl=ONLINE_TTL, offline_ttl=OFFLINE_TTL,
+                 scan_freshness=SCAN_FRESHNESS, timeout=PROBE_TIMEOUT):
+        self.online_ttl = online_ttl
+        self.offline_ttl = offline_ttl
+        self.scan_freshness = scan_freshness
+        self.timeout = timeout
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = {'probe_hits': 0, 'scan_hits': 0, 'probes': 0, 'refreshes': 0}
+
+    def _store(self, ip, result, checked):
+        entry = {
+            'online': result is not None,
+            'source': 'probe',
+            'checked': checked,
+            'port': result[0] if result else None,
+            'latency_ms': result[1] if result else None
+        }
+        with self._lock:
+            self._entries[ip] = entry
+            if len(self._entries) > MAX_ENTRIES:
+                cutoff = checked - max(self.online_ttl, self.offline_ttl)
+                self._entries = {key: value for key, value in self._entries.items()
+                                 if value['checked'] >= cutoff}
+        return dict(entry)
+
+    def _refresh(self, ip, ports):
+        """Probe ip in the background unless a probe for it is already running"""
+        with self._lock:
+            if ip in self._refreshing:
+                return
+            self._refreshing.add(ip)
+            self._stats['refreshes'] += 1
+
+        def done(future):
+            with self._lock:
+                self._refreshing.discard(ip)
+            if not future.cancelled() and future.exception() is None:
+                self._store(ip, future.result(), time.time())
+
+        async_core.submit(probe(ip, ports, self.timeout)).add_done_callback(done)
+
+    def check(self, ip, record=None):
+        """Return {'online', 'source' ('probe'/'scan'), 'checked', 'port', 'latency_ms'} for ip
+
+        record is the host's inventory record, if it has one.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(ip)
+            if entry is not None:
+                ttl = self.online_ttl if entry['online'] else self.offline_ttl
+                if now - entry['checked'] < ttl:
+                    self._stats['probe_hits'] += 1
+                    return dict(entry)
+
+        ports = probe_ports(record)
+        seen = _seen_at(record) if record is not None else None
+        if record is not None and record.is_online and seen and now - seen < self.scan_freshness:
+            with self._lock:
+                self._stats['scan_hits'] += 1
+            self._refresh(ip, ports)
+            return {'online': True, 'source': 'scan', 'checked': seen, 'port': None, 'latency_ms': None}
+
+        with self._lock:
+            self._stats['probes'] += 1
+        return self._store(ip, async_core.run(probe(ip, ports, self.timeout)), now)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cached'] = len(self._entries)
+        return stats
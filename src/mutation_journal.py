@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Mutation Journal
+Coalescing applier for inventory writes from the scanner and the API
+"""
+
+import time
+import threading
+from datetime import datetime, timezone
+
+# Configuration
+COALESCE_DELAY = 0.05   # seconds to let a burst of mutations join one batch
+ACK_TIMEOUT = 30
+
+
+class MutationJournal:
+    """Queue small inventory mutations and apply them in coalesced, atomic batches
+
+    Writers append operations (remove, update, merge_scan) to the journal table
+    and wait for the batch that applies them. A background applier drains every
+    pending mutation in one transaction, bumps the inventory version once and
+    publishes one snapshot per batch. Mutations appended by another process are
+    picked up by whichever applier runs next.
+    """
+
+    def __init__(self, store, coalesce_delay=COALESCE_DELAY, on_applied=None):
+        self.store = store
+        self.coalesce_delay = coalesce_delay
+        self.on_applied = on_applied or (lambda version: store.export_snapshots())
+        self._cond = threading.Condition()
+        self._requested = False
+        self._thread = None
+
+    # Writers
+
+    def submit(self, op, payload, timeout=ACK_TIMEOUT):
+        """Append a mutation and wait for it; returns (inventory version, result)"""
+        mutation_id = self.store.append_mutation(op, payload)
+        self._request_flush()
+        return self.wait(mutation_id, timeout)
+
+    def remove(self, url, timeout=ACK_TIMEOUT):
+        """Remove the server with the given URL"""
+        return self.submit('remove', {'url': url}, timeout)
+
+    def update(self, ip, timeout=ACK_TIMEOUT, **fields):
+        """Merge fields into the record for ip"""
+        return self.submit('update', {'ip': ip, 'fields': fields}, timeout)
+
+    def merge_scan(self, discovered, started_at, credentials_by_type=None, server_types=None,
+                   timeout=ACK_TIMEOUT):
+        """Merge one scan's discovered servers into the current inventory"""
+        return self.submit('merge_scan', {
+            'discovered': discovered,
+            'started_at': started_at,
+            'scanned_at': datetime.now(timezone.utc).isoformat(),
+            'credentials_by_type': credentials_by_type or {},
+            'server_types': server_types
+        }, timeout)
+
+    def wait(self, mutation_id, timeout=ACK_TIMEOUT):
+        """Block until a mutation is applied and return (version, result)"""
+        deadline = time.monotonic() + timeout
+        while True:
+            version, result = self.store.mutation_status(mutation_id)
+            if version is not None:
+                return version, result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Mutation {mutation_id} not applied within {timeout}s")
+            with self._cond:
+                self._cond.wait(min(remaining, 0.25))
+
+    # Applier
+
+    def _request_flush(self):
+        with self._cond:
+            self._requested = True
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='mutation-applier',
+                                                daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._requested:
+                    self._cond.wait()
+                self._requested = False
+            time.sleep(self.coalesce_delay)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[JOURNAL] Failed to apply mutations: {e}")
+                with self._cond:
+                    self._cond.notify_all()
+
+    def flush(self):
+        """Apply all pending mutations now; returns (version, applied mutation ids)"""
+        version, applied = self.store.apply_pending()
+        if applied:
+            self.on_applied(version)
+        with self._cond:
+            self._cond.notify_all()
+        return version, applied
@@ -5,17 +5,21 @@ Discovers iDRAC, Proxmox, Linux, and Windows servers on the network
 """
 
 import os
+import sys
 import json
 import socket
 import subprocess
 import requests
 import threading
 import ipaddress
-from datetime import datetime, timezone
+from datetime import datetime
 import time
 import paramiko
 import ssl
 import urllib3
+from inventory_store import InventoryStore
+from mutation_journal import MutationJournal
+from availability_log import AvailabilityLog
 
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -26,6 +30,7 @@ SERVERS_FILE = os.path.join(DATA_DIR, 'discovered_servers.json')
 CUSTOM_RANGES_FILE = os.path.join(DATA_DIR, 'custom_ranges.json')
 SCAN_TIMEOUT = 3
 MAX_WORKERS = 50
+PROGRESS_INTERVAL = 1.0  # seconds between scan-progress updates pushed to the dashboard
 
 # Ensure data directory exists
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -214,9 +219,11 @@ def identify_server(ip):
     # Check each server type
     for server_type, config in SERVER_TYPES.items():
         for port in config['ports']:
+            started = time.monotonic()
             if scan_port(ip, port):
                 log_message(f"Found open port {port} on {ip}")
                 server_info['ports'][str(port)] = True
+                server_info.setdefault('latency_ms', round((time.monotonic() - started) * 1000))
                 
                 # Special handling for different services
                 if server_type == 'linux' and port == 22:
@@ -270,8 +277,8 @@ def identify_server(ip):
     
     return None
 
-def scan_ip_range(ip_range):
-    """Scan an IP range for all server types"""
+def scan_ip_range(ip_range, on_host=None):
+    """Scan an IP range for all server types; on_host(server_info) is called per host"""
     discovered = []
     
     try:
@@ -283,97 +290,128 @@ def scan_ip_range(ip_range):
             if server_info:
                 discovered.append(server_info)
                 log_message(f"Identified {server_info['type']}: {server_info['title']} at {server_info['url']}")
+            if on_host:
+                on_host(server_info)
     
     except Exception as e:
         log_message(f"Error scanning range {ip_range}: {e}")
     
     return discovered
 
-def load_existing_servers():
-    """Load existing server list"""
-    if os.path.exists(SERVERS_FILE):
+_store = None
+_journal = None
+_availability_log = None
+
+def get_store():
+    """Return the shared inventory store, opening it on first use"""
+    global _store
+    if _store is None:
+        _store = InventoryStore(data_dir=DATA_DIR)
+    return _store
+
+def get_journal():
+    """Return the mutation journal used to write the inventory"""
+    global _journal
+    if _journal is None:
+        _journal = MutationJournal(get_store())
+    return _journal
+
+def get_availability_log():
+    """Return the per-host availability log, opening it on first use"""
+    global _availability_log
+    if _availability_log is None:
+        _availability_log = AvailabilityLog()
+    return _availability_log
+
+def save_scan_results(discovered_servers, started_at):
+    """Merge scan results into the inventory through the mutation journal"""
+    try:
+        version, result = get_journal().merge_scan(
+            discovered_servers,
+            started_at,
+            credentials_by_type={t: c['default_credentials'] for t, c in SERVER_TYPES.items()},
+            server_types=list(SERVER_TYPES.keys())
+        )
+        log_message(f"Saved {result['servers']} servers to inventory (version {version})")
+        for ip in result['skipped']:
+            log_message(f"Not re-adding {ip}: removed while the scan was running")
+    except Exception as e:
+        log_message(f"Error saving servers: {e}")
+
+class ScanProgress:
+    """Track a running scan and publish its progress to the store at most once per interval"""
+    
+    def __init__(self, ranges, started_at, interval=PROGRESS_INTERVAL):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.last_published = 0
+        self.state = {
+            'state': 'running',
+            'started_at': started_at,
+            'ranges': list(ranges),
+            'hosts_total': sum(count_hosts(ip_range) for ip_range in ranges),
+            'hosts_scanned': 0,
+            'found': 0
+        }
+    
+    def host_done(self, server_info):
+        with self.lock:
+            self.state['hosts_scanned'] += 1
+            if server_info:
+                self.state['found'] += 1
+            if time.monotonic() - self.last_published >= self.interval:
+                self.publish()
+    
+    def finish(self):
+        with self.lock:
+            self.state['state'] = 'complete'
+            self.publish()
+    
+    def publish(self):
+        self.last_published = time.monotonic()
         try:
-            with open(SERVERS_FILE, 'r') as f:
-                return json.load(f)
+            get_store().set_scan_progress(dict(self.state, updated_at=time.time()))
         except Exception as e:
-            log_message(f"Error loading servers file: {e}")
-    
-    # Return default structure
-    return {
-        'servers': [],
-        'last_scan': '',
-        'scan_count': 0,
-        'server_types': list(SERVER_TYPES.keys())
-    }
+            log_message(f"Error publishing scan progress: {e}")
 
-def save_servers(data):
-    """Save server list to file"""
-    os.makedirs(DATA_DIR, exist_ok=True)
+def count_hosts(ip_range):
+    """Return the number of host addresses scan_ip_range() will probe"""
     try:
-        with open(SERVERS_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
-        log_message(f"Saved {len(data.get('servers', []))} servers to {SERVERS_FILE}")
-        
-        # Also maintain backward compatibility with old file
-        idrac_only = {
-            'servers': [s for s in data['servers'] if s.get('type') == 'idrac'],
-            'last_scan': data['last_scan'],
-            'scan_count': data['scan_count']
-        }
-        with open(os.path.join(DATA_DIR, 'discovered_idracs.json'), 'w') as f:
-            json.dump(idrac_only, f, indent=2)
+        network = ipaddress.ip_network(ip_range, strict=False)
+    except ValueError:
+        return 0
+    # hosts() skips the network and broadcast addresses except for /31 and /32
+    return network.num_addresses - 2 if network.num_addresses > 2 else network.num_addresses
+
+def record_availability(inventory, discovered_servers):
+    """Append an availability sample for every known server and compact old samples"""
+    latency_by_ip = {server['ip']: server.get('latency_ms') for server in discovered_servers}
+    try:
+        availability = get_availability_log()
+        availability.record_many([
+            (record.ip, record.is_online, latency_by_ip.get(record.ip))
+            for record in inventory
+        ])
+        if availability.maybe_compact():
+            log_message("Compacted availability history")
     except Exception as e:
-        log_message(f"Error saving servers: {e}")
+        log_message(f"Error recording availability: {e}")
 
-def update_server_status(servers_data, discovered_servers):
-    """Update server status based on scan results"""
-    current_time = datetime.now(timezone.utc).isoformat()
-    
-    # Create lookup by IP
-    discovered_by_ip = {server['ip']: server for server in discovered_servers}
-    existing_by_ip = {server.get('ip', server['url'].split('//')[-1].split(':')[0]): server 
-                      for server in servers_data['servers']}
-    
-    # Update existing servers
-    for ip, server in existing_by_ip.items():
-        if ip in discovered_by_ip:
-            # Update with new info
-            discovered = discovered_by_ip[ip]
-            server['status'] = 'online'
-            server['last_seen'] = current_time
-            server['services'] = discovered.get('services', [])
-            server['ports'] = discovered.get('ports', {})
-            server['type'] = discovered.get('type', server.get('type', 'unknown'))
-        else:
-            server['status'] = 'offline'
-    
-    # Add new servers
-    for ip, discovered in discovered_by_ip.items():
-        if ip not in existing_by_ip:
-            new_server = {
-                'ip': ip,
-                'url': discovered['url'],
-                'type': discovered['type'],
-                'title': discovered['title'],
-                'services': discovered.get('services', []),
-                'ports': discovered.get('ports', {}),
-                'first_discovered': current_time,
-                'last_seen': current_time,
-                'status': 'online',
-                'credentials': SERVER_TYPES.get(discovered['type'], {}).get('default_credentials', {})
-            }
-            servers_data['servers'].append(new_server)
-    
-    # Update scan metadata
-    servers_data['last_scan'] = current_time
-    servers_data['scan_count'] = servers_data.get('scan_count', 0) + 1
-    servers_data['server_types'] = list(SERVER_TYPES.keys())
-    
-    return servers_data
+def render_dashboard_snapshot():
+    """Regenerate the dashboard with a pre-rendered snapshot of the inventory"""
+    generator = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard-generator.py')
+    try:
+        result = subprocess.run([sys.executable, generator, '--snapshot'],
+                                capture_output=True, text=True, timeout=120)
+        if result.returncode != 0:
+            log_message(f"Error rendering dashboard snapshot: {result.stderr.strip()}")
+    except Exception as e:
+        log_message(f"Error rendering dashboard snapshot: {e}")
 
 def perform_scan(custom_ranges=None):
     """Perform complete network scan"""
     log_message("Starting multi-server network scan...")
+    started_at = time.time()
     
     # Get network ranges to scan
     if custom_ranges:
@@ -382,6 +420,8 @@ def perform_scan(custom_ranges=None):
         ranges = get_network_ranges()
     
     log_message(f"Scanning {len(ranges)} network ranges")
+    progress = ScanProgress(ranges, started_at)
+    progress.publish()
     
     # Thread pool for scanning
     discovered_servers = []
@@ -389,7 +429,7 @@ def perform_scan(custom_ranges=None):
     lock = threading.Lock()
     
     def scan_range_thread(ip_range):
-        results = scan_ip_range(ip_range)
+        results = scan_ip_range(ip_range, progress.host_done)
         with lock:
             discovered_servers.extend(results)
     
@@ -421,13 +461,15 @@ def perform_scan(custom_ranges=None):
         log_message(f"  - {server_type}: {count} servers")
     
     # Update server database
-    servers_data = load_existing_servers()
-    updated_data = update_server_status(servers_data, discovered_servers)
-    save_servers(updated_data)
+    save_scan_results(discovered_servers, started_at)
+    progress.finish()
+    inventory = get_store().load_inventory()
+    record_availability(inventory, discovered_servers)
+    render_dashboard_snapshot()
     
     # Log results
-    online_count = len([s for s in updated_data['servers'] if s['status'] == 'online'])
-    total_count = len(updated_data['servers'])
+    online_count = inventory.count(status='online')
+    total_count = len(inventory)
     log_message(f"Database updated: {online_count} online, {total_count} total servers")
 
 def main():
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Search Index
+Trigram index over server IP, title, type, services and SSH banners for dashboard search
+"""
+
+GRAM = 3
+COMMON_FRACTION = 0.2  # grams in more hosts than this filter too little to be worth storing
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def search_text(server):
+    """Return the lowercase text a server record is searched by
+
+    The dashboard builds the same string (serverSearchText) to verify candidates.
+    """
+    parts = [server.get('ip') or '', server.get('title') or '', server.get('type') or '']
+    for service in server.get('services') or []:
+        parts.append(str(service.get('type') or ''))
+        if service.get('banner'):
+            parts.append(str(service['banner']))
+    return ' '.join(parts).lower()
+
+
+def grams(text):
+    """Return the set of trigrams in text"""
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def _base36(number):
+    digits = ''
+    while True:
+        number, remainder = divmod(number, 36)
+        digits = DIGITS[remainder] + digits
+        if not number:
+            return digits
+
+
+def encode_postings(ids):
+    """Encode ascending document ids as comma-separated base-36 gaps"""
+    previous = 0
+    gaps = []
+    for doc_id in ids:
+        gaps.append(_base36(doc_id - previous))
+        previous = doc_id
+    return ','.join(gaps)
+
+
+def decode_postings(encoded):
+    """Decode encode_postings() output back to document ids"""
+    ids = []
+    doc_id = 0
+    for gap in encoded.split(','):
+        doc_id += int(gap, 36)
+        ids.append(doc_id)
+    return ids
+
+
+def build_search_index(servers, version=0):
+    """Build the search_index.json document for a list of server records
+
+    Document ids are positions in 'ids' (server IPs). Grams found in more
+    than COMMON_FRACTION of servers are listed in 'common' instead of being
+    given a posting list; a lookup treats them as matching every server.
+    """
+    ids = []
+    postings = {}
+    for doc_id, server in enumerate(servers):
+        ids.append(server.get('ip') or server.get('url'))
+        for gram in grams(search_text(server)):
+            postings.setdefault(gram, []).append(doc_id)
+
+    limit = max(1, int(len(ids) * COMMON_FRACTION))
+    common = sorted(gram for gram, docs in postings.items() if len(docs) > limit)
+    return {
+        'version': version,
+        'gram': GRAM,
+        'ids': ids,
+        'common': common,
+        'grams': {gram: encode_postings(docs) for gram, docs in postings.items()
+                  if len(docs) <= limit}
+    }
+
+
+def search(index, query, texts):
+    """Return the ids (IPs) of servers whose search text contains query
+
+    texts maps id -> search_text(server) and is used to verify candidates;
+    queries shorter than a trigram are checked against every server.
+    """
+    query = query.strip().lower()
+    if not query:
+        return list(texts)
+
+    candidates = None
+    if len(query) >= GRAM:
+        common = set(index['common'])
+        lists = []
+        for gram in grams(query) - common:
+            encoded = index['grams'].get(gram)
+            if encoded is None:
+                return []
+            lists.append(decode_postings(encoded))
+        if lists:
+            lists.sort(key=len)
+            matched = set(lists[0])
+            for other in lists[1:]:
+                matched.intersection_update(other)
+            candidates = [index['ids'][doc_id] for doc_id in sorted(matched)]
+
+    if candidates is None:
+        candidates = list(texts)
+    return [ip for ip in candidates if query in texts.get(ip, '')]
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Snapshot Writer
+Atomic, change-detecting writes for the JSON files served from /app/www/data
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import tempfile
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_SIZE = 512  # below this nginx serves the original; compression gains nothing
+
+# path -> (sha256, (inode, mtime_ns, size)) of the content last written or hashed there
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def _signature(stat):
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _digest_on_disk(path):
+    """sha256 of the file at path (None if missing), hashed only when it changed since last seen"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    with _digests_lock:
+        cached = _digests.get(path)
+    if cached and cached[1] == _signature(stat):
+        return cached[0]
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    with _digests_lock:
+        _digests[path] = (digest, _signature(stat))
+    return digest
+
+
+def serialize(data):
+    """Serialise a document to the compact JSON bytes used for snapshots"""
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def atomic_write(path, payload, mode=0o644):
+    """Publish bytes to path through temp file + fsync + rename"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Make the rename itself durable
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def _compressed_variants(payload):
+    """Return {suffix: bytes} for the precompressed copies served by gzip_static/brotli_static"""
+    variants = {'.gz': None, '.br': None}
+    if len(payload) >= MIN_COMPRESS_SIZE:
+        # mtime=0 keeps the gzip output deterministic for identical input
+        variants['.gz'] = gzip.compress(payload, compresslevel=9, mtime=0)
+        if brotli is not None:
+            variants['.br'] = brotli.compress(payload)
+    return variants
+
+
+def write_bytes(path, payload, compress=True):
+    """Atomically write bytes unless identical content was already published
+
+    With compress, .gz and .br copies (.br needs brotli, in requirements.txt)
+    are published alongside and given the same mtime as the original.
+    Returns True if the file was rewritten, False if it was left untouched.
+    nginx derives ETag/Last-Modified from the file itself, so leaving an
+    unchanged file alone keeps clients' cached copies valid.
+    """
+    digest = hashlib.sha256(payload).hexdigest()
+    if _digest_on_disk(path) == digest:
+        return False
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    variants = _compressed_variants(payload) if compress else {'.gz': None, '.br': None}
+    for suffix, data in variants.items():
+        if data is not None:
+            atomic_write(path + suffix, data)
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    atomic_write(path, payload)
+
+    # Compressed copies share the original's mtime, so nginx gives them the same validators
+    stat = os.stat(path)
+    for suffix, data in variants.items():
+        if data is not None:
+            os.utime(path + suffix, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    with _digests_lock:
+        _digests[path] = (digest, _signature(stat))
+    return True
+
+
+def write_snapshot(path, data):
+    """Serialise a document once and publish it if its content changed"""
+    return write_bytes(path, serialize(data))
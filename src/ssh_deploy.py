@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+SSH Deploy
+Parallel, idempotent public key deployment over paramiko
+"""
+
+import os
+import time
+import socket
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import paramiko
+
+# Configuration
+DEPLOY_TIMEOUT = float(os.environ.get('DEPLOY_TIMEOUT', '10'))        # seconds per connect/auth/append step
+DEPLOY_CONCURRENCY = int(os.environ.get('DEPLOY_CONCURRENCY', '16'))  # hosts in flight at once
+
+# Reads the key from stdin and appends it only if that exact line is missing,
+# first terminating an unterminated last line so the key never joins it
+APPEND_KEY_SCRIPT = (
+    'umask 077; read -r key || exit 2; '
+    'mkdir -p "$HOME/.ssh" && touch "$HOME/.ssh/authorized_keys" || exit 3; '
+    'f="$HOME/.ssh/authorized_keys"; '
+    'if grep -qxF "$key" "$f"; then echo present; exit 0; fi; '
+    'if [ -s "$f" ] && [ -n "$(tail -c 1 "$f")" ]; then echo >> "$f"; fi; '
+    'printf "%s\\n" "$key" >> "$f" && echo added'
+)
+
+# Unreachable and hung hosts are reported in their result entries; without this,
+# paramiko's transport threads also print a traceback for each of them
+logging.getLogger('paramiko.transport').setLevel(logging.CRITICAL)
+
+
+class AcceptHostKey(paramiko.MissingHostKeyPolicy):
+    """Accept unknown host keys without recording them (StrictHostKeyChecking=no)"""
+
+    def missing_host_key(self, client, hostname, key):
+        pass
+
+
+def load_private_key(path):
+    """Return the paramiko key at path, or None if it is missing or unreadable"""
+    for key_class in (paramiko.RSAKey, paramiko.Ed25519Key, paramiko.ECDSAKey):
+        try:
+            return key_class.from_private_key_file(path)
+        except (OSError, paramiko.SSHException):
+            continue
+    return None
+
+
+def deploy_key(host, public_key, username='root', password=None, port=22, pkey=None,
+               timeout=DEPLOY_TIMEOUT):
+    """Append public_key to a host's authorized_keys unless it is already there
+
+    Authenticates with pkey (the deployment key, so hosts that already have
+    it succeed without a password), then the agent and default keys, then
+    password. Returns {'success', 'status' ('added'/'present'/'failed'),
+    'message', 'elapsed'}; never raises.
+    """
+    started = time.monotonic()
+    result = {'success': False, 'status': 'failed'}
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(AcceptHostKey())
+    try:
+        client.connect(host, port=port, username=username or 'root', password=password or None,
+                       pkey=pkey, timeout=timeout, banner_timeout=timeout, auth_timeout=timeout,
+                       allow_agent=True, look_for_keys=True)
+        stdin, stdout, stderr = client.exec_command(APPEND_KEY_SCRIPT, timeout=timeout)
+        stdin.write(public_key.strip() + '\n')
+        stdin.channel.shutdown_write()
+        output = stdout.read().decode(errors='replace').strip()
+        status = stdout.channel.recv_exit_status()
+        if status == 0 and output in ('added', 'present'):
+            result.update(success=True, status=output,
+                          message='Key added' if output == 'added' else 'Key already present')
+        else:
+            error = stderr.read().decode(errors='replace').strip()
+            result['message'] = error or output or f'Remote command exited with status {status}'
+    except paramiko.AuthenticationException:
+        result['message'] = 'Authentication failed'
+    except (socket.timeout, TimeoutError):
+        result['message'] = 'Connection timeout'
+    except (paramiko.SSHException, OSError) as e:
+        result['message'] = str(e) or e.__class__.__name__
+    finally:
+        client.close()
+    result['elapsed'] = round(time.monotonic() - started, 3)
+    return result
+
+
+def deploy_keys(targets, public_key, private_key_path=None, concurrency=DEPLOY_CONCURRENCY,
+                timeout=DEPLOY_TIMEOUT, on_result=None):
+    """Deploy public_key to every target, concurrency hosts at a time
+
+    targets are dicts with 'ip' and optionally 'type', 'port', 'username' and
+    'password'. on_result(entry) is called as each host finishes, in completion
+    order; the returned entries follow the order of targets.
+    """
+    pkey = load_private_key(private_key_path) if private_key_path else None
+    results = [None] * len(targets)
+
+    def deploy(target):
+        entry = {'ip': target['ip'], 'type': target.get('type', 'unknown')}
+        entry.update(deploy_key(target['ip'], public_key, username=target.get('username'),
+                                password=target.get('password'), port=target.get('port', 22),
+                                pkey=pkey, timeout=timeout))
+        return entry
+
+    if not targets:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(targets))),
+                            thread_name_prefix='ssh-deploy') as executor:
+        futures = {executor.submit(deploy, target): index for index, target in enumerate(targets)}
+        for future in as_completed(futures):
+            entry = future.result()
+            results[futures[future]] = entry
+            if on_result:
+                on_result(entry)
+    return results
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+SSH Sessions
+Pool of authenticated paramiko connections, one per host, shared by fleet operations
+"""
+
+import os
+import time
+import codecs
+import select
+import socket
+import threading
+from collections import OrderedDict
+
+import paramiko
+
+from ssh_deploy import AcceptHostKey, load_private_key
+
+# Configuration
+MAX_SESSIONS = int(os.environ.get('SSH_MAX_SESSIONS', '256'))      # pooled connections (LRU beyond this)
+IDLE_TIMEOUT = float(os.environ.get('SSH_IDLE_TIMEOUT', '300'))   # seconds an unused connection is kept
+CONNECT_TIMEOUT = 10
+COMMAND_TIMEOUT = 60
+MAX_OUTPUT = 1024 * 1024   # bytes of stdout/stderr kept per command (streaming still sees all of it)
+
+class SSHSessionError(Exception):
+    """A host could not be connected to or authenticated against"""
+
+
+class _Session:
+    __slots__ = ('key', 'client', 'created', 'last_used', 'users', 'handshake_seconds')
+
+    def __init__(self, key, client, handshake_seconds):
+        self.key = key
+        self.client = client
+        self.created = self.last_used = time.monotonic()
+        self.users = 0
+        self.handshake_seconds = handshake_seconds
+
+    @property
+    def active(self):
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active()
+
+
+class SessionPool:
+    """Keep one authenticated SSH connection per (host, port, user) and run commands over it
+
+    Commands on the same host are multiplexed as separate channels over the
+    pooled connection. Connections unused for idle_timeout are closed, the
+    least recently used idle one is closed when the pool is full, and a
+    connection that has dropped is replaced transparently on next use.
+    """
+
+    def __init__(self, key_path=None, max_sessions=MAX_SESSIONS, idle_timeout=IDLE_TIMEOUT,
+                 connect_timeout=CONNECT_TIMEOUT):
+        self.key_path = key_path
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._connecting = {}   # key -> [lock, users], so concurrent users of a host share one handshake
+        self._pkey = None
+        self._pkey_mtime = None
+        self._reaper = None
+        self._stats = {
+            'handshakes': 0, 'reuses': 0, 'reconnects': 0, 'failures': 0, 'channels': 0,
+            'evicted_idle': 0, 'evicted_lru': 0, 'handshake_seconds': 0.0
+        }
+
+    # Connections
+
+    def _private_key(self):
+        """The deployment key, reloaded when the file changes"""
+        if not self.key_path:
+            return None
+        try:
+            mtime = os.stat(self.key_path).st_mtime_ns
+        except OSError:
+            return None
+        if mtime != self._pkey_mtime:
+            self._pkey, self._pkey_mtime = load_private_key(self.key_path), mtime
+        return self._pkey
+
+    def _connect(self, key, password):
+        host, port, username = key
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(AcceptHostKey())
+        started = time.monotonic()
+        try:
+            client.connect(host, port=port, username=username, password=password or None,
+                           pkey=self._private_key(), timeout=self.connect_timeout,
+                           banner_timeout=self.connect_timeout, auth_timeout=self.connect_timeout,
+                           allow_agent=True, look_for_keys=True)
+        except paramiko.AuthenticationException:
+            client.close()
+            raise SSHSessionError('Authentication failed')
+        except (socket.timeout, TimeoutError):
+            client.close()
+            raise SSHSessionError('Connection timeout')
+        except (paramiko.SSHException, OSError, EOFError) as e:
+            client.close()
+            raise SSHSessionError(str(e) or e.__class__.__name__)
+        transport = client.get_transport()
+        transport.set_keepalive(30)
+        return _Session(key, client, time.monotonic() - started)
+
+    def _acquire(self, key, password):
+        """Return (session, reused) with the session marked in use"""
+        self._start_reaper()
+        with self._lock:
+            connecting = self._connecting.setdefault(key, [threading.Lock(), 0])
+            connecting[1] += 1
+        try:
+            with connecting[0]:
+                return self._acquire_locked(key, password)
+        finally:
+            # Only keys with an acquire in flight keep a lock, whatever happens to their sessions
+            with self._lock:
+                connecting[1] -= 1
+                if connecting[1] == 0:
+                    del self._connecting[key]
+
+    def _acquire_locked(self, key, password):
+        """_acquire() with the key's connect lock held"""
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None and not session.active:
+                self._close(session)
+                self._stats['reconnects'] += 1
+                session = None
+            if session is not None:
+                self._sessions.move_to_end(key)
+                session.users += 1
+                session.last_used = time.monotonic()
+                self._stats['reuses'] += 1
+                return session, True
+        try:
+            session = self._connect(key, password)
+        except SSHSessionError:
+            with self._lock:
+                self._stats['failures'] += 1
+            raise
+        with self._lock:
+            self._stats['handshakes'] += 1
+            self._stats['handshake_seconds'] += session.handshake_seconds
+            session.users = 1
+            self._sessions[key] = session
+            self._evict_lru()
+        return session, False
+
+    def _release(self, session):
+        with self._lock:
+            session.users -= 1
+            session.last_used = time.monotonic()
+
+    def _close(self, session):
+        """Drop a session from the pool and close it (call with the lock held)"""
+        if self._sessions.get(session.key) is session:
+            del self._sessions[session.key]
+        session.client.close()
+
+    def _evict_lru(self):
+        for session in list(self._sessions.values()):
+            if len(self._sessions) <= self.max_sessions:
+                return
+            if session.users == 0:
+                self._close(session)
+                self._stats['evicted_lru'] += 1
+
+    def evict_idle(self):
+        """Close sessions unused for idle_timeout; returns how many were closed"""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [s for s in self._sessions.values() if s.users == 0 and s.last_used < cutoff]
+            for session in idle:
+                self._close(session)
+            self._stats['evicted_idle'] += len(idle)
+        return len(idle)
+
+    def _start_reaper(self):
+        with self._lock:
+            if self._reaper is None or not self._reaper.is_alive():
+                self._reaper = threading.Thread(target=self._reap, name='ssh-session-reaper',
+                                                daemon=True)
+                self._reaper.start()
+
+    def _reap(self):
+        while True:
+            time.sleep(max(1.0, self.idle_timeout / 4))
+            self.evict_idle()
+
+    def close_all(self):
+        with self._lock:
+            for session in list(self._sessions.values()):
+                self._close(session)
+
+    # Commands
+
+    def run(self, host, command, port=22, username='root', password=None, timeout=COMMAND_TIMEOUT,
+            on_output=None):
+        """Run command on host over its pooled connection
+
+        on_output(stream, text) is called with 'stdout'/'stderr' text as it
+        arrives. Returns {'exit_status', 'stdout', 'stderr', 'elapsed',
+        'reused', 'timed_out'}; raises SSHSessionError if the host cannot be
+        reached or authenticated against.
+        """
+        key = (host, port, username or 'root')
+        started = time.monotonic()
+        for attempt in range(2):
+            session, reused = self._acquire(key, password)
+            try:
+                channel = session.client.get_transport().open_session(timeout=self.connect_timeout)
+            except (paramiko.SSHException, EOFError, OSError, AttributeError):
+                # The pooled connection died since its last use: reconnect once
+                self._release(session)
+                with self._lock:
+                    self._close(session)
+                    self._stats['reconnects'] += 1
+                if attempt:
+                    raise SSHSessionError('Connection lost')
+                continue
+            with self._lock:
+                self._stats['channels'] += 1
+            try:
+                result = self._communicate(channel, command, started + timeout, on_output)
+            finally:
+                channel.close()
+                self._release(session)
+            result.update(elapsed=round(time.monotonic() - started, 3), reused=reused)
+            return result
+
+    def _communicate(self, channel, command, deadline, on_output):
+        channel.exec_command(command)
+        channel.shutdown_write()
+        buffers = {'stdout': [], 'stderr': []}
+        sizes = {'stdout': 0, 'stderr': 0}
+        decoders = {name: codecs.getincrementaldecoder('utf-8')('replace') for name in buffers}
+        readers = {'stdout': channel.recv, 'stderr': channel.recv_stderr}
+        ready = {'stdout': channel.recv_ready, 'stderr': channel.recv_stderr_ready}
+        timed_out = False
+        # poll, not select: a busy pool holds far more than FD_SETSIZE descriptors
+        poller = select.poll()
+        poller.register(channel, select.POLLIN)
+
+        def drain(name, final=False):
+            while ready[name]():
+                data = readers[name](65536)
+                if not data:
+                    break
+                text = decoders[name].decode(data)
+                if on_output and text:
+                    on_output(name, text)
+                if sizes[name] < MAX_OUTPUT:
+                    buffers[name].append(text)
+                    sizes[name] += len(data)
+            if final:
+                text = decoders[name].decode(b'', final=True)
+                if text:
+                    buffers[name].append(text)
+                    if on_output:
+                        on_output(name, text)
+
+        while True:
+            drain('stdout')
+            drain('stderr')
+            if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            poller.poll(min(remaining, 1.0) * 1000)
+        drain('stdout', final=True)
+        drain('stderr', final=True)
+        return {
+            'exit_status': None if timed_out else channel.recv_exit_status(),
+            'stdout': ''.join(buffers['stdout']),
+            'stderr': ''.join(buffers['stderr']),
+            'timed_out': timed_out
+        }
+
+    # Metrics
+
+    def metrics(self):
+        """Pool counters plus reuse rate and handshake time saved by reuse"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['sessions'] = len(self._sessions)
+            stats['in_use'] = sum(1 for s in self._sessions.values() if s.users)
+        connections = stats['handshakes'] + stats['reuses']
+        average = stats['handshake_seconds'] / stats['handshakes'] if stats['handshakes'] else 0.0
+        stats['reuse_rate'] = round(stats['reuses'] / connections, 4) if connections else 0.0
+        stats['handshake_seconds'] = round(stats['handshake_seconds'], 3)
+        stats['handshake_seconds_saved'] = round(stats['reuses'] * average, 3)
+        return stats
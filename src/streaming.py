@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Streaming
+Helpers for responses generated while they are sent (archives, exports)
+"""
+
+import io
+
+
+class UnseekableSink(io.RawIOBase):
+    """Write-only, unseekable buffer that hands back what was written since the last drain
+
+    zipfile and tarfile write an archive into it; the caller drains it
+    between members and sends the bytes on, so the archive never has to
+    exist whole in memory or on disk.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+        self.pending = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        self.pending += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self.pending = 0
+        return data
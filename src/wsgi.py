@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for the Multi-Server Container API
+Run with: gunicorn -c gunicorn.conf.py wsgi:app (from /app/src)
+"""
+
+import os
+import importlib.util
+
+# idrac-container-api.py is not an importable module name, so load it by path
+_spec = importlib.util.spec_from_file_location(
+    'idrac_container_api',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'idrac-container-api.py'))
+api = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(api)
+
+api.ensure_directories()
+app = api.app
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Load test: the API under Flask's development server vs. gunicorn (gunicorn.conf.py)
+
+Seeds a temporary inventory, starts each server in turn and drives it with
+concurrent keep-alive clients querying /api/servers while one client keeps
+a slow request in flight, then prints throughput and latency percentiles.
+
+Usage: python3 tests/api_load_bench.py [--servers 2000] [--clients 16] [--seconds 10]
+"""
+
+import os
+import sys
+import time
+import json
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+import importlib.util
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, SRC_DIR)
+
+SLOW_SECONDS = 2.0  # CPU time of the stand-in for a long deploy/export request
+
+
+def synthetic_servers(count):
+    """Build count online server records like the scanner's"""
+    return [{
+        'ip': f"10.{i // 65536}.{i // 256 % 256}.{i % 256}",
+        'url': f"https://10.{i // 65536}.{i // 256 % 256}.{i % 256}",
+        'type': ('idrac', 'proxmox', 'linux')[i % 3], 'title': f"Server {i}",
+        'status': 'online', 'ports': {'22': True}, 'services': []
+    } for i in range(count)]
+
+
+def seed_inventory(data_dir, count):
+    from inventory_store import InventoryStore
+    store = InventoryStore(data_dir=data_dir)
+    store.save_document({'servers': synthetic_servers(count), 'last_scan': '', 'scan_count': 1})
+    store.close()
+
+
+def load_api(data_dir):
+    """Import the API with its data directories pointed at data_dir"""
+    spec = importlib.util.spec_from_file_location(
+        'idrac_container_api', os.path.join(SRC_DIR, 'idrac-container-api.py'))
+    api = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(api)
+    api.DATA_DIR = data_dir
+
+    @api.app.route('/bench/slow')
+    def bench_slow():
+        """Busy for SLOW_SECONDS, like an SSH key deployment or a large export"""
+        deadline = time.process_time() + SLOW_SECONDS
+        while time.process_time() < deadline:
+            json.dumps(synthetic_servers(200))
+        return api.jsonify({'status': 'done'})
+
+    return api
+
+
+def serve(kind, port, data_dir):
+    """Run one server in this process (the child side of run_server())"""
+    api = load_api(data_dir)
+    if kind == 'dev':
+        api.app.run(host='127.0.0.1', port=port, debug=False)
+        return
+
+    from gunicorn.app.base import BaseApplication
+
+    class BenchApplication(BaseApplication):
+        def load_config(self):
+            config = {}
+            with open(os.path.join(SRC_DIR, 'gunicorn.conf.py')) as f:
+                exec(compile(f.read(), f.name, 'exec'), config)
+            for name, value in config.items():
+                if name in self.cfg.settings:
+                    self.cfg.set(name, value)
+            self.cfg.set('bind', f"127.0.0.1:{port}")
+            self.cfg.set('accesslog', None)
+
+        def load(self):
+            return api.app
+
+    BenchApplication().run()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_server(kind, data_dir):
+    """Start a server subprocess and wait until it answers /health"""
+    port = free_port()
+    process = subprocess.Popen([sys.executable, __file__, '--serve', kind, '--port', str(port),
+                                '--data', data_dir],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/health')
+            if connection.getresponse().status == 200:
+                return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{kind} server did not start")
+
+
+def client(port, path, stop, latencies, errors):
+    """Issue requests over one keep-alive connection until stop is set"""
+    connection = None
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            if connection is None:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+            if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+                connection.close()
+                connection = None
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            connection = None
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else float('nan')
+
+
+def measure(kind, data_dir, clients, seconds):
+    process, port = run_server(kind, data_dir)
+    try:
+        stop = threading.Event()
+        latencies, errors, slow = [], [], []
+        threads = [threading.Thread(target=client, args=(port, '/bench/slow', stop, slow, errors))]
+        threads += [threading.Thread(target=client,
+                                     args=(port, '/api/servers?limit=50', stop, latencies, errors))
+                    for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+    return {
+        'server': kind,
+        'requests_per_s': len(latencies) / seconds,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'max_ms': max(latencies, default=float('nan')) * 1000,
+        'slow_completed': len(slow),
+        'errors': len(errors)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--servers', type=int, default=2000, help='inventory size')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent /api/servers clients')
+    parser.add_argument('--seconds', type=float, default=10, help='duration per server')
+    parser.add_argument('--serve', choices=['dev', 'gunicorn'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--data', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.data)
+        return 0
+
+    print(f"{os.cpu_count()} CPUs, {args.servers} servers, {args.clients} clients + 1 slow, "
+          f"{args.seconds:g}s per server")
+    print(f"{'server':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'slow':>5} {'errors':>6}")
+    with tempfile.TemporaryDirectory() as data_dir:
+        # Read by inventory_store on import, here and in the server subprocesses
+        os.environ['INVENTORY_DB'] = os.path.join(data_dir, 'inventory.db')
+        seed_inventory(data_dir, args.servers)
+        for kind in ('dev', 'gunicorn'):
+            result = measure(kind, data_dir, args.clients, args.seconds)
+            print(f"{result['server']:<10} {result['requests_per_s']:>8.1f} {result['p50_ms']:>8.1f} "
+                  f"{result['p95_ms']:>8.1f} {result['max_ms']:>8.1f} {result['slow_completed']:>5} "
+                  f"{result['errors']:>6}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rendering the generated dashboard client over a synthetic inventory
+
+Builds the dashboard, runs its script through tests/dashboard_render_bench.js
+(a DOM shim, node required) and prints each phase's time and DOM operations.
+
+Also times the search box (median of five runs) over the prebuilt trigram index.
+
+Usage: python3 tests/dashboard_bench.py [--servers 10000]
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from test_dashboard_render import BENCH_SCRIPT, NODE, SEARCH_QUERIES, build_dashboard, synthetic_servers
+from search_index import build_search_index
+
+PHASES = ['initial', 'delta', 'unchanged', 'filter', 'filterBack', 'scroll', 'fullBuild']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--servers', type=int, default=10000, help='inventory size')
+    args = parser.parse_args()
+    if not NODE:
+        print('node is required', file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generator = build_dashboard(tmp)
+        with open(generator.TEMPLATE_FILE) as f:
+            script = re.search(r'<script src="/assets/([^"]+)"', f.read()).group(1)
+        servers = synthetic_servers(args.servers)
+        servers_path = os.path.join(tmp, 'servers.json')
+        index_path = os.path.join(tmp, 'search_index.json')
+        for path, data in ((servers_path, servers), (index_path, build_search_index(servers, version=1))):
+            with open(path, 'w') as f:
+                json.dump(data, f)
+
+        output = subprocess.run(
+            [NODE, '--expose-gc', BENCH_SCRIPT, os.path.join(generator.ASSETS_DIR, script),
+             servers_path, index_path] + SEARCH_QUERIES,
+            capture_output=True, text=True, check=True)
+        results = json.loads(output.stdout)
+
+    print(f"{args.servers} servers")
+    print(f"{'phase':>10} {'ms':>8} {'attached':>8} {'created':>8} {'removed':>8} {'innerHTML':>9}")
+    for phase in PHASES:
+        result = results[phase]
+        print(f"{phase:>10} {result['ms']:>8.1f} {result['attached']:>8} {result['created']:>8} "
+              f"{result['removed']:>8} {result['innerHTML']:>9}")
+    print(f"\n{'search':>14} {'ms':>8} {'matches':>8}")
+    for query, result in results['search'].items():
+        print(f"{query:>14} {result['ms']:>8.2f} {len(result['matches']):>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
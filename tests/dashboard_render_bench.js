@@ -0,0 +1,174 @@
+#!/usr/bin/env node
+/*
+ * Render benchmark for the generated dashboard script, run by test_dashboard_render.py
+ * and dashboard_bench.py
+ *
+ * Loads the dashboard <script> into a minimal DOM shim (no browser needed),
+ * renders a synthetic inventory and prints timings and DOM operation counts
+ * as JSON.
+ *
+ * Usage: node dashboard_render_bench.js <dashboard.js> <servers.json> [search_index.json query...]
+ */
+
+const fs = require('fs');
+const vm = require('vm');
+
+const stats = { created: 0, inserted: 0, removed: 0, innerHTML: 0 };
+let listTop = 0;
+
+class Element {
+    constructor(tag) {
+        this.tagName = tag.toUpperCase();
+        this.childNodes = [];
+        this.parentNode = null;
+        this.className = '';
+        this.style = {};
+        this.dataset = {};
+        this._text = '';
+        const element = this;
+        this.classList = {
+            contains: name => element.className.split(' ').includes(name),
+            add: name => element.classList.toggle(name, true),
+            remove: name => element.classList.toggle(name, false),
+            toggle(name, force) {
+                const names = element.className.split(' ').filter(n => n && n !== name);
+                if (force === undefined ? !this.contains(name) : force) names.push(name);
+                element.className = names.join(' ');
+            }
+        };
+    }
+
+    get firstChild() { return this.childNodes[0] || null; }
+    get lastChild() { return this.childNodes[this.childNodes.length - 1] || null; }
+    get children() { return this.childNodes; }
+    get clientWidth() { return 1180; }
+
+    appendChild(child) { return this.insertBefore(child, null); }
+
+    insertBefore(child, reference) {
+        if (child.parentNode) child.parentNode.removeChild(child);
+        const index = reference ? this.childNodes.indexOf(reference) : -1;
+        if (index < 0) this.childNodes.push(child);
+        else this.childNodes.splice(index, 0, child);
+        child.parentNode = this;
+        stats.inserted++;
+        return child;
+    }
+
+    removeChild(child) {
+        this.childNodes.splice(this.childNodes.indexOf(child), 1);
+        child.parentNode = null;
+        stats.removed++;
+        return child;
+    }
+
+    set textContent(value) { this.childNodes = []; this._text = String(value); }
+    get textContent() { return this._text + this.childNodes.map(c => c.textContent).join(''); }
+
+    set innerHTML(value) {
+        this.childNodes.forEach(child => { child.parentNode = null; });
+        this.childNodes = [];
+        this._text = String(value);
+        stats.innerHTML++;
+    }
+
+    // Only '.class' selectors, which is all the card code uses
+    querySelector(selector) {
+        const name = selector.slice(1);
+        for (const child of this.childNodes) {
+            if (child.classList.contains(name)) return child;
+            const found = child.querySelector(selector);
+            if (found) return found;
+        }
+        return null;
+    }
+    querySelectorAll() { return []; }
+    addEventListener() {}
+    getBoundingClientRect() { return { top: this.id === 'server-list' ? listTop : 0 }; }
+}
+
+const elements = {};
+const document = {
+    createElement(tag) { stats.created++; return new Element(tag); },
+    getElementById(id) {
+        if (!elements[id]) {
+            elements[id] = new Element('div');
+            elements[id].id = id;
+        }
+        return elements[id];
+    },
+    querySelectorAll() { return []; },
+    addEventListener() {}
+};
+
+const context = {
+    document,
+    console,
+    innerHeight: 900,
+    addEventListener() {},
+    requestAnimationFrame: callback => callback(),
+    setInterval() {},
+    setTimeout() {},
+    clearInterval() {},
+    JSON, Math, Map, Set, Array, Object, String, Date
+};
+context.window = context;
+vm.createContext(context);
+
+const [scriptPath, serversPath, indexPath, ...queries] = process.argv.slice(2);
+vm.runInContext(fs.readFileSync(scriptPath, 'utf8'), context);
+
+const servers = JSON.parse(fs.readFileSync(serversPath, 'utf8'));
+const count = servers.length;
+context.benchServers = servers;
+
+function measure(source) {
+    Object.keys(stats).forEach(key => { stats[key] = 0; });
+    const started = process.hrtime.bigint();
+    vm.runInContext(source, context);
+    const ms = Number(process.hrtime.bigint() - started) / 1e6;
+    const list = document.getElementById('server-list');
+    return Object.assign({ ms, attached: list.childNodes.length }, stats);
+}
+
+const results = {
+    count,
+    initial: measure('allServers = benchServers; renderServers();'),
+    // One host flips status: only its card is rebuilt
+    delta: measure(`allServers = allServers.slice();
+                    allServers[1] = Object.assign({}, allServers[1], { status: 'offline' });
+                    renderServers();`),
+    unchanged: measure('renderServers();'),
+    filter: measure("currentFilter = 'linux'; renderServers();"),
+    filterBack: measure("currentFilter = 'all'; renderServers();")
+};
+listTop = -150000;
+results.scroll = measure('renderWindow();');
+// What a full rebuild of every card costs, for comparison
+results.fullBuild = measure('benchServers.forEach(createServerCard);');
+
+if (indexPath) {
+    context.benchIndex = JSON.parse(fs.readFileSync(indexPath, 'utf8'));
+    vm.runInContext(`searchIndex = Object.assign(benchIndex, { common: new Set(benchIndex.common), decoded: new Map() });
+                     inventoryVersion = searchIndex.version;
+                     searchServers('..');  // warm the per-record search text cache`, context);
+    results.search = {};
+    for (const query of queries) {
+        // Median of five runs
+        const runs = [];
+        let matches;
+        for (let run = 0; run < 5; run++) {
+            // Collect garbage left by earlier phases so it is not billed to the search
+            if (global.gc) global.gc();
+            const started = process.hrtime.bigint();
+            matches = vm.runInContext(`searchServers(${JSON.stringify(query)})`, context);
+            runs.push(Number(process.hrtime.bigint() - started) / 1e6);
+        }
+        matches = vm.runInContext('allServers', context)
+            .filter((server, position) => matches[position]).map(server => server.ip);
+        runs.sort((a, b) => a - b);
+        results.search[query] = { ms: runs[2], matches: matches.sort() };
+    }
+}
+
+process.stdout.write(JSON.stringify(results));
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fleet command fan-out, cold and with pooled connections
+
+Starts local paramiko sshd stand-ins (with per-command latency), then runs the
+same command on all of them twice per concurrency level: once with an empty
+session pool (a handshake per host) and once reusing the pooled connections.
+
+Usage: python3 tests/fleet_bench.py [--hosts 200] [--delay 0.2] [--concurrency 1 32 128]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fleet import run_fleet, summarize
+from ssh_sessions import SessionPool
+from ssh_server_standin import StandinHost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=200, help='stand-in hosts')
+    parser.add_argument('--delay', type=float, default=0.2, help='per-command latency (s)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 32, 128])
+    args = parser.parse_args()
+
+    hosts = [StandinHost(delay=args.delay) for _ in range(args.hosts)]
+    targets = [{'ip': '127.0.0.1', 'port': host.port, 'password': 'secret'} for host in hosts]
+    print(f"{args.hosts} hosts ({args.delay:g}s latency), command: uptime")
+    print(f"{'concurrency':>11} {'cold s':>7} {'warm s':>7} {'ok':>4} {'groups':>6} {'reuse':>6}")
+    for concurrency in args.concurrency:
+        pool = SessionPool(max_sessions=args.hosts)
+        timings = []
+        for _ in range(2):
+            started = time.monotonic()
+            results = run_fleet(pool, targets, 'uptime', concurrency=concurrency)
+            timings.append(time.monotonic() - started)
+        summary = summarize(results)
+        print(f"{concurrency:>11} {timings[0]:>7.2f} {timings[1]:>7.2f} {summary['succeeded']:>4} "
+              f"{len(summary['groups']):>6} {pool.metrics()['reuse_rate']:>6.2f}")
+        pool.close_all()
+    for host in hosts:
+        host.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
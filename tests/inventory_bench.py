@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark: indexed inventory lookups against linear scans of the server list
+
+Builds a synthetic inventory and times building it, IP/URL lookups, a
+type+status select and a filtered, sorted page, with the linear scan of the
+JSON document the indexes replaced for comparison.
+
+Usage: python3 tests/inventory_bench.py [--servers 10000]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from inventory import query_servers
+from test_inventory import build_inventory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--servers', type=int, default=10000, help='inventory size')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    inventory = build_inventory(args.servers)
+    build_time = time.perf_counter() - started
+
+    ips = [record.ip for record in inventory]
+    documents = inventory.to_document()['servers']
+
+    started = time.perf_counter()
+    for ip in ips:
+        inventory.get(ip)
+        inventory.by_url(f"https://{ip}")
+    indexed_time = time.perf_counter() - started
+
+    # A 1% sample, scaled up: scanning for every host would take minutes
+    started = time.perf_counter()
+    for ip in ips[::100]:
+        next(s for s in documents if s['url'].replace('https://', '').split('/')[0] == ip)
+    linear_time = (time.perf_counter() - started) * 100
+
+    started = time.perf_counter()
+    inventory.select(type='linux', status='online')
+    select_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    query_servers(inventory, status='online', sort='-last_seen', limit=100)
+    page_time = time.perf_counter() - started
+
+    print(f"{args.servers} servers")
+    print(f"{'build':>28} {build_time * 1000:>9.1f}ms")
+    print(f"{f'{len(ips) * 2} indexed lookups':>28} {indexed_time * 1000:>9.1f}ms")
+    print(f"{'equivalent linear scans':>28} {linear_time * 1000:>9.0f}ms")
+    print(f"{'select type+status':>28} {select_time * 1000:>9.2f}ms")
+    print(f"{'filtered/sorted page':>28} {page_time * 1000:>9.1f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Minimal WSGI app for tests/test_gunicorn_config.py: GET /start queues a job
+that sleeps JOB_SECONDS, any other path answers with the worker's pid
+"""
+
+import os
+import time
+
+from jobs import JobStore, JobRunner
+
+JOB_SECONDS = float(os.environ.get('JOB_SECONDS', '3'))
+
+runner = JobRunner(JobStore(os.environ['JOBS_DB']))
+
+
+def slow_job(job):
+    time.sleep(JOB_SECONDS)
+    return {'pid': os.getpid()}
+
+
+def app(environ, start_response):
+    if environ['PATH_INFO'] == '/start':
+        body = f"{runner.submit('sleep', slow_job)} {os.getpid()}"
+    else:
+        body = str(os.getpid())
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [body.encode()]
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark: console reachability answers from the liveness cache
+
+Probes a local listener once, then times repeated lookups answered from the
+cached probe and from a fresh scan result, against an uncached probe.
+
+Usage: python3 tests/liveness_bench.py [--lookups 100000]
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from inventory import ServerRecord
+from liveness import LivenessCache
+
+
+def time_lookups(cache, ip, record, lookups):
+    """Microseconds per check() over lookups calls"""
+    started = time.perf_counter()
+    for _ in range(lookups):
+        cache.check(ip, record)
+    return (time.perf_counter() - started) / lookups * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lookups', type=int, default=100000, help='cached lookups per case')
+    args = parser.parse_args()
+
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(16)
+    port = listener.getsockname()[1]
+    try:
+        offline = ServerRecord('127.0.0.1', status='offline', ports={str(port): True})
+        online = ServerRecord('127.0.0.2', status='online', ports={str(port): True},
+                              last_seen=datetime.now(timezone.utc).isoformat())
+        cache = LivenessCache(timeout=0.5)
+
+        started = time.perf_counter()
+        cache.check('127.0.0.1', offline)
+        probe_us = (time.perf_counter() - started) * 1e6
+
+        print(f"{'answer':>12} {'us/lookup':>10}")
+        print(f"{'probe':>12} {probe_us:>10.1f}")
+        print(f"{'cached probe':>12} {time_lookups(cache, '127.0.0.1', offline, args.lookups):>10.2f}")
+        print(f"{'scan':>12} {time_lookups(cache, '127.0.0.2', online, args.lookups):>10.2f}")
+        print(cache.metrics())
+    finally:
+        listener.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
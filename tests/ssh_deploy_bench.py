@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SSH key deployment one host at a time vs. with bounded concurrency
+
+Starts local paramiko sshd stand-ins (with per-command latency) plus a few
+hung hosts that accept TCP but never answer, then times ssh_deploy.deploy_keys
+at each concurrency level.
+
+Usage: python3 tests/ssh_deploy_bench.py [--hosts 50] [--hung 3] [--delay 0.2] [--timeout 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import paramiko
+from ssh_deploy import deploy_keys
+from ssh_server_standin import StandinHost, BlackholeHost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=50, help='reachable stand-in hosts')
+    parser.add_argument('--hung', type=int, default=3, help='hosts that never answer')
+    parser.add_argument('--delay', type=float, default=0.2, help='per-command latency (s)')
+    parser.add_argument('--timeout', type=float, default=3, help='per-host timeout (s)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    key = paramiko.RSAKey.generate(2048)
+    public_key = f"ssh-rsa {key.get_base64()} bench@example.com"
+    print(f"{args.hosts} hosts ({args.delay:g}s latency) + {args.hung} hung, "
+          f"{args.timeout:g}s per-host timeout")
+    print(f"{'concurrency':>11} {'seconds':>8} {'ok':>4} {'failed':>6}")
+    for concurrency in args.concurrency:
+        # Fresh hosts each round, so every run really appends the key
+        hosts = [StandinHost(delay=args.delay) for _ in range(args.hosts)]
+        hung = [BlackholeHost() for _ in range(args.hung)]
+        targets = [{'ip': '127.0.0.1', 'port': host.port, 'password': 'secret'}
+                   for host in hosts + hung]
+        started = time.monotonic()
+        results = deploy_keys(targets, public_key, concurrency=concurrency, timeout=args.timeout)
+        elapsed = time.monotonic() - started
+        ok = sum(1 for result in results if result['success'])
+        print(f"{concurrency:>11} {elapsed:>8.2f} {ok:>4} {len(results) - ok:>6}")
+        for host in hosts + hung:
+            host.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
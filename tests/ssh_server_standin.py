@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Local sshd stand-in for the SSH deployment tests and benchmark
+
+A paramiko server per "host" on 127.0.0.1 that accepts one password and any
+key listed in its own authorized_keys, and runs exec requests with sh in a
+private HOME directory. 'delay' adds per-command latency; BlackholeHost
+accepts TCP connections but never speaks SSH, like a hung host.
+"""
+
+import os
+import socket
+import logging
+import tempfile
+import threading
+import subprocess
+
+import paramiko
+
+# Clients dropping connections mid-handshake is expected here
+logging.getLogger('paramiko').setLevel(logging.CRITICAL)
+
+_HOST_KEY = None
+_HOST_KEY_LOCK = threading.Lock()
+
+
+def host_key():
+    """One RSA host key shared by every stand-in (generating keys is slow)"""
+    global _HOST_KEY
+    with _HOST_KEY_LOCK:
+        if _HOST_KEY is None:
+            _HOST_KEY = paramiko.RSAKey.generate(2048)
+        return _HOST_KEY
+
+
+class _Server(paramiko.ServerInterface):
+    def __init__(self, host):
+        self.host = host
+
+    def get_allowed_auths(self, username):
+        return 'publickey,password'
+
+    def check_auth_password(self, username, password):
+        if username == self.host.username and password == self.host.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_auth_publickey(self, username, key):
+        if username == self.host.username and self.host.authorizes(key):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self.host.run, args=(channel, command), daemon=True).start()
+        return True
+
+
+class StandinHost:
+    """One SSH host listening on 127.0.0.1:<port>"""
+
+    def __init__(self, username='root', password='secret', delay=0.0):
+        self.username = username
+        self.password = password
+        self.delay = delay
+        self.home = tempfile.mkdtemp(prefix='ssh-standin-')
+        self.commands = 0
+        self.connections = 0
+        self._transports = []
+        self._sock = socket.socket()
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(('127.0.0.1', 0))
+        self._sock.listen(64)
+        self.port = self._sock.getsockname()[1]
+        self._closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    @property
+    def authorized_keys(self):
+        return os.path.join(self.home, '.ssh', 'authorized_keys')
+
+    def authorizes(self, key):
+        try:
+            with open(self.authorized_keys) as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return False
+        wanted = f"{key.get_name()} {key.get_base64()}"
+        return any(line.startswith(wanted) for line in lines)
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        transport = paramiko.Transport(conn)
+        transport.add_server_key(host_key())
+        self.connections += 1
+        self._transports.append(transport)
+        try:
+            transport.start_server(server=_Server(self))
+            channel = transport.accept(30)
+            if channel is not None:
+                # Let the command finish before the transport goes away
+                channel.status_event.wait(60)
+        except (paramiko.SSHException, EOFError, OSError):
+            pass
+
+    def run(self, channel, command):
+        stdin = b''
+        while True:
+            data = channel.recv(65536)
+            if not data:
+                break
+            stdin += data
+        if self.delay:
+            threading.Event().wait(self.delay)
+        self.commands += 1
+        result = subprocess.run(['sh', '-c', command.decode()], input=stdin, capture_output=True,
+                                env={'HOME': self.home, 'PATH': os.environ.get('PATH', '/usr/bin:/bin')})
+        channel.sendall(result.stdout)
+        channel.sendall_stderr(result.stderr)
+        channel.send_exit_status(result.returncode)
+        channel.close()
+
+    def drop_connections(self):
+        """Close every open connection, as a host reboot would"""
+        for transport in self._transports:
+            transport.close()
+        self._transports = []
+
+    def close(self):
+        self._closed = True
+        self._sock.close()
+        self.drop_connections()
+
+
+class BlackholeHost:
+    """Accepts TCP connections and never answers, like a host whose sshd is hung"""
+
+    def __init__(self):
+        self._sock = socket.socket()
+        self._sock.bind(('127.0.0.1', 0))
+        self._sock.listen(64)
+        self.port = self._sock.getsockname()[1]
+        self._held = []
+        self._closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                self._held.append(self._sock.accept()[0])
+            except OSError:
+                return
+
+    def close(self):
+        self._closed = True
+        self._sock.close()
+        for conn in self._held:
+            conn.close()
@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+"""
+Route-level tests for the Container API (Flask test client)
+"""
+
+import unittest
+import io
+import os
+import sys
+import json
+import time
+import tarfile
+import zipfile
+import tempfile
+import threading
+import importlib.util
+from unittest import mock
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src')
+
+# Add src directory to path for importing modules
+sys.path.insert(0, SRC_DIR)
+
+import jobs
+import inventory_store
+import availability_log
+import exporters
+from inventory_store import InventoryStore
+from launchers import launcher_name
+
+# idrac-container-api.py is not an importable module name, so load it by path
+_spec = importlib.util.spec_from_file_location(
+    'idrac_container_api', os.path.join(SRC_DIR, 'idrac-container-api.py'))
+api = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(api)
+
+SINGLETONS = ('_store', '_journal', '_availability_log', '_job_runner', '_ssh_pool',
+              '_inventory_cache', '_liveness', '_export_cache')
+
+
+def server(ip, type='linux', status='online', **fields):
+    record = {'ip': ip, 'url': f'https://{ip}', 'type': type, 'title': f'{type} {ip}',
+              'status': status, 'ports': {}, 'services': []}
+    record.update(fields)
+    return record
+
+
+class APITestCase(unittest.TestCase):
+    """An API with its inventory, data, downloads and jobs in a temporary directory"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = os.path.join(self.tmp.name, 'data')
+        patches = [
+            mock.patch.object(api, 'DATA_DIR', self.data_dir),
+            mock.patch.object(api, 'DOWNLOADS_DIR', os.path.join(self.tmp.name, 'downloads')),
+            mock.patch.object(jobs, 'DB_FILE', os.path.join(self.tmp.name, 'jobs.db')),
+            mock.patch.object(inventory_store, 'DB_FILE', os.path.join(self.tmp.name, 'inventory.db')),
+            mock.patch.object(availability_log, 'AVAILABILITY_DIR',
+                              os.path.join(self.tmp.name, 'availability')),
+            mock.patch('builtins.print')
+        ]
+        patches += [mock.patch.object(api, name, None) for name in SINGLETONS]
+        patches.append(mock.patch.object(api, '_open_streams', 0))
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        os.makedirs(self.data_dir)
+        self.client = api.app.test_client()
+
+    def tearDown(self):
+        if api._job_runner is not None:
+            api._job_runner.shutdown()
+        if api._ssh_pool is not None:
+            api._ssh_pool.close_all()
+        if api._store is not None:
+            api._store.close()
+        self.tmp.cleanup()
+
+    def seed(self, servers):
+        """Save servers as a scan would; returns the inventory version"""
+        store = InventoryStore(data_dir=self.data_dir)
+        try:
+            store.save_document({'servers': servers, 'last_scan': '', 'scan_count': 1})
+            return store.version()
+        finally:
+            store.close()
+
+    def read_events(self, response, count):
+        """Read count Server-Sent Events messages from a streamed response, then close it
+
+        Each message is a dict of its fields (data parsed as JSON); a comment
+        line comes back as {'comment': text}.
+        """
+        messages = []
+        buffer = ''
+        chunks = iter(response.response)
+        try:
+            while len(messages) < count:
+                buffer += next(chunks).decode('utf-8')
+                while '\n\n' in buffer and len(messages) < count:
+                    message, buffer = buffer.split('\n\n', 1)
+                    fields = {}
+                    for line in message.split('\n'):
+                        name, _, value = line.partition(':')
+                        if name == '':
+                            fields['comment'] = value.strip()
+                        else:
+                            fields[name] = json.loads(value) if name == 'data' else value.strip()
+                    messages.append(fields)
+        finally:
+            response.close()
+        return messages
+
+    def command(self, name, **params):
+        return self.client.post('/', json={'command': name, 'params': params})
+
+    def wait_for_job(self, response, timeout=10):
+        self.assertEqual(response.status_code, 202, response.get_json())
+        job_url = response.get_json()['job_url']
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = self.client.get(job_url).get_json()
+            if job['status'] not in jobs.ACTIVE:
+                return job
+            time.sleep(0.02)
+        self.fail(f'{job_url} did not finish')
+
+
+class TestFleetSelection(APITestCase):
+    """Test which servers a run_fleet selector reaches"""
+
+    def setUp(self):
+        super().setUp()
+        self.seed([
+            server('10.0.0.1', 'linux'),
+            server('10.0.0.2', 'windows'),
+            server('10.0.0.3', 'vnc'),
+            server('10.0.0.4', 'idrac', ports={'22': True},
+                   services=[{'type': 'ssh', 'port': 2222}]),
+            server('10.0.0.5', 'idrac'),
+            server('10.0.0.6', 'proxmox')
+        ])
+        self.targets = []
+
+        def run_fleet(pool, targets, command, **kwargs):
+            self.targets = targets
+            return []
+
+        patch = mock.patch.object(api.fleet, 'run_fleet', run_fleet)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_selector_skips_hosts_without_ssh(self):
+        """Test that a type-less selector only targets hosts with SSH, on their scanned port"""
+        job = self.wait_for_job(self.command('run_fleet', command='uptime'))
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual([(t['ip'], t['port']) for t in self.targets],
+                         [('10.0.0.1', 22), ('10.0.0.4', 2222), ('10.0.0.6', 22)])
+        self.assertEqual(job['params']['skipped_without_ssh'], 3)
+
+    def test_no_ssh_hosts_selected(self):
+        """Test that a selector matching only hosts without SSH is refused"""
+        response = self.command('run_fleet', command='uptime', type=['windows', 'vnc'])
+        self.assertEqual(response.status_code, 400)
+
+    def test_key_deploy_targets_match_fleet(self):
+        """Test that key deployment reaches the same hosts, on the same ports, as a fleet command"""
+        key_path = os.path.join(self.tmp.name, 'server_rsa')
+        with open(key_path + '.pub', 'w') as f:
+            f.write('ssh-rsa AAAA test\n')
+        deployed = []
+
+        def deploy_keys(targets, public_key, **kwargs):
+            deployed.extend(targets)
+            return []
+
+        with mock.patch.object(api, 'SSH_KEY_PATH', key_path), \
+                mock.patch.object(api.ssh_deploy, 'deploy_keys', deploy_keys):
+            self.wait_for_job(self.command('deploy_ssh_keys'))
+        self.wait_for_job(self.command('run_fleet', command='uptime'))
+        self.assertEqual([(t['ip'], t['port']) for t in deployed],
+                         [(t['ip'], t['port']) for t in self.targets])
+
+    def test_explicit_ips_are_targeted(self):
+        """Test that hosts named by ips are targeted even without a scanned SSH port"""
+        self.wait_for_job(self.command('run_fleet', command='uptime', ips=['10.0.0.2']))
+        self.assertEqual([t['ip'] for t in self.targets], ['10.0.0.2'])
+
+
+
+class TestServerRoutes(APITestCase):
+    """Test the server query, summary and changes endpoints"""
+
+    def setUp(self):
+        super().setUp()
+        self.servers = [server(f'10.0.0.{i}', ('linux', 'idrac')[i % 2],
+                               'online' if i % 3 else 'offline') for i in range(1, 11)]
+        self.version = self.seed(self.servers)
+
+    def test_routes_without_api_prefix(self):
+        """Test that every route also answers without /api, as nginx forwards it"""
+        for path in ('/servers', '/servers/summary', '/servers/changes?since=0'):
+            self.assertEqual(self.client.get(path).get_json(),
+                             self.client.get('/api' + path).get_json(), path)
+
+    def test_filter_fields_and_pages(self):
+        """Test that filters, fields and cursors page through matching servers"""
+        first = self.client.get('/api/servers?type=linux&sort=-ip&limit=3&fields=ip,type').get_json()
+        self.assertEqual(first['total'], 5)
+        self.assertEqual(first['version'], self.version)
+        self.assertEqual(first['servers'], [{'ip': f'10.0.0.{i}', 'type': 'linux'} for i in (10, 8, 6)])
+
+        second = self.client.get('/api/servers', query_string={
+            'type': 'linux', 'sort': '-ip', 'limit': 3, 'cursor': first['next_cursor']}).get_json()
+        self.assertEqual([s['ip'] for s in second['servers']], ['10.0.0.4', '10.0.0.2'])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_invalid_query(self):
+        """Test that an unknown sort key, bad limit or bad cursor is a 400"""
+        for query in ('sort=password', 'limit=0', 'cursor=not-a-cursor'):
+            response = self.client.get(f'/api/servers?{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn('error', response.get_json())
+
+    def test_summary(self):
+        """Test that the summary holds counts and no records"""
+        summary = self.client.get('/api/servers/summary').get_json()
+        self.assertEqual((summary['total'], summary['online']), (10, 7))
+        self.assertEqual(summary['by_type'], {'linux': 5, 'idrac': 5})
+        self.assertNotIn('servers', summary)
+
+    def test_changes(self):
+        """Test deltas from a known version and the full document otherwise"""
+        self.servers[0]['title'] = 'renamed'
+        version = self.seed(self.servers[:-1])
+
+        changes = self.client.get(f'/api/servers/changes?since={self.version}').get_json()
+        self.assertEqual((changes['full'], changes['version']), (False, version))
+        self.assertEqual([s['ip'] for s in changes['modified']], ['10.0.0.1'])
+        self.assertEqual(changes['removed'], [{'ip': '10.0.0.10', 'url': 'https://10.0.0.10'}])
+
+        for since in (0, version + 1):
+            changes = self.client.get(f'/api/servers/changes?since={since}').get_json()
+            self.assertTrue(changes['full'])
+            self.assertEqual(len(changes['servers']), 9)
+        self.assertEqual(self.client.get('/api/servers/changes?since=x').status_code, 400)
+
+
+class TestInventoryEvents(APITestCase):
+    """Test the /api/events stream"""
+
+    def setUp(self):
+        super().setUp()
+        self.servers = [server('10.0.0.1'), server('10.0.0.2'), server('10.0.0.3')]
+        self.version = self.seed(self.servers)
+        for name, value in (('EVENT_POLL_INTERVAL', 0), ('EVENT_HEARTBEAT', 60)):
+            patch = mock.patch.object(api, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_framing(self):
+        """Test the stream headers, the retry hint and id-tagged inventory events"""
+        store = InventoryStore(data_dir=self.data_dir)
+        store.set_scan_progress({'scanned': 5, 'total': 10})
+        store.close()
+
+        response = self.client.get('/api/events?since=0', buffered=False)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        self.assertEqual(response.headers['X-Accel-Buffering'], 'no')
+
+        retry, inventory, scan = self.read_events(response, 3)
+        self.assertEqual(retry, {'retry': '5000'})
+        self.assertEqual((inventory['event'], inventory['id']), ('inventory', str(self.version)))
+        self.assertEqual(scan, {'event': 'scan', 'data': {'scanned': 5, 'total': 10}})
+
+    def test_full_document_fallback(self):
+        """Test that a version the store cannot answer a delta for gets the full document"""
+        for since in (0, self.version + 5):
+            response = self.client.get(f'/api/events?since={since}', buffered=False)
+            inventory = self.read_events(response, 2)[1]
+            self.assertTrue(inventory['data']['full'], since)
+            self.assertEqual([s['ip'] for s in inventory['data']['servers']],
+                             ['10.0.0.1', '10.0.0.2', '10.0.0.3'])
+
+    def test_resume_from_last_event_id(self):
+        """Test that Last-Event-ID wins over ?since= and replays only what was missed"""
+        self.servers[1]['status'] = 'offline'
+        version = self.seed(self.servers)
+
+        response = self.client.get('/api/events?since=0', buffered=False,
+                                   headers={'Last-Event-ID': str(self.version)})
+        inventory = self.read_events(response, 2)[1]
+        self.assertEqual(inventory['id'], str(version))
+        self.assertFalse(inventory['data']['full'])
+        self.assertEqual(inventory['data']['since'], self.version)
+        self.assertEqual([s['ip'] for s in inventory['data']['modified']], ['10.0.0.2'])
+
+    def test_heartbeat(self):
+        """Test that a quiet stream sends keep-alive comments"""
+        with mock.patch.object(api, 'EVENT_HEARTBEAT', 0):
+            response = self.client.get(f'/api/events?since={self.version}', buffered=False)
+            self.assertEqual(self.read_events(response, 3)[1:],
+                             [{'comment': 'keep-alive'}, {'comment': 'keep-alive'}])
+
+    def test_invalid_version(self):
+        """Test that a non-numeric version is a 400"""
+        self.assertEqual(self.client.get('/api/events?since=x').status_code, 400)
+        self.assertEqual(self.client.get('/events', headers={'Last-Event-ID': 'x'}).status_code, 400)
+
+
+
+class TestStreamLimit(APITestCase):
+    """Test the per-worker cap on open event streams"""
+
+    def setUp(self):
+        super().setUp()
+        self.version = self.seed([server('10.0.0.1')])
+        patch = mock.patch.object(api, 'MAX_EVENT_STREAMS', 2)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_stream_over_cap_is_refused(self):
+        """Test that the cap+1th stream gets 503 with Retry-After while /health still answers"""
+        streams = [self.client.get('/api/events', buffered=False) for _ in range(2)]
+        self.assertEqual([stream.status_code for stream in streams], [200, 200])
+
+        refused = self.client.get('/api/events', buffered=False)
+        self.assertEqual(refused.status_code, 503)
+        self.assertEqual(refused.headers['Retry-After'], str(api.STREAM_RETRY_AFTER))
+        self.assertEqual(self.client.get('/health').status_code, 200)
+        self.assertEqual(self.client.get('/api/metrics').get_json()['event_streams'], {'open': 2, 'max': 2})
+
+        streams.pop().close()
+        self.assertEqual(api._open_streams, 1)
+        reopened = self.client.get(f'/api/events?since={self.version}', buffered=False)
+        self.assertEqual(reopened.status_code, 200)
+        for stream in streams + [reopened]:
+            stream.close()
+        self.assertEqual(api._open_streams, 0)
+
+    def test_job_streams_share_the_cap(self):
+        """Test that job event streams count against the same cap"""
+        job_id = api.get_job_runner().submit('test', lambda job: None)
+        streams = [self.client.get('/api/events', buffered=False) for _ in range(2)]
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/events').status_code, 503)
+        for stream in streams:
+            stream.close()
+
+
+class TestJobEvents(APITestCase):
+    """Test the /api/jobs/<id>/events stream"""
+
+    def setUp(self):
+        super().setUp()
+        for name, value in (('JOB_POLL_INTERVAL', 0), ('EVENT_HEARTBEAT', 60)):
+            patch = mock.patch.object(api, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        super().tearDown()
+
+    def start(self, wait=False):
+        """Submit a job with three steps that finishes (once released, if wait); returns its id"""
+        def work(job):
+            for host in ('a', 'b', 'c'):
+                job.step({'host': host})
+            if wait:
+                self.release.wait(10)
+            return {'hosts': 3}
+        return api.get_job_runner().submit('test', work, total=3)
+
+    def finished(self, job_id):
+        """Wait for job_id to finish"""
+        deadline = time.monotonic() + 10
+        while api.get_job_runner().store.get(job_id, include_result=False)['status'] in jobs.ACTIVE:
+            self.assertLess(time.monotonic(), deadline, f'{job_id} did not finish')
+            time.sleep(0.02)
+        return job_id
+
+    def test_framing(self):
+        """Test the stream headers, id-tagged steps and the final document"""
+        job_id = self.finished(self.start())
+        response = self.client.get(f'/api/jobs/{job_id}/events', buffered=False)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        self.assertEqual(response.headers['X-Accel-Buffering'], 'no')
+
+        messages = self.read_events(response, 5)
+        self.assertEqual(messages[0], {'retry': '2000'})
+        self.assertEqual(messages[1:4], [{'id': str(seq), 'event': 'step', 'data': {'host': host}}
+                                         for seq, host in ((1, 'a'), (2, 'b'), (3, 'c'))])
+        done = messages[4]
+        self.assertEqual((done['event'], done['id']), ('done', '3'))
+        self.assertEqual((done['data']['status'], done['data']['result']), ('succeeded', {'hosts': 3}))
+
+    def test_resume_from_last_event_id(self):
+        """Test that Last-Event-ID wins over ?steps_since= and skips the steps already seen"""
+        job_id = self.finished(self.start())
+        response = self.client.get(f'/jobs/{job_id}/events?steps_since=0', buffered=False,
+                                   headers={'Last-Event-ID': '2'})
+        messages = self.read_events(response, 3)
+        self.assertEqual(messages[1], {'id': '3', 'event': 'step', 'data': {'host': 'c'}})
+        self.assertEqual(messages[2]['event'], 'done')
+
+    def test_progress_and_heartbeat(self):
+        """Test that a running job reports progress once, then keep-alive comments"""
+        job_id = self.start(wait=True)
+        deadline = time.monotonic() + 10
+        while len(api.get_job_runner().store.steps_since(job_id)) < 3:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.02)
+
+        with mock.patch.object(api, 'EVENT_HEARTBEAT', 0):
+            response = self.client.get(f'/api/jobs/{job_id}/events?steps_since=3', buffered=False)
+            messages = self.read_events(response, 4)
+        self.assertEqual(messages[1]['event'], 'progress')
+        self.assertNotIn('id', messages[1])
+        self.assertEqual((messages[1]['data']['status'], messages[1]['data']['progress']['done']),
+                         ('running', 3))
+        self.assertEqual(messages[2:], [{'comment': 'keep-alive'}, {'comment': 'keep-alive'}])
+
+    def test_unknown_job_and_bad_step(self):
+        """Test that an unknown job is a 404 and a non-numeric step a 400"""
+        self.assertEqual(self.client.get('/api/jobs/nope/events').status_code, 404)
+        job_id = self.finished(self.start())
+        response = self.client.get(f'/api/jobs/{job_id}/events', headers={'Last-Event-ID': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+
+class TestExportRoutes(APITestCase):
+    """Test export downloads and archives: status codes, validators and bodies"""
+
+    def setUp(self):
+        super().setUp()
+        self.servers = [server('10.0.0.1', 'linux'), server('10.0.0.2', 'idrac'),
+                        server('10.0.0.3', 'windows')]
+        self.version = self.seed(self.servers)
+
+    def test_export_revalidates_by_etag(self):
+        """Test the first (streamed) and cached downloads and a 304 for a matching ETag"""
+        etag = f'"{exporters.ExportCache.etag("csv", self.version)}"'
+        first = self.client.get('/api/export/csv')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers['ETag'], etag)
+        self.assertEqual(first.headers['X-Export-Mode'], 'full')
+        self.assertEqual(first.headers['X-Inventory-Version'], str(self.version))
+        self.assertEqual(first.headers['Cache-Control'], 'no-cache')
+        self.assertIn(f'filename="{exporters.ExportCache(self.tmp.name).filename("csv", self.version)}"',
+                      first.headers['Content-Disposition'])
+        for record in self.servers:
+            self.assertIn(record['ip'], first.get_data(as_text=True))
+
+        cached = self.client.get('/export/csv')
+        self.assertEqual((cached.status_code, cached.headers['ETag']), (200, etag))
+        self.assertEqual(cached.get_data(), first.get_data())
+
+        not_modified = self.client.get('/api/export/csv', headers={'If-None-Match': etag})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.get_data(), b'')
+        self.assertEqual(not_modified.headers['ETag'], etag)
+
+    def test_incremental_export(self):
+        """Test that ?since= exports only the changes, or the full export when it cannot"""
+        self.servers[0]['status'] = 'offline'
+        version = self.seed(self.servers)
+
+        delta = self.client.get(f'/api/export/rdm/json?since={self.version}')
+        self.assertEqual(delta.status_code, 200)
+        self.assertEqual(delta.headers['X-Export-Mode'], 'incremental')
+        self.assertEqual(delta.headers['ETag'],
+                         f'"{exporters.ExportCache.etag("json", version, self.version)}"')
+        body = delta.get_data(as_text=True)
+        self.assertIn('10.0.0.1', body)
+        self.assertNotIn('10.0.0.2', body)
+
+        full = self.client.get(f'/api/export/json?since={version + 10}')
+        self.assertEqual(full.headers['X-Export-Mode'], 'full')
+        self.assertIn('10.0.0.2', full.get_data(as_text=True))
+
+    def test_export_errors(self):
+        """Test unknown formats, incremental non-RDM formats and an empty inventory"""
+        self.assertEqual(self.client.get('/api/export/pdf').status_code, 400)
+        self.assertEqual(self.client.get('/api/export/rdm/csv').status_code, 400)
+        self.assertEqual(self.client.get('/api/export/csv?since=1').status_code, 400)
+        self.seed([])
+        self.assertEqual(self.client.get('/api/export/archive').status_code, 400)
+
+    def test_archive(self):
+        """Test zip and tar archives of several formats and a 304 for a matching ETag"""
+        cache = exporters.ExportCache(self.tmp.name)
+        names = sorted(cache.filename(format, self.version) for format in ('csv', 'ansible'))
+
+        response = self.client.get('/api/export/archive?formats=csv,ansible')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'application/zip')
+        self.assertEqual(response.headers['X-Export-Mode'], 'full')
+        self.assertIn(f'filename="exports_v{self.version}.zip"', response.headers['Content-Disposition'])
+        with zipfile.ZipFile(io.BytesIO(response.get_data())) as archive:
+            self.assertEqual(sorted(archive.namelist()), names)
+            self.assertIn(b'10.0.0.3', archive.read(names[0]))
+
+        response = self.client.get('/export/archive?formats=csv,ansible&archive=tar')
+        self.assertEqual(response.headers['Content-Type'], 'application/gzip')
+        with tarfile.open(fileobj=io.BytesIO(response.get_data()), mode='r:gz') as archive:
+            self.assertEqual(sorted(archive.getnames()), names)
+
+        etag = response.headers['ETag']
+        not_modified = self.client.get('/api/export/archive?formats=csv,ansible&archive=tar',
+                                       headers={'If-None-Match': etag})
+        self.assertEqual((not_modified.status_code, not_modified.get_data()), (304, b''))
+        self.assertEqual(self.client.get('/api/export/archive?archive=rar').status_code, 400)
+        self.assertEqual(self.client.get('/api/export/archive?since=1').status_code, 400)
+
+
+class TestLauncherBundle(APITestCase):
+    """Test the launcher bundle download"""
+
+    def setUp(self):
+        super().setUp()
+        self.seed([server('10.0.0.1', 'linux'), server('10.0.0.2', 'idrac'),
+                   server('10.0.0.3', 'linux', 'offline')])
+
+    def test_zip_and_tar(self):
+        """Test that the bundle holds a launcher per matching server, in either archive"""
+        response = self.client.get('/api/launchers/bundle')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'application/zip')
+        self.assertIn('filename="launchers.zip"', response.headers['Content-Disposition'])
+        with zipfile.ZipFile(io.BytesIO(response.get_data())) as bundle:
+            self.assertEqual(sorted(bundle.namelist()), [launcher_name('idrac', '10.0.0.2'),
+                                                         launcher_name('linux', '10.0.0.1')])
+
+        response = self.client.get('/launchers/bundle?format=tar&type=linux&status=offline')
+        self.assertEqual(response.headers['Content-Type'], 'application/gzip')
+        with tarfile.open(fileobj=io.BytesIO(response.get_data()), mode='r:gz') as bundle:
+            self.assertEqual(bundle.getnames(), [launcher_name('linux', '10.0.0.3')])
+
+    def test_errors(self):
+        """Test that an unknown format is a 400 and an empty selection a 404"""
+        self.assertEqual(self.client.get('/api/launchers/bundle?format=rar').status_code, 400)
+        self.assertEqual(self.client.get('/api/launchers/bundle?type=vnc').status_code, 404)
+
+
+class TestSSHKeyGeneration(APITestCase):
+    """Test that key generation runs as a background job"""
+
+    def test_generate_ssh_key_job(self):
+        """Test that generate_ssh_key answers 202 and its job writes the key and admin config"""
+        key_path = os.path.join(self.tmp.name, 'server_rsa')
+        with mock.patch.object(api, 'SSH_KEY_PATH', key_path):
+            job = self.wait_for_job(self.command('generate_ssh_key', email='admin@example.com'), timeout=60)
+        self.assertEqual(job['status'], 'succeeded', job.get('error'))
+        with open(key_path + '.pub') as f:
+            self.assertEqual(job['result']['public_key'], f.read().strip())
+        with open(os.path.join(self.data_dir, 'admin_config.json')) as f:
+            self.assertEqual(json.load(f)['admin_email'], 'admin@example.com')
+
+    def test_email_required(self):
+        """Test that a missing email is refused before any job starts"""
+        self.assertEqual(self.command('generate_ssh_key').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the background event loop used by the API
+"""
+
+import unittest
+import os
+import sys
+import time
+import asyncio
+import threading
+import concurrent.futures
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import async_core
+
+
+class TestAsyncCore(unittest.TestCase):
+    """Test running coroutines on the shared loop"""
+
+    def test_run_returns_result(self):
+        """Test that run() waits for the coroutine's result"""
+        async def double(value):
+            await asyncio.sleep(0.01)
+            return value * 2
+
+        self.assertEqual(async_core.run(double(21)), 42)
+
+    def test_coroutines_overlap(self):
+        """Test that coroutines from several threads share the loop instead of serializing"""
+        results = []
+
+        def caller():
+            results.append(async_core.run(asyncio.sleep(0.5, result=1)))
+
+        threads = [threading.Thread(target=caller) for _ in range(8)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [1] * 8)
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_run_timeout_cancels(self):
+        """Test that a caller's timeout cancels the coroutine"""
+        cancelled = threading.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            async_core.run(slow(), timeout=0.1)
+        self.assertTrue(cancelled.wait(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
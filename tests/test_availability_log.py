@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-host availability log
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import availability_log
+from availability_log import AvailabilityLog, parse_window, ROLLUP, DAY, HOUR
+
+START = 1_700_000_000 // DAY * DAY
+INTERVAL = 300
+
+
+class TestAvailabilityLog(unittest.TestCase):
+    """Test sample recording, compaction and window queries"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log = AvailabilityLog(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fill(self, days, offline_every=None):
+        """Record one sample per scan interval, dropping offline periodically"""
+        for i in range(days * DAY // INTERVAL):
+            online = not (offline_every and i % offline_every == 0)
+            self.log.record('10.0.0.1', online, 12, START + i * INTERVAL)
+        return START + days * DAY
+
+    def test_parse_window(self):
+        """Test window parsing"""
+        self.assertEqual(parse_window('24h'), DAY)
+        self.assertEqual(parse_window('7d'), 7 * DAY)
+        with self.assertRaises(ValueError):
+            parse_window('7 days')
+
+    def test_uptime_and_flaps(self):
+        """Test uptime percentage and flap counting over raw samples"""
+        now = self.fill(1, offline_every=12)
+        summary = self.log.summarize('10.0.0.1', START, now)
+
+        self.assertEqual(summary['samples'], 288)
+        self.assertEqual(summary['uptime_percent'], round(100 * 264 / 288, 2))
+        # Every offline sample after the first causes a down and an up transition
+        self.assertEqual(summary['flaps'], 24 * 2 - 1)
+        self.assertEqual(summary['avg_latency_ms'], 12.0)
+
+    def test_compaction_preserves_summaries(self):
+        """Test that hourly/daily rollups answer the same as raw samples"""
+        now = self.fill(40, offline_every=7)
+        before = self.log.summarize('10.0.0.1', START, now)
+        recent = self.log.summarize('10.0.0.1', now - DAY, now)
+
+        self.log.compact(now)
+        files = sorted(os.listdir(self.tmp.name))
+        self.assertEqual(files, ['10.0.0.1.daily', '10.0.0.1.hourly', '10.0.0.1.raw'])
+        self.assertLess(os.path.getsize(os.path.join(self.tmp.name, '10.0.0.1.raw')),
+                        3 * DAY // INTERVAL * 7 + 1)
+
+        self.assertEqual(self.log.summarize('10.0.0.1', START, now), before)
+        self.assertEqual(self.log.summarize('10.0.0.1', now - DAY, now), recent)
+
+        # Compacting again is a no-op
+        self.log.compact(now)
+        self.assertEqual(self.log.summarize('10.0.0.1', START, now), before)
+
+    def test_interrupted_compaction_does_not_double_count(self):
+        """Test that a crash between publishing rollups and rewriting the source is harmless"""
+        now = self.fill(40, offline_every=7)
+        before = self.log.summarize('10.0.0.1', START, now)
+
+        with mock.patch.object(availability_log, '_replace', side_effect=OSError('crash')):
+            with self.assertRaises(OSError):
+                self.log.compact(now)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, '10.0.0.1.hourly')))
+
+        self.log.compact(now)
+        self.assertEqual(self.log.summarize('10.0.0.1', START, now), before)
+        self.assertEqual([name for name in os.listdir(self.tmp.name) if name.startswith('.')], [])
+
+    def test_out_of_order_samples_merge_by_bucket(self):
+        """Test that samples recorded out of order fold into one sorted rollup per hour"""
+        for offset in (2 * HOUR + 60, HOUR + 60, 2 * HOUR + 120, 60):
+            self.log.record('10.0.0.1', True, 5, START + offset)
+        now = START + 5 * DAY
+        before = self.log.summarize('10.0.0.1', START, now)
+
+        self.log.compact(now)
+        with open(os.path.join(self.tmp.name, '10.0.0.1.hourly'), 'rb') as f:
+            hourly = [ROLLUP.unpack_from(chunk) for chunk in iter(lambda: f.read(ROLLUP.size), b'')]
+        self.assertEqual([(start, samples) for start, samples, *_ in hourly],
+                         [(START, 1), (START + HOUR, 1), (START + 2 * HOUR, 2)])
+        self.assertEqual(self.log.summarize('10.0.0.1', START, now), before)
+
+    def test_window_is_bucket_aligned_for_rollups(self):
+        """Test that windows over compacted data include whole overlapping buckets"""
+        now = self.fill(5)
+        self.log.compact(now)
+        summary = self.log.summarize('10.0.0.1', START + HOUR // 2, START + HOUR)
+        self.assertEqual(summary['samples'], HOUR // INTERVAL)
+        self.assertEqual(summary['uptime_percent'], 100.0)
+
+    def test_rejects_non_ip_hosts(self):
+        """Test that host names cannot escape the log directory"""
+        with self.assertRaises(ValueError):
+            self.log.summarize('../etc/passwd', 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
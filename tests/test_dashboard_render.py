@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Tests for the dashboard build and of its client rendering through a DOM shim
+(timings: tests/dashboard_bench.py)
+"""
+
+import unittest
+import os
+import re
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+import subprocess
+import importlib.util
+from unittest import mock
+
+# Add src directory to path for importing modules
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+from search_index import build_search_index, search, search_text
+
+BENCH_SCRIPT = os.path.join(os.path.dirname(__file__), 'dashboard_render_bench.js')
+NODE = shutil.which('node')
+
+
+def load_dashboard_generator():
+    """Import dashboard-generator.py, whose file name is not a valid module name"""
+    spec = importlib.util.spec_from_file_location(
+        'dashboard_generator', os.path.join(SRC_DIR, 'dashboard-generator.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+TYPES = ['idrac', 'proxmox', 'linux', 'windows', 'vnc']
+BANNERS = ['SSH-2.0-OpenSSH_8.9p1 Ubuntu-3ubuntu0.6', 'SSH-2.0-OpenSSH_9.2p1 Debian-2+deb12u2',
+           'SSH-2.0-dropbear_2022.83']
+SEARCH_QUERIES = ['10.0.12.', '10.0.3.7', 'debian', 'dropbear', 'r730', 'ubuntu-3', 'idrac',
+                  'proxmox', '7', 'no-such-host']
+
+
+def synthetic_servers(count):
+    """Build count server records with titles and SSH banners like the scanner's"""
+    servers = []
+    for i in range(count):
+        ip = f"10.{i // 65536}.{i // 256 % 256}.{i % 256}"
+        server_type = TYPES[i % len(TYPES)]
+        services = [{'type': 'ssh', 'port': 22, 'banner': BANNERS[i % len(BANNERS)]}] \
+            if server_type == 'linux' else []
+        servers.append({
+            'ip': ip, 'url': f"https://{ip}", 'type': server_type,
+            'title': f"iDRAC-R{720 + i % 20}" if server_type == 'idrac' else f"Server {i}",
+            'status': 'online' if i % 3 else 'offline', 'services': services,
+            'ports': {'22': True}
+        })
+    return servers
+
+
+def build_dashboard(www_dir):
+    """Generate the dashboard into www_dir and return the generator module"""
+    generator = load_dashboard_generator()
+    generator.TEMPLATE_FILE = os.path.join(www_dir, 'index.html')
+    generator.ASSETS_DIR = os.path.join(www_dir, 'assets')
+    generator.generate_dashboard()
+    return generator
+
+
+class TestDashboardBuild(unittest.TestCase):
+    """Test the hashed asset build"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.generator = build_dashboard(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assets(self):
+        return sorted(name for name in os.listdir(self.generator.ASSETS_DIR)
+                      if name.endswith(('.css', '.js')))
+
+    def test_shell_references_hashed_assets(self):
+        """Test that the shell links minified assets named by their content hash"""
+        with open(self.generator.TEMPLATE_FILE) as f:
+            html = f.read()
+        self.assertNotIn('<style>', html)
+
+        for name in self.assets():
+            self.assertIn(f"/assets/{name}", html)
+            with open(os.path.join(self.generator.ASSETS_DIR, name), 'rb') as f:
+                payload = f.read()
+            self.assertEqual(name.split('.')[1], hashlib.sha256(payload).hexdigest()[:12])
+
+    def assert_assets_smaller_than_source(self):
+        with open(self.generator.TEMPLATE_FILE) as f:
+            html = f.read()
+        for extension, source in (('css', self.generator.DASHBOARD_CSS),
+                                  ('js', self.generator.DASHBOARD_JS)):
+            name = re.search(r'/assets/(dashboard\.[0-9a-f]{12}\.' + extension + ')', html).group(1)
+            self.assertLess(os.path.getsize(os.path.join(self.generator.ASSETS_DIR, name)),
+                            len(source.encode('utf-8')))
+
+    def test_shipped_assets_smaller_than_source(self):
+        """Test that the CSS and JS builds are smaller than their source"""
+        self.assert_assets_smaller_than_source()
+
+    def test_fallback_assets_smaller_than_source(self):
+        """Test that the builds are smaller than their source without rcssmin/rjsmin"""
+        with mock.patch.multiple(self.generator, rcssmin=None, rjsmin=None):
+            self.generator.generate_dashboard()
+        self.assert_assets_smaller_than_source()
+
+    def test_rebuild_unchanged_writes_nothing(self):
+        """Test that regenerating identical output leaves every file untouched"""
+        mtimes = {name: os.stat(os.path.join(self.generator.ASSETS_DIR, name)).st_mtime_ns
+                  for name in self.assets()}
+        self.assertFalse(self.generator.generate_dashboard())
+        self.assertEqual(self.assets(), sorted(mtimes))
+        for name, mtime in mtimes.items():
+            self.assertEqual(os.stat(os.path.join(self.generator.ASSETS_DIR, name)).st_mtime_ns,
+                             mtime)
+
+    def test_old_builds_are_pruned(self):
+        """Test that only the newest builds of each asset are kept"""
+        for i in range(5):
+            self.generator.DASHBOARD_CSS += f"\n.build-{i} {{ color: red; }}"
+            self.assertTrue(self.generator.generate_dashboard())
+        css = [name for name in self.assets() if name.endswith('.css')]
+        self.assertEqual(len(css), self.generator.ASSET_GENERATIONS)
+
+    def test_snapshot_prerenders_first_cards(self):
+        """Test that a snapshot build pre-renders the first cards and embeds only their records"""
+        servers = synthetic_servers(100)
+        servers[0]['title'] = '</script><script>alert(1)</script>'
+        document = {'version': 42, 'last_scan': '2026-01-01T00:00:00', 'scan_count': 3,
+                    'servers': servers}
+        self.assertTrue(self.generator.generate_dashboard(document))
+        with open(self.generator.TEMPLATE_FILE) as f:
+            html = f.read()
+
+        keys = re.findall(r'class="server-card" data-key="([^"]+)"', html)
+        self.assertEqual(keys, [server['ip'] for server in servers[:self.generator.SNAPSHOT_CARDS]])
+        self.assertIn('66 / 100', html)
+        self.assertNotIn('Loading servers...', html)
+        self.assertNotIn('<script>alert(1)', html)
+
+        embedded = re.search(r'<script type="application/json" id="initial-inventory">(.*?)</script>',
+                             html).group(1)
+        self.assertEqual(json.loads(embedded), {
+            'last_scan': '2026-01-01T00:00:00', 'scan_count': 3,
+            'counts': {'total': 100, 'online': 66, 'by_type': {server_type: 20 for server_type in TYPES}},
+            'servers': servers[:self.generator.SNAPSHOT_CARDS]
+        })
+        self.assertNotIn(servers[-1]['url'], html)
+
+    def test_card_ip_from_url(self):
+        """Test that a record without an ip shows the host from its URL, without the user"""
+        card = self.generator.render_server_card({'url': 'ssh://root@10.0.0.7:2222', 'type': 'linux'})
+        self.assertIn('<span class="detail-value">10.0.0.7</span>', card)
+        self.assertNotIn('root@10.0.0.7</span>', card)
+
+
+@unittest.skipUnless(NODE, 'node is required for the dashboard render benchmark')
+class TestDashboardRender(unittest.TestCase):
+    """Render 10k synthetic servers with the generated client script"""
+
+    COUNT = 10_000
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        generator = build_dashboard(cls.tmp.name)
+        with open(generator.TEMPLATE_FILE) as f:
+            script = re.search(r'<script src="/assets/([^"]+)"', f.read()).group(1)
+        cls.script_path = os.path.join(generator.ASSETS_DIR, script)
+
+        cls.servers = synthetic_servers(cls.COUNT)
+        cls.index = build_search_index(cls.servers, version=1)
+        servers_path = os.path.join(cls.tmp.name, 'servers.json')
+        index_path = os.path.join(cls.tmp.name, 'search_index.json')
+        for path, data in ((servers_path, cls.servers), (index_path, cls.index)):
+            with open(path, 'w') as f:
+                json.dump(data, f)
+
+        output = subprocess.run(
+            [NODE, '--expose-gc', BENCH_SCRIPT, cls.script_path, servers_path, index_path]
+            + SEARCH_QUERIES,
+            capture_output=True, text=True, timeout=120, check=True)
+        cls.results = json.loads(output.stdout)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_render_10k(self):
+        """Test that only the visible window of a 10k list is built and attached"""
+        initial = self.results['initial']
+        full = self.results['fullBuild']
+        self.assertLess(initial['attached'], 200)
+        self.assertLess(initial['created'], full['created'] / 10)
+
+    def test_updates_patch_only_changed_cards(self):
+        """Test that a one-host delta and an unchanged refresh rebuild no other cards"""
+        delta = self.results['delta']
+        unchanged = self.results['unchanged']
+        self.assertLessEqual(delta['removed'], 1)
+        self.assertLess(delta['created'], 20)
+        self.assertEqual(unchanged['created'], 0)
+        self.assertEqual(unchanged['inserted'], 0)
+        self.assertEqual(unchanged['innerHTML'], 0)
+
+    def test_filter_and_scroll_reuse_cards(self):
+        """Test that switching tabs back and scrolling keep the windowed list small"""
+        self.assertEqual(self.results['filterBack']['innerHTML'], 0)
+        self.assertLess(self.results['scroll']['attached'], 200)
+
+    def test_search_10k(self):
+        """Test that dashboard search over 10k hosts matches a substring scan exactly"""
+        texts = {server['ip']: search_text(server) for server in self.servers}
+        self.assertEqual(sorted(self.results['search']), sorted(SEARCH_QUERIES))
+        for query, result in self.results['search'].items():
+            expected = sorted(ip for ip, text in texts.items() if query in text)
+            self.assertEqual(result['matches'], expected, query)
+            self.assertEqual(sorted(search(self.index, query, texts)), expected, query)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming, version-cached exports
+"""
+
+import unittest
+import os
+import sys
+import json
+import io
+import csv
+import time
+import tarfile
+import zipfile
+import tempfile
+import xml.etree.ElementTree as ET
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from exporters import (FORMATS, ExportCache, Writer, connection_id, iter_rdm_json, iter_rdm_xml,
+                       parse_formats, parse_since, stream_archive)
+from inventory import ServerRecord
+
+
+def make_servers():
+    return [
+        ServerRecord('10.0.0.1', type='idrac', title='iDRAC <rack 1> & "spare"', url='https://10.0.0.1'),
+        ServerRecord('10.0.0.2', type='linux'),
+        ServerRecord('10.0.0.3', type='vnc', ports={'5901': True}),
+        ServerRecord('10.0.0.4', type='windows')
+    ]
+
+
+class TestExporters(unittest.TestCase):
+    """Test RDM output, export caching and garbage collection"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ExportCache(self.tmp.name, keep=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rdm_json(self):
+        """Test that the streamed JSON is what json.dump(indent=2) writes"""
+        for servers in (make_servers(), []):
+            text = ''.join(iter_rdm_json(servers))
+            document = json.loads(text)
+            self.assertEqual(text, json.dumps(document, indent=2))
+            self.assertEqual(len(document['Connections']), len(servers))
+        vnc = json.loads(''.join(iter_rdm_json(make_servers())))['Connections'][2]
+        self.assertEqual((vnc['ConnectionType'], vnc['Port']), ('VNC', 5901))
+
+    def test_rdm_xml(self):
+        """Test that the streamed XML parses, with names escaped"""
+        root = ET.fromstring(''.join(iter_rdm_xml(make_servers())))
+        connections = root.findall('./Connections/Group/Connection')
+        self.assertEqual([c.get('Type') for c in connections],
+                         ['WebBrowser', 'SSHShell', 'VNC', 'RDPConfigured'])
+        self.assertEqual(connections[0].get('Name'), 'iDRAC <rack 1> & "spare"')
+        self.assertEqual(connections[2].findtext('Port'), '5901')
+
+    def test_ids_are_stable(self):
+        """Test that a server keeps its connection ID across exports and formats"""
+        first = json.loads(''.join(iter_rdm_json(make_servers())))['Connections']
+        second = json.loads(''.join(iter_rdm_json(make_servers())))['Connections']
+        self.assertEqual([c['ID'] for c in first], [c['ID'] for c in second])
+        self.assertEqual(len({c['ID'] for c in first}), 4)
+        root = ET.fromstring(''.join(iter_rdm_xml(make_servers())))
+        self.assertEqual([c.get('ID') for c in root.iter('Connection')], [c['ID'] for c in first])
+
+    def test_incremental_export(self):
+        """Test that an incremental export holds only changed connections and the removed IDs"""
+        changed, removed = make_servers()[1:2], [{'ip': '10.0.0.9', 'url': None}]
+        document = json.loads(''.join(iter_rdm_json(changed, 12, 10, removed)))
+        self.assertEqual([c['Host'] for c in document['Connections']], ['10.0.0.2'])
+        self.assertEqual(document['Removed'], [{'ID': connection_id('10.0.0.9'), 'Host': '10.0.0.9'}])
+        self.assertEqual((document['InventoryVersion'], document['Since']), (12, 10))
+
+        root = ET.fromstring(''.join(iter_rdm_xml([], 12, 10, removed)))
+        self.assertEqual((root.get('InventoryVersion'), root.get('Since')), ('12', '10'))
+        self.assertEqual(root.findall('./Connections/Group/Connection'), [])
+        self.assertEqual(root.find('./Removed/Connection').get('ID'), connection_id('10.0.0.9'))
+
+        filename, _ = self.cache.ensure('json', 12, changed, 10, removed)
+        self.assertEqual(filename, 'rdm_export_delta_v10-v12_r2.json')
+        self.assertNotEqual(self.cache.etag('json', 12, 10), self.cache.etag('json', 12))
+
+    def test_parse_since(self):
+        """Test that since accepts a version or the name of a previous export"""
+        self.assertEqual(parse_since('15'), 15)
+        self.assertEqual(parse_since(self.cache.filename('json', 15)), 15)
+        self.assertEqual(parse_since(self.cache.filename('rdm', 21, since=15)), 21)
+        with self.assertRaises(ValueError):
+            parse_since('yesterday')
+
+    def test_writer_needs_entry(self):
+        """Test that a writer without entry() fails when created, not part way through an export"""
+        class Headless(Writer):
+            def header(self):
+                return 'header'
+
+        with self.assertRaises(TypeError):
+            Headless()
+
+    def test_all_formats_in_one_pass(self):
+        """Test that every format is written from one walk over the servers"""
+        files = self.cache.build(list(FORMATS), 3, make_servers())
+        self.assertTrue(all(built for _, built in files.values()))
+        self.assertEqual(self.cache.build(['csv', 'ansible'], 3, make_servers()),
+                         {'csv': (files['csv'][0], False), 'ansible': (files['ansible'][0], False)})
+
+        def read(format):
+            with open(os.path.join(self.tmp.name, files[format][0])) as f:
+                return f.read()
+
+        self.assertIn('Host linux-10.0.0.2\n    HostName 10.0.0.2\n    Port 22\n', read('ssh_config'))
+        self.assertNotIn('10.0.0.4', read('ssh_config'))
+        self.assertIn('[windows]\n10.0.0.4\n', read('ansible'))
+        self.assertIn('[linux]\n10.0.0.2 ansible_user=root ansible_port=22', read('ansible'))
+        rows = list(csv.DictReader(io.StringIO(read('csv'))))
+        self.assertEqual([row['host'] for row in rows], ['10.0.0.1', '10.0.0.2', '10.0.0.3', '10.0.0.4'])
+        self.assertEqual(rows[0]['name'], 'iDRAC <rack 1> & "spare"')
+        nodes = ET.fromstring(read('mremoteng')).findall('./Node/Node')
+        self.assertEqual([n.get('Protocol') for n in nodes], ['HTTPS', 'SSH2', 'VNC', 'RDP'])
+        self.assertEqual(nodes[1].get('Id'), connection_id('10.0.0.2'))
+
+        with self.assertRaises(ValueError):
+            self.cache.build(['csv'], 4, make_servers(), since=3)
+        self.assertEqual(parse_formats(''), list(FORMATS))
+        with self.assertRaises(ValueError):
+            parse_formats('csv,pdf')
+
+    def test_archive(self):
+        """Test that exports are bundled as zip and tar.gz archives"""
+        files = self.cache.build(['json', 'csv'], 3, make_servers())
+        members = [(name, os.path.join(self.tmp.name, name)) for name, _ in files.values()]
+        with zipfile.ZipFile(io.BytesIO(b''.join(stream_archive(members, 'zip')))) as archive:
+            self.assertEqual(archive.namelist(), [name for name, _ in members])
+            self.assertEqual(len(json.loads(archive.read(members[0][0]))['Connections']), 4)
+        data = b''.join(stream_archive(members, 'tar'))
+        with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as archive:
+            self.assertEqual(archive.getnames(), [name for name, _ in members])
+
+    def test_export_built_once_per_version(self):
+        """Test that an export is rendered once and reused while the version is unchanged"""
+        filename, built = self.cache.ensure('json', 7, make_servers())
+        self.assertTrue(built)
+        self.assertEqual(self.cache.ensure('json', 7, make_servers()), (filename, False))
+        self.assertEqual(self.cache.cached('json', 7), os.path.join(self.tmp.name, filename))
+        self.assertNotEqual(self.cache.etag('json', 7), self.cache.etag('json', 8))
+
+    def test_abandoned_stream_leaves_nothing(self):
+        """Test that an export stopped part way is not published"""
+        stream = self.cache.stream('rdm', 1, make_servers())
+        next(stream)
+        stream.close()
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_old_exports_are_collected(self):
+        """Test that only the newest exports per format (and no legacy files) are kept"""
+        legacy = os.path.join(self.tmp.name, 'rdm_export_20240101_120000.json')
+        with open(legacy, 'w') as f:
+            f.write('{}')
+        os.utime(legacy, (time.time() - 86400,) * 2)
+        for version in range(1, 5):
+            self.cache.ensure('json', version, make_servers())
+            os.utime(self.cache.path('json', version), (time.time() - 100 + version,) * 2)
+        self.cache.ensure('rdm', 1, make_servers())
+        self.cache.collect_garbage()
+        self.assertEqual(sorted(os.listdir(self.tmp.name)),
+                         ['rdm_export_v1_r2.rdm', 'rdm_export_v3_r2.json', 'rdm_export_v4_r2.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for fleet command fan-out, against local sshd stand-ins
+"""
+
+import unittest
+import os
+import sys
+import time
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fleet import run_fleet, summarize
+from ssh_sessions import SessionPool
+from ssh_server_standin import StandinHost
+
+
+class TestFleet(unittest.TestCase):
+    """Test parallel runs, streamed output and the aggregate summary"""
+
+    def setUp(self):
+        self.hosts = []
+        self.pool = SessionPool(connect_timeout=2)
+
+    def tearDown(self):
+        self.pool.close_all()
+        for host in self.hosts:
+            host.close()
+
+    def host(self, **kwargs):
+        host = StandinHost(**kwargs)
+        self.hosts.append(host)
+        return host
+
+    def target(self, host, password='secret'):
+        return {'ip': '127.0.0.1', 'port': host.port, 'type': 'linux', 'username': 'root',
+                'password': password}
+
+    def test_results_stream_and_group(self):
+        """Test per-host streaming, failures and grouping of identical outputs"""
+        first, second, third = self.host(), self.host(), self.host()
+        locked = self.host(password='other')
+        with open(os.path.join(third.home, 'marker'), 'w') as f:
+            f.write('odd\n')
+        targets = [self.target(first), self.target(second), self.target(third),
+                   self.target(locked)]
+        output, finished = [], []
+        results = run_fleet(self.pool, targets, 'cat "$HOME/marker" 2>/dev/null || echo same',
+                            on_output=lambda ip, stream, text: output.append((stream, text)),
+                            on_result=finished.append)
+
+        self.assertEqual([r['stdout'] for r in results[:3]], ['same\n', 'same\n', 'odd\n'])
+        self.assertEqual(len(finished), 4)
+        self.assertIn(('stdout', 'odd\n'), output)
+
+        summary = summarize(results, wall_seconds=1.0)
+        self.assertEqual((summary['hosts'], summary['succeeded'], summary['failed']), (4, 3, 1))
+        self.assertEqual(summary['exit_codes'], {'0': 3, 'error': 1})
+        self.assertEqual([(g['count'], g['stdout']) for g in summary['groups']][0], (2, 'same\n'))
+        self.assertEqual(sum(g['count'] for g in summary['groups']), 4)
+        self.assertEqual(summary['timings']['wall'], 1.0)
+        self.assertNotIn('stdout', summary['results'][0])
+
+    def test_concurrency_cap(self):
+        """Test that hosts run in parallel up to the limit"""
+        hosts = [self.host(delay=0.5) for _ in range(8)]
+        started = time.monotonic()
+        results = run_fleet(self.pool, [self.target(host) for host in hosts], 'echo ok', concurrency=4)
+        elapsed = time.monotonic() - started
+        self.assertEqual([r['exit_status'] for r in results], [0] * 8)
+        # Two waves of four, not eight hosts one after another
+        self.assertGreaterEqual(elapsed, 1.0)
+        self.assertLess(elapsed, 3.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
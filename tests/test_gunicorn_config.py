@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tests for the API's gunicorn configuration
+"""
+
+import unittest
+import os
+import sys
+import time
+import runpy
+import signal
+import socket
+import tempfile
+import subprocess
+import http.client
+from unittest import mock
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(TESTS_DIR, '..', 'src')
+CONFIG_FILE = os.path.join(SRC_DIR, 'gunicorn.conf.py')
+
+sys.path.insert(0, SRC_DIR)
+
+from jobs import JobStore, ACTIVE
+
+
+class TestGunicornConfig(unittest.TestCase):
+    """Test that the server settings come from the environment"""
+
+    def load(self, **environ):
+        with mock.patch.dict(os.environ, environ):
+            return runpy.run_path(CONFIG_FILE)
+
+    def test_defaults(self):
+        """Test the threaded-worker defaults"""
+        config = self.load()
+        self.assertEqual(config['worker_class'], 'gunicorn_worker.JobDrainingWorker')
+        self.assertEqual(config['max_requests'], 0)
+        self.assertEqual(config['bind'], '0.0.0.0:8765')
+        self.assertGreaterEqual(config['workers'], 1)
+        self.assertGreater(config['threads'], 1)
+        self.assertLess(config['graceful_timeout'], config['timeout'])
+
+    def test_environment_overrides(self):
+        """Test that workers, threads, timeouts and keep-alive can be set per deployment"""
+        config = self.load(API_WORKERS='6', API_THREADS='4', API_TIMEOUT='90',
+                           API_GRACEFUL_TIMEOUT='10', API_KEEPALIVE='15', API_BIND='127.0.0.1:9000')
+        self.assertEqual((config['workers'], config['threads']), (6, 4))
+        self.assertEqual((config['timeout'], config['graceful_timeout'], config['keepalive']),
+                         (90, 10, 15))
+        self.assertEqual(config['bind'], '127.0.0.1:9000')
+
+    def test_blank_values_use_defaults(self):
+        """Test that an empty variable falls back to the default"""
+        self.assertEqual(self.load(API_THREADS='')['threads'], self.load()['threads'])
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestWorkerRestart(unittest.TestCase):
+    """Test that restarting a worker lets the background jobs it runs finish
+
+    The job outlasts the worker timeout, after which the arbiter kills an
+    exiting worker that has stopped sending heartbeats.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.tmp.name, 'jobs.db')
+        self.port = free_port()
+        self.server = None
+
+    def tearDown(self):
+        if self.server is not None:
+            self.server.terminate()
+            try:
+                self.server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.server.kill()
+        self.tmp.cleanup()
+
+    def start_server(self, **environ):
+        env = dict(os.environ, API_BIND=f'127.0.0.1:{self.port}', API_WORKERS='1', API_THREADS='2',
+                   API_ACCESS_LOG='', API_LOG_LEVEL='warning', API_MAX_REQUESTS_JITTER='0',
+                   JOBS_DB=self.db, JOB_SECONDS='5', API_TIMEOUT='2', API_GRACEFUL_TIMEOUT='1',
+                   **environ)
+        self.server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', CONFIG_FILE,
+             '--pythonpath', f'{SRC_DIR},{TESTS_DIR}', 'job_restart_app:app'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            try:
+                self.get('/')
+                return
+            except OSError:
+                time.sleep(0.1)
+        self.fail('gunicorn did not start')
+
+    def get(self, path):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=15)
+        try:
+            conn.request('GET', path)
+            return conn.getresponse().read().decode()
+        finally:
+            conn.close()
+
+    def wait_for_job(self, job_id):
+        store = JobStore(self.db)
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            job = store.get(job_id)
+            if job['status'] not in ACTIVE:
+                return job
+            time.sleep(0.1)
+        self.fail('job did not finish')
+
+    def assert_job_survives(self, restart):
+        job_id, worker_pid = self.get('/start').split()
+        restart()
+        job = self.wait_for_job(job_id)
+        self.assertEqual(job['status'], 'succeeded', job['error'])
+        self.assertEqual(job['result'], {'pid': int(worker_pid)})
+        # The old worker exited once its job was done and a new one serves requests
+        self.assertNotEqual(self.get('/'), worker_pid)
+
+    def test_graceful_reload(self):
+        """Test that a HUP reload waits for the old worker's running job"""
+        self.start_server()
+        self.assert_job_survives(lambda: self.server.send_signal(signal.SIGHUP))
+
+    def test_max_requests_recycle(self):
+        """Test that a worker recycled after max_requests finishes its job first"""
+        self.start_server(API_MAX_REQUESTS='2')
+        self.assert_job_survives(lambda: None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory inventory model (timings: tests/inventory_bench.py)
+"""
+
+import unittest
+import os
+import sys
+from unittest import mock
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from inventory import Inventory, ServerRecord, extract_ip, server_ip, query_servers, ip_sort_key
+
+TYPES = ['idrac', 'proxmox', 'linux', 'windows', 'vnc']
+
+
+def build_inventory(count):
+    """Build a synthetic inventory of count servers"""
+    inventory = Inventory(server_types=TYPES)
+    for i in range(count):
+        ip = f"10.{i // 65536}.{i // 256 % 256}.{i % 256}"
+        inventory.add(ServerRecord(
+            ip=ip,
+            url=f"https://{ip}",
+            type=TYPES[i % len(TYPES)],
+            status='online' if i % 3 else 'offline'
+        ))
+    return inventory
+
+
+class TestInventory(unittest.TestCase):
+    """Test record conversion and index maintenance"""
+
+    def test_extract_ip(self):
+        """Test IP extraction from every URL form the scanner produces"""
+        self.assertEqual(extract_ip('https://10.0.0.5'), '10.0.0.5')
+        self.assertEqual(extract_ip('https://10.0.0.5:8006/'), '10.0.0.5')
+        self.assertEqual(extract_ip('vnc://10.0.0.6:5901'), '10.0.0.6')
+        self.assertEqual(extract_ip('ssh://root@10.0.0.7'), '10.0.0.7')
+        self.assertEqual(server_ip({'url': 'rdp://10.0.0.8'}), '10.0.0.8')
+        self.assertEqual(server_ip({'ip': '10.0.0.9', 'url': 'http://x'}), '10.0.0.9')
+
+    def test_round_trip_keeps_unknown_fields(self):
+        """Test that dict conversion preserves fields the model does not know"""
+        data = {'url': 'https://10.0.0.1', 'type': 'idrac', 'title': 'iDRAC',
+                'status': 'online', 'protocol': 'HTTPS'}
+        record = ServerRecord.from_dict(data)
+
+        self.assertEqual(record.ip, '10.0.0.1')
+        self.assertEqual(record.to_dict()['protocol'], 'HTTPS')
+        self.assertFalse(hasattr(record, '__dict__'))
+
+    def test_indexes_follow_updates(self):
+        """Test that type/status/url indexes track updates and removals"""
+        inventory = build_inventory(10)
+        ip = '10.0.0.1'
+        old_type = inventory.get(ip).type
+
+        inventory.update(ip, status='offline', type='linux', url='ssh://root@10.0.0.1')
+        self.assertIn(inventory.get(ip), inventory.select(type='linux', status='offline'))
+        self.assertNotIn(ip, [r.ip for r in inventory.select(type=old_type)])
+        self.assertIsNone(inventory.by_url('https://10.0.0.1'))
+        self.assertIs(inventory.by_url('ssh://root@10.0.0.1'), inventory.get(ip))
+
+        inventory.remove_by_url('ssh://root@10.0.0.1')
+        self.assertNotIn(ip, inventory)
+        self.assertEqual(len(inventory), 9)
+        self.assertEqual(sum(inventory.type_counts().values()), 9)
+
+    def test_document_round_trip(self):
+        """Test conversion to and from the discovered_servers.json layout"""
+        inventory = build_inventory(20)
+        inventory.scan_count = 7
+        copy = Inventory.from_document(inventory.to_document())
+
+        self.assertEqual(copy.scan_count, 7)
+        self.assertEqual([r.to_dict() for r in copy], [r.to_dict() for r in inventory])
+        self.assertEqual(copy.count(type='idrac', status='online'),
+                         inventory.count(type='idrac', status='online'))
+
+
+class TestQueryServers(unittest.TestCase):
+    """Test filtering, sorting, projection and cursor pagination"""
+
+    def setUp(self):
+        self.inventory = build_inventory(250)
+
+    def page_through(self, **kwargs):
+        ips, cursor = [], None
+        while True:
+            result = query_servers(self.inventory, cursor=cursor, **kwargs)
+            ips.extend(server['ip'] for server in result['servers'])
+            cursor = result['next_cursor']
+            if not cursor:
+                return ips, result['total']
+
+    def test_filters(self):
+        """Test type, status and text filters"""
+        result = query_servers(self.inventory, type='idrac', status='online', limit=1000)
+        self.assertEqual(result['total'], self.inventory.count(type='idrac', status='online'))
+        self.assertTrue(all(s['type'] == 'idrac' and s['status'] == 'online'
+                            for s in result['servers']))
+
+        result = query_servers(self.inventory, text='10.0.0.12')
+        self.assertEqual(sorted(s['ip'] for s in result['servers']),
+                         ['10.0.0.12', '10.0.0.120', '10.0.0.121', '10.0.0.122', '10.0.0.123',
+                          '10.0.0.124', '10.0.0.125', '10.0.0.126', '10.0.0.127', '10.0.0.128',
+                          '10.0.0.129'])
+
+    def test_numeric_ip_order_and_pages(self):
+        """Test that cursor pages cover every record once in numeric IP order"""
+        ips, total = self.page_through(limit=40)
+        self.assertEqual(total, 250)
+        self.assertEqual(ips, [f"10.0.0.{i}" for i in range(250)])
+
+        ips, _ = self.page_through(limit=40, sort='-ip')
+        self.assertEqual(ips, [f"10.0.0.{i}" for i in reversed(range(250))])
+
+    def test_sort_by_type_pages(self):
+        """Test paging on a non-unique sort key"""
+        ips, _ = self.page_through(limit=7, sort='type', status='online')
+        records = [self.inventory.get(ip) for ip in ips]
+        self.assertEqual(len(set(ips)), self.inventory.count(status='online'))
+        self.assertEqual([r.type for r in records], sorted(r.type for r in records))
+
+    def test_cursor_survives_removal(self):
+        """Test that removing a record already paged past does not skip others"""
+        first = query_servers(self.inventory, limit=10)
+        self.inventory.remove('10.0.0.3')
+        second = query_servers(self.inventory, limit=10, cursor=first['next_cursor'])
+        self.assertEqual(second['servers'][0]['ip'], '10.0.0.10')
+
+    def test_projection_and_validation(self):
+        """Test field projection and rejected parameters"""
+        result = query_servers(self.inventory, limit=2, fields=['ip', 'status'])
+        self.assertEqual(set(result['servers'][0]), {'ip', 'status'})
+
+        with self.assertRaises(ValueError):
+            query_servers(self.inventory, sort='password')
+        with self.assertRaises(ValueError):
+            query_servers(self.inventory, cursor='not-a-cursor')
+        with self.assertRaises(ValueError):
+            query_servers(self.inventory, limit=0)
+
+    def test_summary(self):
+        """Test status panel counts"""
+        summary = self.inventory.summary()
+        self.assertEqual(summary['total'], 250)
+        self.assertEqual(summary['online'], self.inventory.count(status='online'))
+        self.assertEqual(sum(summary['by_type'].values()), 250)
+
+
+class TestInventoryScale(unittest.TestCase):
+    """Test that lookups on a 10k-server inventory are answered from the indexes"""
+
+    COUNT = 10_000
+
+    def setUp(self):
+        self.inventory = build_inventory(self.COUNT)
+        self.records = list(self.inventory)
+
+    def test_lookups_10k(self):
+        """Test that lookups and selects never walk the whole inventory"""
+        expected = sorted(record.ip for record in self.records
+                          if record.type == 'linux' and record.status == 'online')
+        with mock.patch.object(Inventory, '__iter__', side_effect=AssertionError('linear scan')):
+            for record in self.records:
+                self.assertIs(self.inventory.get(record.ip), record)
+                self.assertIs(self.inventory.by_url(record.url), record)
+            selected = self.inventory.select(type='linux', status='online')
+
+        self.assertEqual(sorted(record.ip for record in selected), expected)
+        self.assertEqual(len(selected), self.inventory.count(type='linux', status='online'))
+
+    def test_query_page_10k(self):
+        """Test that a filtered, sorted page over 10k servers holds only the requested page"""
+        online = self.inventory.count(status='online')
+        result = query_servers(self.inventory, status='online', sort='-ip', limit=100)
+
+        self.assertEqual(result['total'], online)
+        self.assertEqual([server['ip'] for server in result['servers']],
+                         sorted((record.ip for record in self.records if record.is_online),
+                                key=ip_sort_key, reverse=True)[:100])
+        self.assertIsNotNone(result['next_cursor'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite inventory store
+"""
+
+import unittest
+import os
+import sys
+import json
+import tempfile
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from inventory_store import InventoryStore, InventoryCache
+
+
+def make_server(ip, server_type='linux', status='online'):
+    """Build a server record in the scanner's layout"""
+    return {
+        'ip': ip,
+        'url': f"ssh://root@{ip}",
+        'type': server_type,
+        'title': f"Server {ip}",
+        'status': status,
+        'last_seen': '2024-01-01T12:00:00+00:00',
+        'services': [],
+        'ports': {'22': True}
+    }
+
+
+class TestInventoryStore(unittest.TestCase):
+    """Test inventory store queries, mutations and snapshot export"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = os.path.join(self.tmp.name, 'www')
+        self.store = InventoryStore(os.path.join(self.tmp.name, 'inventory.db'), self.data_dir)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def save(self, servers, **meta):
+        document = {'servers': servers, 'last_scan': 'now', 'scan_count': 1}
+        document.update(meta)
+        return self.store.save_document(document)
+
+    def test_queries_by_index(self):
+        """Test lookups by ip, url, type and status"""
+        self.save([
+            make_server('10.0.0.1', 'idrac'),
+            make_server('10.0.0.2', 'linux', 'offline'),
+            make_server('10.0.0.3', 'linux')
+        ])
+
+        self.assertEqual(self.store.get_server('10.0.0.1')['type'], 'idrac')
+        self.assertEqual(self.store.find_by_url('ssh://root@10.0.0.2')['ip'], '10.0.0.2')
+        self.assertEqual(len(self.store.list_servers(server_type='linux')), 2)
+        self.assertEqual(
+            [s['ip'] for s in self.store.list_servers(server_type='linux', status='online')],
+            ['10.0.0.3']
+        )
+        self.assertIsNone(self.store.get_server('10.0.0.99'))
+
+    def test_load_inventory(self):
+        """Test loading the indexed in-memory model"""
+        self.save([make_server('10.0.0.1', 'idrac'), make_server('10.0.0.2')])
+        inventory = self.store.load_inventory()
+
+        self.assertEqual(len(inventory), 2)
+        self.assertEqual(inventory.get('10.0.0.1').type, 'idrac')
+        self.assertEqual(inventory.scan_count, 1)
+
+    def test_version_only_bumps_on_change(self):
+        """Test that saving identical data leaves the version untouched"""
+        servers = [make_server('10.0.0.1')]
+        self.assertTrue(self.save(servers))
+        version = self.store.version()
+
+        self.assertFalse(self.save(servers))
+        self.assertEqual(self.store.version(), version)
+
+        servers[0]['status'] = 'offline'
+        self.assertTrue(self.save(servers))
+        self.assertEqual(self.store.version(), version + 1)
+
+    def test_remove_by_url(self):
+        """Test removing a server by URL"""
+        self.save([make_server('10.0.0.1'), make_server('10.0.0.2')])
+
+        self.assertTrue(self.store.remove_by_url('ssh://root@10.0.0.1'))
+        self.assertFalse(self.store.remove_by_url('ssh://root@10.0.0.1'))
+        self.assertEqual([s['ip'] for s in self.store.list_servers()], ['10.0.0.2'])
+
+    def test_export_snapshots_only_when_changed(self):
+        """Test that JSON snapshots are written only after changes"""
+        self.save([make_server('10.0.0.1', 'idrac'), make_server('10.0.0.2')])
+
+        self.assertTrue(self.store.export_snapshots())
+        self.assertFalse(self.store.export_snapshots())
+
+        with open(os.path.join(self.data_dir, 'discovered_servers.json')) as f:
+            self.assertEqual(len(json.load(f)['servers']), 2)
+        with open(os.path.join(self.data_dir, 'discovered_idracs.json')) as f:
+            self.assertEqual([s['ip'] for s in json.load(f)['servers']], ['10.0.0.1'])
+        with open(os.path.join(self.data_dir, 'search_index.json')) as f:
+            self.assertEqual(json.load(f)['version'], self.store.version())
+
+    def test_changes_since(self):
+        """Test that a delta lists only records added, modified or removed after a version"""
+        servers = [make_server(f"10.0.0.{i}") for i in range(1, 6)]
+        self.save(servers)
+        since = self.store.version()
+
+        servers[0]['status'] = 'offline'
+        servers.append(make_server('10.0.0.9'))
+        del servers[1]
+        self.save(servers)
+
+        changes = self.store.changes_since(since)
+        self.assertFalse(changes['full'])
+        self.assertEqual(changes['version'], since + 1)
+        self.assertEqual([s['ip'] for s in changes['added']], ['10.0.0.9'])
+        self.assertEqual([s['ip'] for s in changes['modified']], ['10.0.0.1'])
+        self.assertEqual(changes['removed'], [{'ip': '10.0.0.2', 'url': 'ssh://root@10.0.0.2'}])
+
+        current = self.store.changes_since(changes['version'])
+        self.assertEqual((current['added'], current['modified'], current['removed']), ([], [], []))
+
+    def test_last_seen_alone_is_not_a_change(self):
+        """Test that refreshing last_seen does not put a record in the delta"""
+        servers = [make_server('10.0.0.1'), make_server('10.0.0.2')]
+        self.save(servers)
+        since = self.store.version()
+
+        for server in servers:
+            server['last_seen'] = '2024-01-02T12:00:00+00:00'
+        self.save(servers, last_scan='later')
+
+        changes = self.store.changes_since(since)
+        self.assertEqual(changes['modified'], [])
+        self.assertEqual(changes['last_scan'], 'later')
+        self.assertEqual(self.store.get_server('10.0.0.1')['last_seen'], '2024-01-02T12:00:00+00:00')
+
+    def test_changes_fall_back_to_full_snapshot(self):
+        """Test the full snapshot for unknown, stale or oversized deltas"""
+        servers = [make_server('10.0.0.1'), make_server('10.0.0.2')]
+        self.save(servers)
+        since = self.store.version()
+
+        self.assertTrue(self.store.changes_since(0)['full'])
+        self.assertTrue(self.store.changes_since(since + 5)['full'])
+
+        for server in servers:
+            server['status'] = 'offline'
+        self.save(servers)
+        full = self.store.changes_since(since)
+        self.assertTrue(full['full'])
+        self.assertEqual(len(full['servers']), 2)
+
+    def test_scan_progress_does_not_change_version(self):
+        """Test that publishing scan progress leaves the inventory version alone"""
+        self.save([make_server('10.0.0.1')])
+        version = self.store.version()
+
+        self.assertIsNone(self.store.scan_progress())
+        self.store.set_scan_progress({'state': 'running', 'hosts_scanned': 3})
+        self.assertEqual(self.store.scan_progress()['hosts_scanned'], 3)
+        self.assertEqual(self.store.version(), version)
+
+    def test_imports_existing_json(self):
+        """Test that a new database is seeded from discovered_servers.json"""
+        data_dir = os.path.join(self.tmp.name, 'legacy')
+        os.makedirs(data_dir)
+        with open(os.path.join(data_dir, 'discovered_servers.json'), 'w') as f:
+            json.dump({'servers': [make_server('10.0.0.9')], 'last_scan': 'x', 'scan_count': 4}, f)
+
+        store = InventoryStore(os.path.join(self.tmp.name, 'seeded.db'), data_dir)
+        self.assertEqual(store.get_server('10.0.0.9')['type'], 'linux')
+        self.assertEqual(store.metadata()['scan_count'], 4)
+        self.assertFalse(store.export_snapshots())
+        store.close()
+
+    def test_inventory_cache(self):
+        """Test that the cache reloads only when the inventory version changes"""
+        self.save([make_server('10.0.0.1'), make_server('10.0.0.2', 'idrac')])
+        cache = InventoryCache(self.store, racy_window=0)
+        first = cache.get()
+        self.assertIs(cache.get(), first)
+        self.assertEqual(first.get('10.0.0.2').type, 'idrac')
+        self.assertEqual(first.by_url('ssh://root@10.0.0.1').ip, '10.0.0.1')
+
+        # The files change but the version does not: revalidated, not reloaded
+        self.store.set_scan_progress({'state': 'running'})
+        self.assertIs(cache.get(), first)
+
+        self.save([make_server('10.0.0.3')])
+        second = cache.get()
+        self.assertIsNot(second, first)
+        self.assertIn('10.0.0.3', second)
+
+        metrics = cache.metrics()
+        self.assertEqual((metrics['hits'], metrics['revalidations'], metrics['reloads']), (1, 1, 2))
+        self.assertEqual(metrics['version'], self.store.version())
+
+    def test_inventory_cache_racy_window(self):
+        """Test that a database written moments ago is checked against its version"""
+        self.save([make_server('10.0.0.1')])
+        cache = InventoryCache(self.store)
+        cache.get()
+        cache.get()
+        metrics = cache.metrics()
+        self.assertEqual((metrics['hits'], metrics['revalidations']), (0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
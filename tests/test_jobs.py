@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Tests for background jobs
+"""
+
+import unittest
+import os
+import sys
+import time
+import tempfile
+import threading
+import subprocess
+from unittest import mock
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import jobs
+from jobs import JobStore, JobRunner
+
+
+class TestJobs(unittest.TestCase):
+    """Test job submission, progress, results and retention"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = JobStore(os.path.join(self.tmp.name, 'jobs.db'))
+        self.runner = JobRunner(self.store, max_workers=2)
+
+    def tearDown(self):
+        self.runner.shutdown()
+        self.store.close()
+        self.tmp.cleanup()
+
+    def wait(self, job_id, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = self.store.get(job_id)
+            if job['status'] not in ('queued', 'running'):
+                return job
+            time.sleep(0.02)
+        self.fail(f"job {job_id} did not finish")
+
+    def test_submit_returns_before_the_job_finishes(self):
+        """Test that submit hands back an id while the job is still running"""
+        release = threading.Event()
+
+        def work(job):
+            release.wait(5)
+            return {'ok': True}
+
+        job_id = self.runner.submit('slow', work, {'ip': '10.0.0.1'})
+        job = self.store.get(job_id)
+        self.assertIn(job['status'], ('queued', 'running'))
+        self.assertEqual(job['params'], {'ip': '10.0.0.1'})
+        release.set()
+        job = self.wait(job_id)
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['result'], {'ok': True})
+
+    def test_drain_waits_for_running_jobs(self):
+        """Test that drain() returns once the process's jobs are done, heartbeating meanwhile"""
+        release = threading.Event()
+        job_id = self.runner.submit('slow', lambda job: release.wait(5))
+        beats = []
+        self.assertFalse(jobs.drain(timeout=0.1, keep_alive=lambda: beats.append(1), interval=0.02))
+        self.assertTrue(beats)
+        self.assertEqual(self.runner.pending(), 1)
+        release.set()
+        self.assertTrue(jobs.drain(timeout=5, interval=0.02))
+        self.assertEqual(self.runner.pending(), 0)
+        self.assertEqual(self.store.get(job_id)['status'], 'succeeded')
+
+    def test_progress_and_steps(self):
+        """Test per-step entries, done counts (uncounted steps excluded) and resuming steps after a sequence number"""
+        def work(job):
+            job.progress(message='deploying')
+            for i in range(3):
+                job.step({'ip': f'10.0.0.{i}', 'success': i != 1})
+            job.step({'ip': '10.0.0.2', 'output': 'done'}, counts=False)
+            return {'deployed': 2}
+
+        job_id = self.runner.submit('deploy', work, total=3)
+        job = self.wait(job_id)
+        self.assertEqual(job['progress'], {'done': 3, 'total': 3, 'message': 'deploying'})
+        self.assertEqual(job['steps'], 4)
+        self.assertEqual([entry['ip'] for _, entry in self.store.steps_since(job_id, 1)],
+                         ['10.0.0.1', '10.0.0.2', '10.0.0.2'])
+
+    def test_output_cannot_crowd_out_results(self):
+        """Test that output and counted steps are capped separately and drops are reported"""
+        def work(job):
+            for i in range(5):
+                job.step({'kind': 'output', 'text': str(i)}, counts=False)
+            for i in range(4):
+                job.step({'kind': 'result', 'ip': f'10.0.0.{i}'})
+            return job.dropped_steps()
+
+        with mock.patch.object(jobs, 'MAX_STEPS', 3), mock.patch.object(jobs, 'MAX_OUTPUT_STEPS', 2):
+            job = self.wait(self.runner.submit('chatty', work))
+        self.assertEqual(job['result'], {'counted': 1, 'output': 3})
+        self.assertEqual(job['dropped_steps'], {'counted': 1, 'output': 3})
+        self.assertEqual(job['progress']['done'], 4)
+        steps = self.store.steps_since(job['id'])
+        self.assertEqual([seq for seq, _ in steps], [1, 2, 3, 4, 5])
+        self.assertEqual([entry['kind'] for _, entry in steps], ['output'] * 2 + ['result'] * 3)
+
+    def test_failure_is_recorded(self):
+        """Test that an exception fails the job with its message"""
+        def work(job):
+            raise RuntimeError('Server 10.0.0.9 is not accessible')
+
+        job = self.wait(self.runner.submit('console', work))
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(job['error'], 'Server 10.0.0.9 is not accessible')
+        self.assertIsNone(job['result'])
+
+    def test_unserializable_result_fails(self):
+        """Test that a result that cannot be stored as JSON fails the job instead of leaving it running"""
+        job_id = self.runner.submit('odd', lambda job: {'value': object()})
+        job = self.wait(job_id)
+        self.assertEqual(job['status'], 'failed')
+        self.assertIn('not JSON serializable', job['error'])
+        self.assertTrue(jobs.drain(timeout=5, interval=0.02))
+
+    def test_oversized_result_is_dropped(self):
+        """Test that results over the size bound are not stored"""
+        self.store.result_max_bytes = 100
+        job = self.wait(self.runner.submit('big', lambda job: {'data': 'x' * 500}))
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertIsNone(job['result'])
+        self.assertIn('exceeds', job['progress']['message'])
+
+    def test_expired_jobs_are_pruned(self):
+        """Test that finished jobs past their TTL are deleted along with their steps"""
+        job_id = self.runner.submit('deploy', lambda job: job.step({'ip': '10.0.0.1'}))
+        self.wait(job_id)
+        self.store.ttl = -1
+        self.assertEqual(self.store.prune(), 1)
+        self.assertIsNone(self.store.get(job_id))
+        self.assertEqual(self.store.steps_since(job_id), [])
+
+    def test_store_size_bound_drops_oldest(self):
+        """Test that the oldest finished results go first when the store is over its budget"""
+        self.store.store_max_bytes = 2500
+        ids = []
+        for i in range(4):
+            ids.append(self.runner.submit('export', lambda job: {'data': 'x' * 1000}))
+            self.wait(ids[-1])
+        self.store.prune()
+        self.assertEqual([self.store.get(job_id) is not None for job_id in ids],
+                         [False, False, True, True])
+
+    def test_job_of_exited_worker_fails(self):
+        """Test that a job left running by a worker that exited is reported as failed"""
+        process = subprocess.Popen(['true'])
+        process.wait()
+        job_id = self.store.create('deploy')
+        self.store.start(job_id)
+        self.store._connect().execute('UPDATE jobs SET pid = ? WHERE id = ?', (process.pid, job_id))
+        job = self.store.get(job_id)
+        self.assertEqual(job['status'], 'failed')
+        self.assertIn('exited', job['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
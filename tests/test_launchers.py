@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for launcher scripts and launcher bundles
+"""
+
+import unittest
+import os
+import io
+import sys
+import tarfile
+import zipfile
+import tempfile
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import launchers
+from inventory import ServerRecord
+
+
+class TestLaunchers(unittest.TestCase):
+    """Test rendering, change-only rewrites and streamed bundles"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        launchers._written.clear()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_render(self):
+        """Test the console URL and client commands per server type"""
+        script = launchers.render('windows', '10.0.0.5')
+        self.assertTrue(script.startswith('#!/bin/bash\n# Connection Launcher for 10.0.0.5 (windows)'))
+        self.assertIn('mstsc /v:10.0.0.5', script)
+        self.assertIn('vnc://10.0.0.6:5901', launchers.render('vnc', '10.0.0.6', 5901))
+        self.assertIn('Access via web browser', launchers.render('unknown', '10.0.0.7'))
+        with self.assertRaises(ValueError):
+            launchers.render('linux', '10.0.0.1; rm -rf /')
+
+    def test_written_only_when_inputs_change(self):
+        """Test that an unchanged launcher is not rewritten, even by another process"""
+        name, written = launchers.write_launcher(self.tmp.name, 'proxmox', '10.0.0.8')
+        path = os.path.join(self.tmp.name, name)
+        self.assertEqual((name, written), ('connect-proxmox-10.0.0.8.sh', True))
+        self.assertTrue(os.stat(path).st_mode & 0o111)
+        self.assertFalse(launchers.write_launcher(self.tmp.name, 'proxmox', '10.0.0.8')[1])
+
+        # A fresh process recognises the file from its embedded hash
+        launchers._written.clear()
+        self.assertFalse(launchers.write_launcher(self.tmp.name, 'proxmox', '10.0.0.8')[1])
+
+        self.assertTrue(launchers.write_launcher(self.tmp.name, 'proxmox', '10.0.0.8', 8443)[1])
+        with open(path) as f:
+            self.assertIn('https://10.0.0.8:8443', f.read())
+
+    def records(self, count):
+        return [ServerRecord(f'10.0.{i // 256}.{i % 256}', type='linux', status='online')
+                for i in range(count)] + [ServerRecord('not-an-ip', type='linux')]
+
+    def test_zip_bundle_streams(self):
+        """Test that a zip bundle arrives in several chunks and holds one launcher per server"""
+        chunks = list(launchers.stream_bundle(self.records(300), 'zip'))
+        self.assertGreater(len(chunks), 1)
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            names = archive.namelist()
+            self.assertEqual(len(names), 300)
+            self.assertIn('ssh root@10.0.1.2', archive.read('connect-linux-10.0.1.2.sh').decode())
+            self.assertEqual(archive.getinfo(names[0]).external_attr >> 16 & 0o777, 0o755)
+
+    def test_tar_bundle(self):
+        """Test that a tar.gz bundle holds executable launchers"""
+        data = b''.join(launchers.stream_bundle(self.records(3), 'tar'))
+        with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as archive:
+            members = archive.getmembers()
+            self.assertEqual([m.name for m in members],
+                             [f'connect-linux-10.0.0.{i}.sh' for i in range(3)])
+            self.assertEqual(members[0].mode, 0o755)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the liveness cache
+"""
+
+import unittest
+import os
+import sys
+import time
+import socket
+import asyncio
+from datetime import datetime, timezone, timedelta
+from unittest import mock
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import liveness
+from inventory import ServerRecord
+from liveness import LivenessCache, probe_ports
+
+
+def closed_port():
+    """A local port with nothing listening on it"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestLivenessCache(unittest.TestCase):
+    """Test probe caching, scan answers and background refreshes"""
+
+    def setUp(self):
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(16)
+        self.port = self.listener.getsockname()[1]
+        self.cache = LivenessCache(timeout=0.5)
+
+    def tearDown(self):
+        self.listener.close()
+
+    def record(self, port, status='online', seen_ago=0):
+        seen = datetime.now(timezone.utc) - timedelta(seconds=seen_ago)
+        return ServerRecord('127.0.0.1', type='unknown', status=status, ports={str(port): True},
+                            last_seen=seen.isoformat())
+
+    def test_probe_is_cached(self):
+        """Test that an unknown host is probed once and then answered from the cache"""
+        first = self.cache.check('127.0.0.1', self.record(self.port, 'offline'))
+        self.assertEqual((first['online'], first['source'], first['port']), (True, 'probe', self.port))
+
+        with mock.patch.object(liveness, 'probe', side_effect=AssertionError('probed again')):
+            second = self.cache.check('127.0.0.1', self.record(self.port, 'offline'))
+        self.assertTrue(second['online'])
+        self.assertEqual((self.cache.metrics()['probes'], self.cache.metrics()['probe_hits']), (1, 1))
+
+    def test_closed_port_is_offline(self):
+        """Test that a refused connection reports the host offline"""
+        result = self.cache.check('127.0.0.1', self.record(closed_port(), 'offline'))
+        self.assertFalse(result['online'])
+
+    def test_probe_waits_briefly_for_close(self):
+        """Test that a probe waits for its connection to close, but no longer than CLOSE_TIMEOUT"""
+        class StuckWriter:
+            closed = waited = False
+
+            def close(self):
+                self.closed = True
+
+            async def wait_closed(self):
+                self.waited = True
+                await asyncio.sleep(60)
+
+        writer = StuckWriter()
+
+        async def open_connection(ip, port):
+            return None, writer
+
+        with mock.patch.object(liveness.asyncio, 'open_connection', open_connection), \
+                mock.patch.object(liveness, 'CLOSE_TIMEOUT', 0.05):
+            started = time.monotonic()
+            result = asyncio.run(liveness.probe('127.0.0.1', [self.port]))
+        self.assertEqual(result[0], self.port)
+        self.assertTrue(writer.closed and writer.waited)
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_fresh_scan_answers_and_refreshes(self):
+        """Test that a recent scan answers at once while a background probe corrects it"""
+        record = self.record(closed_port())
+        result = self.cache.check('127.0.0.1', record)
+        self.assertEqual((result['online'], result['source']), (True, 'scan'))
+
+        deadline = time.monotonic() + 5
+        while self.cache.metrics()['cached'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertFalse(self.cache.check('127.0.0.1', record)['online'])
+
+    def test_stale_scan_is_probed(self):
+        """Test that an old scan result is not trusted"""
+        result = self.cache.check('127.0.0.1', self.record(self.port, seen_ago=3600))
+        self.assertEqual(result['source'], 'probe')
+
+    def test_probe_ports(self):
+        """Test that the type's console port comes first, then ports the scan found open"""
+        record = ServerRecord('10.0.0.1', type='windows', ports={'22': True, '80': False})
+        self.assertEqual(probe_ports(record), [3389, 22])
+        self.assertEqual(probe_ports(None), [22, 443, 80, 3389, 5900])
+
+
+if __name__ == '__main__':
+    unittest.main()
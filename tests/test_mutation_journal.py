@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the inventory mutation journal
+"""
+
+import unittest
+import os
+import sys
+import time
+import tempfile
+import threading
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from inventory_store import InventoryStore
+from mutation_journal import MutationJournal
+
+
+def discovered(ip, server_type='linux'):
+    """Build a scan result in the scanner's identify_server() layout"""
+    return {'ip': ip, 'url': f"ssh://root@{ip}", 'type': server_type,
+            'title': f"Server {ip}", 'services': [], 'ports': {'22': True}}
+
+
+class TestMutationJournal(unittest.TestCase):
+    """Test coalesced application, acknowledgements and scan merging"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = os.path.join(self.tmp.name, 'www')
+        self.store = InventoryStore(os.path.join(self.tmp.name, 'inventory.db'), self.data_dir)
+        self.exports = []
+
+        def on_applied(version):
+            self.exports.append(version)
+            self.store.export_snapshots()
+
+        self.journal = MutationJournal(self.store, coalesce_delay=0.1, on_applied=on_applied)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_merge_scan_and_ack(self):
+        """Test that a scan merge is applied and acknowledged with its version"""
+        version, result = self.journal.merge_scan(
+            [discovered('10.0.0.1'), discovered('10.0.0.2', 'idrac')], time.time(),
+            credentials_by_type={'idrac': {'username': 'root'}}
+        )
+        self.assertEqual(version, self.store.version())
+        self.assertEqual(result['servers'], 2)
+        self.assertEqual(self.store.get_server('10.0.0.2')['credentials'], {'username': 'root'})
+        self.assertEqual(self.store.metadata()['scan_count'], 1)
+
+        # Hosts missing from the next scan go offline
+        self.journal.merge_scan([discovered('10.0.0.1')], time.time())
+        self.assertEqual(self.store.get_server('10.0.0.2')['status'], 'offline')
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, 'discovered_servers.json')))
+
+    def test_removal_during_scan_is_kept(self):
+        """Test that a server removed mid-scan is not re-added by that scan"""
+        self.journal.merge_scan([discovered('10.0.0.1'), discovered('10.0.0.2')], time.time())
+        scan_started = time.time()
+        version, result = self.journal.remove('ssh://root@10.0.0.1')
+        self.assertTrue(result['removed'])
+
+        _, result = self.journal.merge_scan(
+            [discovered('10.0.0.1'), discovered('10.0.0.2')], scan_started
+        )
+        self.assertEqual(result['skipped'], ['10.0.0.1'])
+        self.assertIsNone(self.store.get_server('10.0.0.1'))
+
+        # A later scan may rediscover it
+        self.journal.merge_scan([discovered('10.0.0.1')], time.time() + 1)
+        self.assertIsNotNone(self.store.get_server('10.0.0.1'))
+
+    def test_burst_coalesces_into_one_batch(self):
+        """Test that concurrent writers share one version bump and one snapshot"""
+        self.journal.merge_scan([discovered(f"10.0.1.{i}") for i in range(20)], time.time())
+        self.exports.clear()
+        base = self.store.version()
+
+        acks = []
+        lock = threading.Lock()
+
+        def remove(i):
+            ack = self.journal.remove(f"ssh://root@10.0.1.{i}")
+            with lock:
+                acks.append(ack)
+
+        threads = [threading.Thread(target=remove, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(acks), 20)
+        self.assertTrue(all(result['removed'] for _, result in acks))
+        self.assertEqual({version for version, _ in acks}, {base + 1})
+        self.assertEqual(self.exports, [base + 1])
+        self.assertEqual(self.store.list_servers(), [])
+
+    def test_update_and_missing_targets(self):
+        """Test field updates and mutations that match nothing"""
+        self.journal.merge_scan([discovered('10.0.0.1')], time.time())
+        version = self.store.version()
+
+        new_version, result = self.journal.update('10.0.0.1', title='Renamed')
+        self.assertTrue(result['found'])
+        self.assertEqual(new_version, version + 1)
+        self.assertEqual(self.store.get_server('10.0.0.1')['title'], 'Renamed')
+
+        unchanged, result = self.journal.remove('ssh://root@10.9.9.9')
+        self.assertFalse(result['removed'])
+        self.assertEqual(unchanged, new_version)
+
+    def test_second_process_applies_foreign_mutations(self):
+        """Test that mutations appended by another writer are applied by any applier"""
+        other = InventoryStore(self.store.path, self.data_dir)
+        self.journal.merge_scan([discovered('10.0.0.1')], time.time())
+        mutation_id = other.append_mutation('remove', {'url': 'ssh://root@10.0.0.1'})
+
+        self.journal.flush()
+        version, result = MutationJournal(other).wait(mutation_id, timeout=1)
+        self.assertTrue(result['removed'])
+        self.assertEqual(version, other.version())
+        other.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the dashboard search index
+"""
+
+import unittest
+import os
+import sys
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from search_index import (build_search_index, decode_postings, encode_postings, search,
+                          search_text)
+
+
+def make_server(ip, title, server_type='linux', banner=None):
+    """Build a server record in the scanner's layout"""
+    services = [{'type': 'ssh', 'port': 22, 'banner': banner}] if banner else []
+    return {'ip': ip, 'url': f"ssh://root@{ip}", 'type': server_type, 'title': title,
+            'services': services}
+
+
+class TestSearchIndex(unittest.TestCase):
+    """Test index encoding and lookups"""
+
+    def setUp(self):
+        self.servers = [
+            make_server('192.168.1.10', 'Linux/Unix Server (192.168.1.10)',
+                        banner='SSH-2.0-OpenSSH_9.2p1 Debian-2+deb12u2'),
+            make_server('192.168.1.11', 'Linux/Unix Server (192.168.1.11)',
+                        banner='SSH-2.0-dropbear_2022.83'),
+            make_server('192.168.2.20', 'iDRAC-R730-1234', 'idrac'),
+            make_server('10.0.0.5', 'pve1 - Proxmox Virtual Environment', 'proxmox')
+        ]
+        self.index = build_search_index(self.servers, version=7)
+        self.texts = {server['ip']: search_text(server) for server in self.servers}
+
+    def test_postings_round_trip(self):
+        """Test that posting lists survive gap encoding"""
+        ids = [0, 1, 2, 40, 1000, 99999]
+        self.assertEqual(decode_postings(encode_postings(ids)), ids)
+
+    def test_search_text_covers_banner_and_services(self):
+        """Test that the banner, service type, type and title are searchable"""
+        text = self.texts['192.168.1.10']
+        for part in ('192.168.1.10', 'linux/unix server', 'ssh', 'openssh_9.2p1 debian'):
+            self.assertIn(part, text)
+
+    def test_search_matches_substrings(self):
+        """Test lookups against a naive substring scan"""
+        for query in ('192.168.1.', 'debian', 'DROPBEAR', 'r730', 'proxmox', 'ssh', '1',
+                      'missing', ''):
+            expected = [ip for ip, text in self.texts.items() if query.lower() in text]
+            self.assertEqual(sorted(search(self.index, query, self.texts)), sorted(expected), query)
+
+    def test_common_grams_are_not_stored(self):
+        """Test that grams present in most servers are listed as common"""
+        self.assertIn('192', self.index['common'])
+        self.assertNotIn('192', self.index['grams'])
+        self.assertEqual(self.index['version'], 7)
+        self.assertEqual(self.index['ids'][2], '192.168.2.20')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for atomic snapshot writes
+"""
+
+import unittest
+import os
+import sys
+import json
+import gzip
+import stat
+import tempfile
+from unittest import mock
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import snapshot_writer
+from snapshot_writer import write_snapshot
+
+
+class TestSnapshotWriter(unittest.TestCase):
+    """Test change detection, atomic publish and precompressed copies"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'data', 'discovered_servers.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_and_skips_unchanged(self):
+        """Test that identical content is not rewritten"""
+        document = {'servers': [{'ip': '10.0.0.1'}], 'scan_count': 1}
+        self.assertTrue(write_snapshot(self.path, document))
+        mtime = os.stat(self.path).st_mtime_ns
+
+        self.assertFalse(write_snapshot(self.path, dict(document)))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, mtime)
+
+        document['scan_count'] = 2
+        self.assertTrue(write_snapshot(self.path, document))
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)['scan_count'], 2)
+
+    def test_permissions(self):
+        """Test that the file is world-readable"""
+        write_snapshot(self.path, {'servers': []})
+        self.assertTrue(os.stat(self.path).st_mode & stat.S_IROTH)
+
+    def test_no_temp_files_left(self):
+        """Test that publishing leaves only the snapshot"""
+        write_snapshot(self.path, {'servers': []})
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['discovered_servers.json'])
+
+    def test_unchanged_file_hashed_once(self):
+        """Test that an unchanged file is compared by its digest, read only when it changed on disk"""
+        write_snapshot(self.path, {'servers': []})
+        with mock.patch('builtins.open', side_effect=AssertionError('file re-read')):
+            self.assertFalse(write_snapshot(self.path, {'servers': []}))
+
+        # A fresh process hashes the published file once, then trusts its digest
+        snapshot_writer._digests.clear()
+        self.assertFalse(write_snapshot(self.path, {'servers': []}))
+        with mock.patch('builtins.open', side_effect=AssertionError('file re-read')):
+            self.assertFalse(write_snapshot(self.path, {'servers': []}))
+
+    def test_outside_change_is_rewritten(self):
+        """Test that a file changed by something else is republished"""
+        write_snapshot(self.path, {'servers': []})
+        with open(self.path, 'w') as f:
+            f.write('{"servers":{}}')
+        self.assertTrue(write_snapshot(self.path, {'servers': []}))
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {'servers': []})
+
+    def test_precompressed_variants(self):
+        """Test that a .gz copy tracks the snapshot content and mtime"""
+        document = {'servers': [{'ip': f"10.0.0.{i}", 'type': 'linux'} for i in range(50)]}
+        write_snapshot(self.path, document)
+
+        with open(self.path, 'rb') as f, gzip.open(self.path + '.gz', 'rb') as gz:
+            self.assertEqual(gz.read(), f.read())
+        self.assertEqual(os.stat(self.path + '.gz').st_mtime_ns, os.stat(self.path).st_mtime_ns)
+        self.assertLess(os.path.getsize(self.path + '.gz'), os.path.getsize(self.path))
+
+        # Small content is served uncompressed and stale copies are removed
+        write_snapshot(self.path, {'servers': []})
+        self.assertFalse(os.path.exists(self.path + '.gz'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for parallel SSH key deployment, against local paramiko sshd stand-ins
+"""
+
+import unittest
+import os
+import sys
+import time
+import tempfile
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import paramiko
+from ssh_deploy import deploy_key, deploy_keys
+from ssh_server_standin import StandinHost, BlackholeHost
+
+
+class TestSSHDeploy(unittest.TestCase):
+    """Test idempotent appends, failures and bounded parallelism"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.key = paramiko.RSAKey.generate(2048)
+        cls.key_path = os.path.join(cls.tmp.name, 'server_rsa')
+        cls.key.write_private_key_file(cls.key_path)
+        cls.public_key = f"ssh-rsa {cls.key.get_base64()} admin@example.com"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.hosts = []
+
+    def tearDown(self):
+        for host in self.hosts:
+            host.close()
+
+    def host(self, cls=StandinHost, **kwargs):
+        host = cls(**kwargs)
+        self.hosts.append(host)
+        return host
+
+    def target(self, host, password='secret'):
+        return {'ip': '127.0.0.1', 'port': host.port, 'type': 'linux', 'username': 'root',
+                'password': password}
+
+    def authorized_keys(self, host):
+        with open(host.authorized_keys) as f:
+            return f.read()
+
+    def test_deploy_is_idempotent(self):
+        """Test that the key is added once and a rerun authenticates with it"""
+        host = self.host()
+        first = deploy_keys([self.target(host)], self.public_key, self.key_path)[0]
+        self.assertEqual((first['success'], first['status']), (True, 'added'))
+
+        # The password no longer works; the deployed key does
+        second = deploy_keys([self.target(host, password='wrong')], self.public_key, self.key_path)[0]
+        self.assertEqual((second['success'], second['status']), (True, 'present'))
+        self.assertEqual(self.authorized_keys(host).count(self.public_key), 1)
+
+    def test_unterminated_authorized_keys(self):
+        """Test that an existing last line without a newline is not joined to the key"""
+        host = self.host()
+        os.makedirs(os.path.dirname(host.authorized_keys))
+        with open(host.authorized_keys, 'w') as f:
+            f.write('ssh-ed25519 AAAAexisting other@example.com')
+        result = deploy_key('127.0.0.1', self.public_key, password='secret', port=host.port)
+        self.assertTrue(result['success'])
+        self.assertEqual(self.authorized_keys(host).splitlines(),
+                         ['ssh-ed25519 AAAAexisting other@example.com', self.public_key])
+
+    def test_failures_are_reported_per_host(self):
+        """Test that bad credentials and hung hosts fail without stopping the others"""
+        good, bad, hung = self.host(), self.host(), self.host(BlackholeHost)
+        started = time.monotonic()
+        results = deploy_keys([self.target(good), self.target(bad, password='wrong'),
+                               self.target(hung)], self.public_key, timeout=1)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual([r['success'] for r in results], [True, False, False])
+        self.assertEqual(results[1]['message'], 'Authentication failed')
+        self.assertEqual(results[2]['status'], 'failed')
+
+    def test_concurrency_and_streaming(self):
+        """Test that hosts run in parallel up to the limit and results stream as they finish"""
+        hosts = [self.host(delay=0.5) for _ in range(8)]
+        streamed = []
+        started = time.monotonic()
+        results = deploy_keys([self.target(host) for host in hosts], self.public_key,
+                              concurrency=4, on_result=streamed.append)
+        elapsed = time.monotonic() - started
+        self.assertTrue(all(r['success'] for r in results))
+        self.assertEqual([r['ip'] for r in results], ['127.0.0.1'] * 8)
+        self.assertEqual(len(streamed), 8)
+        # Two waves of four, not eight hosts one after another
+        self.assertGreaterEqual(elapsed, 1.0)
+        self.assertLess(elapsed, 3.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled SSH session manager, against local sshd stand-ins
+"""
+
+import unittest
+import os
+import sys
+import time
+import tempfile
+import threading
+
+# Add src directory to path for importing modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import paramiko
+from ssh_sessions import SessionPool, SSHSessionError
+from ssh_server_standin import StandinHost, BlackholeHost
+
+
+class TestSessionPool(unittest.TestCase):
+    """Test connection reuse, multiplexing, eviction and reconnects"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.key = paramiko.RSAKey.generate(2048)
+        cls.key_path = os.path.join(cls.tmp.name, 'server_rsa')
+        cls.key.write_private_key_file(cls.key_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.hosts = []
+        self.pool = SessionPool(key_path=self.key_path, connect_timeout=2)
+
+    def tearDown(self):
+        self.pool.close_all()
+        for host in self.hosts:
+            host.close()
+
+    def host(self, cls=StandinHost, **kwargs):
+        host = cls(**kwargs)
+        self.hosts.append(host)
+        return host
+
+    def run_on(self, host, command, **kwargs):
+        return self.pool.run('127.0.0.1', command, port=host.port, password='secret', **kwargs)
+
+    def test_commands_reuse_one_connection(self):
+        """Test that repeated commands share a handshake and stream their output"""
+        host = self.host()
+        streamed = []
+        first = self.run_on(host, 'echo one; echo oops >&2; exit 3',
+                            on_output=lambda stream, text: streamed.append((stream, text)))
+        second = self.run_on(host, 'echo two')
+        self.assertEqual((first['exit_status'], first['stdout'], first['stderr']), (3, 'one\n', 'oops\n'))
+        self.assertIn(('stdout', 'one\n'), streamed)
+        self.assertEqual((second['stdout'], second['reused']), ('two\n', True))
+        self.assertEqual(host.connections, 1)
+
+        metrics = self.pool.metrics()
+        self.assertEqual((metrics['handshakes'], metrics['reuses'], metrics['channels']), (1, 1, 2))
+        self.assertEqual(metrics['reuse_rate'], 0.5)
+        self.assertGreater(metrics['handshake_seconds_saved'], 0)
+
+    def test_concurrent_commands_multiplex(self):
+        """Test that parallel commands on one host run as channels over a single connection"""
+        host = self.host(delay=0.5)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.run_on(host, 'echo ok')))
+                   for _ in range(4)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLess(time.monotonic() - started, 1.8)
+        self.assertEqual([r['stdout'] for r in results], ['ok\n'] * 4)
+        self.assertEqual(host.connections, 1)
+        self.assertEqual(self.pool._connecting, {})
+
+    def test_reconnects_after_drop(self):
+        """Test that a connection closed by the host is replaced transparently"""
+        host = self.host()
+        self.run_on(host, 'true')
+        host.drop_connections()
+        time.sleep(0.2)
+        result = self.run_on(host, 'echo back')
+        self.assertEqual((result['stdout'], result['reused']), ('back\n', False))
+        self.assertEqual(host.connections, 2)
+        self.assertEqual(self.pool.metrics()['reconnects'], 1)
+
+    def test_idle_and_lru_eviction(self):
+        """Test that idle sessions are closed, the pool never grows past its cap and no per-host state is left"""
+        self.pool.max_sessions = 2
+        hosts = [self.host() for _ in range(3)]
+        for host in hosts:
+            self.run_on(host, 'true')
+        metrics = self.pool.metrics()
+        self.assertEqual((metrics['sessions'], metrics['evicted_lru']), (2, 1))
+
+        self.pool.idle_timeout = 0
+        self.assertEqual(self.pool.evict_idle(), 2)
+        self.assertEqual(self.pool.metrics()['sessions'], 0)
+        self.assertEqual(self.pool._connecting, {})
+
+    def test_failures_raise(self):
+        """Test that bad credentials and hung hosts raise without poisoning the pool"""
+        bad, hung = self.host(password='other'), self.host(BlackholeHost)
+        with self.assertRaises(SSHSessionError):
+            self.run_on(bad, 'true')
+        with self.assertRaises(SSHSessionError):
+            self.run_on(hung, 'true')
+        metrics = self.pool.metrics()
+        self.assertEqual((metrics['failures'], metrics['sessions']), (2, 0))
+        self.assertEqual(self.pool._connecting, {})
+
+    def test_command_timeout(self):
+        """Test that a command past its timeout is abandoned and the connection kept"""
+        host = self.host()
+        result = self.run_on(host, 'sleep 5', timeout=0.5)
+        self.assertTrue(result['timed_out'])
+        self.assertIsNone(result['exit_status'])
+        self.assertEqual(self.run_on(host, 'echo ok')['stdout'], 'ok\n')
+
+
+if __name__ == '__main__':
+    unittest.main()